@@ -0,0 +1,64 @@
+"""
+Бенчмарк конвертера HTML у Telegram HTML (manage.py bench converter).
+"""
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bot.benchmarks.legacy_converter import legacy_convert_html_to_telegram
+from bot.html_converter import convert_html_to_telegram
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "fixtures" / "converter"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark per-page conversion time on the pages in bot/fixtures/converter against "
+        "the previous BeautifulSoup implementation (bot/benchmarks/legacy_converter.py). "
+        "The pages are hand-made models of egwwritings content, not saved live pages. "
+        "Output equality is checked by tests/test_html_converter.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fixtures",
+            type=str,
+            default=str(FIXTURES_DIR),
+            help="Directory with <name>.html pages"
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=50,
+            help="Conversions of the whole corpus per measurement (default: 50)"
+        )
+
+    def handle(self, *args, **options):
+        fixtures = Path(options["fixtures"])
+        repeat = options["repeat"]
+        corpus = [page.read_text(encoding="utf-8") for page in sorted(fixtures.glob("*.html"))]
+        if not corpus:
+            raise CommandError(f"No *.html pages in {fixtures}")
+
+        # Обидві реалізації міряються по черзі в кожному повторі, щоб зміна навантаження
+        # машини за час прогону не зсувала відношення
+        legacy, streaming, speedups = [], [], []
+        for _ in range(repeat):
+            legacy.append(self._measure(legacy_convert_html_to_telegram, corpus))
+            streaming.append(self._measure(convert_html_to_telegram, corpus))
+            speedups.append(legacy[-1] / streaming[-1])
+        self.stdout.write(
+            f"pages={len(corpus)}  "
+            f"legacy={statistics.median(legacy):.3f} ms/page  "
+            f"streaming={statistics.median(streaming):.3f} ms/page  "
+            f"speedup={statistics.median(speedups):.1f}x "
+            f"(min {min(speedups):.1f}x, max {max(speedups):.1f}x)"
+        )
+
+    def _measure(self, func, corpus) -> float:
+        started = time.perf_counter()
+        for html in corpus:
+            func(html)
+        return (time.perf_counter() - started) * 1000 / len(corpus)
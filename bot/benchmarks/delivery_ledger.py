@@ -0,0 +1,93 @@
+"""
+Бенчмарк запису журналу доставки (manage.py bench delivery_ledger).
+"""
+import asyncio
+import itertools
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from bot.delivery import claim_recipients, get_redis, release_claims
+from bot.tasks import _record_sent
+from core.models import Book, DailyInspiration, SentInspiration, TelegramUser
+
+
+def _record_per_recipient(inspiration_id: int, delivered: list):
+    """Previous implementation: one get_or_create per delivered recipient."""
+    user_ids = dict(
+        TelegramUser.objects
+        .filter(telegram_id__in=[telegram_id for telegram_id, _ in delivered])
+        .values_list("telegram_id", "id")
+    )
+    for telegram_id, language in delivered:
+        SentInspiration.objects.get_or_create(
+            telegram_user_id=user_ids[telegram_id],
+            inspiration_id=inspiration_id,
+            language=language,
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark delivery ledger writes: SentInspiration rows per second written per "
+        "recipient (previous implementation) and in bulk, and Redis send claims per "
+        "second (tests/test_delivery.py checks that a retried batch writes and claims "
+        "nothing new). All data is rolled back and the claims are deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=str,
+            default="200,1000,5000",
+            help="Comma separated recipients per batch (default: 200,1000,5000)"
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(",") if size.strip())
+
+        with override_settings(DEBUG=False), transaction.atomic():
+            book = Book.objects.create(title="Ledger benchmark book", language="uk")
+            users = TelegramUser.objects.bulk_create(
+                [TelegramUser(telegram_id=10 ** 12 + index) for index in range(max(sizes))]
+            )
+            days = (date(2000, 1, 1) + timedelta(days=offset) for offset in itertools.count())
+            for size in sizes:
+                recipients = [(user.telegram_id, "uk") for user in users[:size]]
+                records = (("per recipient", _record_per_recipient), ("bulk", _record_sent))
+                for name, record in records:
+                    inspiration = DailyInspiration.objects.create(
+                        book=book, date=next(days), original_text="Ledger benchmark",
+                    )
+                    started = time.perf_counter()
+                    record(inspiration.id, recipients)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"recipients={size:>6}  ledger {name:<14} {size / elapsed:>10,.0f} rows/s  "
+                        f"elapsed={elapsed * 1000:8.1f} ms"
+                    )
+
+                elapsed = asyncio.run(self._claim(inspiration.id, recipients))
+                self.stdout.write(
+                    f"recipients={size:>6}  claims{'':<16} {size / elapsed:>10,.0f} claims/s  "
+                    f"elapsed={elapsed * 1000:8.1f} ms"
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Synthetic data rolled back, claims deleted"))
+
+    @staticmethod
+    async def _claim(inspiration_id: int, recipients: list) -> float:
+        redis = get_redis()
+        try:
+            started = time.perf_counter()
+            claimed = await claim_recipients(redis, inspiration_id, recipients)
+            elapsed = time.perf_counter() - started
+            await release_claims(redis, inspiration_id, claimed)
+        finally:
+            await redis.aclose()
+        return elapsed
@@ -0,0 +1,108 @@
+"""
+Бенчмарк вибору випадкового дня (manage.py bench random_day).
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bot.inspirations import RANDOM_DAY_FIELDS, book_ids, get_random_inspiration
+from core.models import Book, DailyInspiration
+
+
+def _load_whole_book(book_id: int) -> DailyInspiration:
+    """Previous implementation: materialize all days of the book and pick one."""
+    return random.choice(list(
+        DailyInspiration.objects
+        .select_related("book")
+        .filter(book_id=book_id)
+        .only(*RANDOM_DAY_FIELDS)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark random day selection on synthetic books of growing size. "
+        "All data is created inside a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=str,
+            default="366,3660,36600",
+            help="Comma separated numbers of days in the book (default: 366,3660,36600)"
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Selections per size and implementation (default: 20)"
+        )
+        parser.add_argument(
+            "--text-size",
+            type=int,
+            default=4000,
+            help="Characters in each text column of a synthetic day (default: 4000)"
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(",") if size.strip())
+        repeat = options["repeat"]
+        text = "x" * options["text_size"]
+
+        with transaction.atomic():
+            for size in sizes:
+                book = Book.objects.create(title=f"Benchmark book {size}", language="uk")
+                self._create_days(book, size, text)
+
+                for name, select in (
+                    ("whole book", _load_whole_book),
+                    ("by id", get_random_inspiration),
+                ):
+                    book_ids.invalidate(book.id)
+                    # Перший виклик прогріває кеш id, його не рахуємо
+                    select(book.id)
+                    timings, peaks = self._measure(select, book.id, repeat)
+                    self.stdout.write(
+                        f"days={size:>7}  {name:<10}  "
+                        f"median={statistics.median(timings):8.2f} ms  "
+                        f"max={max(timings):8.2f} ms  "
+                        f"peak memory={max(peaks) / 1024:10.1f} KiB"
+                    )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished, synthetic data rolled back"))
+
+    def _measure(self, select, book_id: int, repeat: int) -> tuple:
+        timings, peaks = [], []
+        for _ in range(repeat):
+            tracemalloc.start()
+            started = time.perf_counter()
+            select(book_id)
+            timings.append((time.perf_counter() - started) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return timings, peaks
+
+    def _create_days(self, book, count: int, text: str, batch_size: int = 1000):
+        first_day = date(2000, 1, 1)
+        for offset in range(0, count, batch_size):
+            DailyInspiration.objects.bulk_create([
+                DailyInspiration(
+                    book=book,
+                    date=first_day + timedelta(days=day),
+                    original_text=text,
+                    html_content=text,
+                    telegram_html=text,
+                    translation_ukrainian=text,
+                    translation_russian=text,
+                    translation_english=text,
+                )
+                for day in range(offset, min(offset + batch_size, count))
+            ])
@@ -0,0 +1,162 @@
+"""
+Бенчмарк латентності тіку планувальника (manage.py bench scheduler).
+"""
+import random
+import statistics
+import time
+from datetime import time as dt_time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bot.tasks import _due_settings, _plan_deliveries
+from core.models import Book, DailyInspiration, SentInspiration, TelegramUser, UserSettings
+from core.scheduling import local_date_at
+
+TIMEZONE = "Europe/Kyiv"
+
+
+def _plan_per_user(due_settings: list, now) -> dict:
+    """Previous implementation: inspiration and sent-status lookups for every due user."""
+    recipients = {}
+    for settings_obj in due_settings:
+        if (
+            settings_obj.is_active
+            and settings_obj.telegram_user.is_active
+            and settings_obj.selected_book_id
+        ):
+            inspiration = DailyInspiration.objects.filter(
+                book=settings_obj.selected_book,
+                date=local_date_at(now, settings_obj.timezone),
+            ).first()
+            if inspiration and (settings.DEBUG or not SentInspiration.objects.filter(
+                telegram_user=settings_obj.telegram_user,
+                inspiration=inspiration,
+                language=settings_obj.language,
+            ).exists()):
+                recipients.setdefault(inspiration.id, []).append(
+                    (settings_obj.telegram_user.telegram_id, settings_obj.language)
+                )
+    return recipients
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark due-users query of send_inspirations_to_users on synthetic users, then "
+        "planning the due users' deliveries (today's inspiration and already-sent check) "
+        "set-based and per user; half of the due users already got today's inspiration. "
+        "All data is created inside a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=str,
+            default="1000,10000,100000,1000000",
+            help="Comma separated user counts (default: 1000,10000,100000,1000000)"
+        )
+        parser.add_argument(
+            "--due",
+            type=int,
+            default=50,
+            help="Number of users due on every tick (default: 50)"
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Tick queries per size (default: 20)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="bulk_create batch size for synthetic users (default: 5000)"
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(",") if size.strip())
+        due = options["due"]
+        repeat = options["repeat"]
+        batch_size = options["batch_size"]
+
+        now = timezone.now()
+        with transaction.atomic():
+            book = Book.objects.create(title="Benchmark book", language="uk")
+            inspiration = DailyInspiration.objects.create(
+                book=book, date=local_date_at(now, TIMEZONE), original_text="Benchmark day",
+            )
+            created = 0
+            base_id = 10 ** 12
+
+            for size in sizes:
+                first_due = due if created == 0 else 0
+                self._create_users(
+                    book, now, base_id + created, size - created, first_due, batch_size
+                )
+                if created == 0:
+                    self._mark_sent(inspiration, now, due // 2)
+                created = max(created, size)
+
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    rows = len(list(_due_settings(now)))
+                    timings.append((time.perf_counter() - started) * 1000)
+
+                self.stdout.write(
+                    f"users={size:>9}  due={rows:>5}  "
+                    f"median={statistics.median(timings):8.2f} ms  "
+                    f"max={max(timings):8.2f} ms"
+                )
+
+            due_settings = list(_due_settings(now))
+            for name, plan in (("set-based", _plan_deliveries), ("per user", _plan_per_user)):
+                timings = []
+                for _ in range(repeat):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        recipients = plan(due_settings, now)
+                        timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f"plan {name:<10} due={len(due_settings):>5}  "
+                    f"recipients={sum(len(chunk) for chunk in recipients.values()):>5}  "
+                    f"queries={len(queries):>5}  median={statistics.median(timings):8.2f} ms"
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished, synthetic data rolled back"))
+
+    def _create_users(self, book, now, first_id, count, due, batch_size):
+        for offset in range(0, count, batch_size):
+            chunk = range(first_id + offset, first_id + min(offset + batch_size, count))
+            users = TelegramUser.objects.bulk_create(
+                [TelegramUser(telegram_id=telegram_id) for telegram_id in chunk]
+            )
+            settings_batch = []
+            for index, user in enumerate(users):
+                if offset + index < due:
+                    next_delivery_at = now - timedelta(minutes=random.randint(0, 4))
+                else:
+                    next_delivery_at = now + timedelta(minutes=random.randint(5, 24 * 60))
+                settings_batch.append(UserSettings(
+                    telegram_user=user,
+                    notification_time=dt_time(8, 0),
+                    timezone=TIMEZONE,
+                    selected_book=book,
+                    next_delivery_at=next_delivery_at,
+                ))
+            UserSettings.objects.bulk_create(settings_batch)
+
+    def _mark_sent(self, inspiration, now, count):
+        """Today's inspiration already delivered to `count` of the due users."""
+        due_users = [settings_obj.telegram_user_id for settings_obj in _due_settings(now)[:count]]
+        SentInspiration.objects.bulk_create([
+            SentInspiration(telegram_user_id=user_id, inspiration=inspiration, language="uk")
+            for user_id in due_users
+        ])
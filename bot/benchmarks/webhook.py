@@ -0,0 +1,99 @@
+"""
+Бенчмарк пропускної здатності webhook режиму (manage.py bench webhook).
+"""
+import asyncio
+import time
+
+from aiohttp import ClientSession, web
+from django.core.management.base import BaseCommand, CommandError
+
+from bot.fake_telegram import FakeTelegram, text_update
+
+SECRET = "bench-secret"
+PATH = "/telegram/webhook"
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the webhook server with synthetic /help updates against a local fake "
+        "Telegram API and report handled updates per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--updates",
+            type=int,
+            default=2000,
+            help="Updates per run (default: 2000)"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=str,
+            default="1,10,50",
+            help="Comma separated handler concurrency limits to compare (default: 1,10,50)"
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Distinct synthetic users sending updates (default: 100)"
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.02,
+            help="Fake Telegram API response latency in seconds (default: 0.02)"
+        )
+
+    def handle(self, *args, **options):
+        limits = [int(limit) for limit in options["concurrency"].split(",") if limit.strip()]
+        asyncio.run(self._run(limits, options["updates"], options["users"], options["latency"]))
+        self.stdout.write(self.style.SUCCESS("Benchmark finished"))
+
+    async def _run(self, limits: list, updates: int, users: int, latency: float):
+        from bot.bot import create_bot, dp, setup_bot
+        from bot.webhook import create_webhook_app
+
+        await setup_bot()
+        async with FakeTelegram(latency=latency) as telegram:
+            for limit in limits:
+                bot = create_bot(session=telegram.session())
+                app = create_webhook_app(bot, dp, path=PATH, secret_token=SECRET, concurrency=limit)
+                runner = web.AppRunner(app)
+                await runner.setup()
+                site = web.TCPSite(runner, "127.0.0.1", 0)
+                await site.start()
+                url = f"http://127.0.0.1:{runner.addresses[0][1]}{PATH}"
+                try:
+                    async with ClientSession() as client:
+                        telegram.calls.clear()
+                        elapsed = await self._drive(client, url, telegram, updates, users, limit)
+                finally:
+                    await runner.cleanup()
+
+                self.stdout.write(
+                    f"concurrency={limit:>4}  updates={updates:>6}  "
+                    f"elapsed={elapsed:7.2f} s  rate={updates / elapsed:9.1f} updates/s"
+                )
+
+    async def _drive(self, client, url, telegram, updates: int, users: int, limit: int) -> float:
+        # Як Telegram: не більше ніж max_connections одночасних запитів
+        connections = asyncio.Semaphore(min(limit * 2, 100))
+        headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+
+        async def post(index: int):
+            async with connections:
+                update = text_update(10 ** 9 + index % users, "/help")
+                async with client.post(url, json=update, headers=headers) as response:
+                    response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(index) for index in range(updates)))
+        deadline = time.monotonic() + 60
+        while len(telegram.sent_messages()) < updates:
+            if time.monotonic() > deadline:
+                raise CommandError(
+                    f"Only {len(telegram.sent_messages())} of {updates} updates were answered"
+                )
+            await asyncio.sleep(0.01)
+        return time.perf_counter() - started
@@ -1,17 +1,42 @@
+import asyncio
+from typing import Optional
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
 from django.conf import settings
 from bot.handlers import start_router, messages_router, settings_router
+from bot.middlewares import UserSettingsMiddleware
+from bot.templates import translations
 
-bot = Bot(
-    token=settings.TELEGRAM_BOT_TOKEN,
-    default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-)
-dp = Dispatcher()
+
+def create_bot(session: Optional[BaseSession] = None) -> Bot:
+    return Bot(
+        token=settings.TELEGRAM_BOT_TOKEN,
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+
+
+def create_storage() -> BaseStorage:
+    """FSM storage in Redis, shared by all bot processes and kept across restarts."""
+    return RedisStorage.from_url(
+        settings.BOT_FSM_REDIS_URL,
+        key_builder=DefaultKeyBuilder(prefix=settings.BOT_FSM_KEY_PREFIX, with_bot_id=True),
+        state_ttl=settings.BOT_FSM_STATE_TTL,
+        data_ttl=settings.BOT_FSM_STATE_TTL,
+    )
+
+
+bot = create_bot()
+dp = Dispatcher(storage=create_storage())
 
 
 async def setup_bot():
+    translations.warm()
+    dp.update.outer_middleware(UserSettingsMiddleware())
     dp.include_router(start_router)
     dp.include_router(settings_router)
     dp.include_router(messages_router)
@@ -22,6 +47,24 @@ async def start_bot():
     await dp.start_polling(bot)
 
 
+async def start_webhook(host: str, port: int):
+    """Serve updates over HTTP instead of long polling."""
+    from aiohttp import web
+    from bot.webhook import create_webhook_app
+    
+    await setup_bot()
+    app = create_webhook_app(bot, dp, webhook_url=settings.TELEGRAM_WEBHOOK_URL)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
 async def stop_bot():
     await bot.session.close()
+    await dp.storage.close()
 
@@ -0,0 +1,230 @@
+"""
+Rate-limited delivery of messages to Telegram.
+
+Token bucket lives in Redis, so all Celery workers share one global send rate.
+"""
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = "telegram:send:bucket"
+FLOOD_KEY = "telegram:send:flood_until"
+THROUGHPUT_KEY = "telegram:send:sent:{minute}"
+THROUGHPUT_TTL = 24 * 60 * 60
+CLAIM_KEY = "delivery:claim:{inspiration_id}:{telegram_id}:{language}"
+# Довше за всі повтори задачі: повторна задача бачить, кому вже надіслано
+CLAIM_TTL = 3 * 24 * 60 * 60
+
+# KEYS[1] - bucket hash, KEYS[2] - flood wait deadline (ms)
+# ARGV[1] - rate (tokens/sec), ARGV[2] - capacity
+# Повертає 0 якщо токен видано, інакше скільки мілісекунд чекати
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local flood_until = tonumber(redis.call('GET', KEYS[2]) or '0')
+if flood_until > now then
+    return flood_until - now
+end
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 60000)
+return wait
+"""
+
+
+def get_redis():
+    import redis.asyncio as aioredis
+    return aioredis.from_url(settings.REDIS_URL)
+
+
+def _minute_key(moment: datetime) -> str:
+    return THROUGHPUT_KEY.format(minute=moment.strftime("%Y%m%d%H%M"))
+
+
+class RedisTokenBucket:
+    """Global token bucket shared by all processes through Redis."""
+
+    def __init__(self, redis, rate: float, capacity: int):
+        self.redis = redis
+        self.rate = rate
+        self.capacity = capacity
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self):
+        while True:
+            wait_ms = int(
+                await self._script(keys=[BUCKET_KEY, FLOOD_KEY], args=[self.rate, self.capacity])
+            )
+            if wait_ms <= 0:
+                return
+            await asyncio.sleep(wait_ms / 1000)
+
+    async def pause(self, seconds: float):
+        """Stop all senders after Telegram flood wait (429)."""
+        deadline_ms = int((datetime.now(dt_timezone.utc).timestamp() + seconds) * 1000)
+        # Не скорочуємо вже встановлену паузу
+        current = await self.redis.get(FLOOD_KEY)
+        if current is None or int(current) < deadline_ms:
+            await self.redis.set(FLOOD_KEY, deadline_ms, px=int(seconds * 1000) + 1000)
+
+
+@dataclass
+class DeliveryStats:
+    sent: int = 0
+    failed: int = 0
+    blocked: list = field(default_factory=list)
+    # Чати, яким Telegram відмовив остаточно: повтор отримав би ту саму відмову
+    rejected: list = field(default_factory=list)
+    flood_waits: int = 0
+    retries: int = 0
+
+
+class DeliveryPipeline:
+    """Sends messages at the maximum allowed rate and retries transient errors."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        redis,
+        rate: Optional[float] = None,
+        capacity: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.bot = bot
+        self.redis = redis
+        self.limiter = RedisTokenBucket(
+            redis,
+            rate or settings.TELEGRAM_RATE_LIMIT,
+            capacity or settings.TELEGRAM_RATE_BURST,
+        )
+        self.max_retries = (
+            settings.TELEGRAM_SEND_MAX_RETRIES if max_retries is None else max_retries
+        )
+        self.stats = DeliveryStats()
+
+    async def send(self, chat_id: int, text: str) -> bool:
+        """
+        Send message honoring global rate limit.
+
+        Returns True when delivered. False means the message should be retried later,
+        unless the chat is unreachable (stats.blocked) or Telegram rejected the
+        message for good (stats.rejected).
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.limiter.acquire()
+                await self.bot.send_message(chat_id=chat_id, text=text)
+            except TelegramRetryAfter as e:
+                self.stats.flood_waits += 1
+                logger.warning("Flood wait %s sec while sending to %s", e.retry_after, chat_id)
+                await self.limiter.pause(e.retry_after)
+            except TelegramForbiddenError:
+                self.stats.blocked.append(chat_id)
+                return False
+            except TelegramBadRequest as e:
+                logger.error("Telegram rejected message to %s: %s", chat_id, e)
+                self.stats.rejected.append(chat_id)
+                return False
+            except (TelegramNetworkError, TelegramServerError) as e:
+                if attempt == self.max_retries:
+                    break
+                delay = min(30.0, 2 ** attempt) + random.uniform(0, 0.5)
+                logger.warning(
+                    "Transient error sending to %s (%s), retry in %.1f sec", chat_id, e, delay
+                )
+                await asyncio.sleep(delay)
+            except TelegramAPIError as e:
+                # Будь-яка інша відмова (чат не знайдено, токен тощо) не обриває всю пачку
+                logger.error("Telegram error sending to %s: %s: %s", chat_id, type(e).__name__, e)
+                self.stats.rejected.append(chat_id)
+                return False
+            except Exception:
+                # Помилка поза Telegram (Redis ліміту тощо): отримувача повторить задача
+                logger.exception("Unexpected error sending to %s", chat_id)
+                self.stats.failed += 1
+                return False
+            else:
+                self.stats.sent += 1
+                try:
+                    await self._count_sent()
+                except Exception as e:
+                    # Повідомлення вже доставлене: збій лічильника не має вести до повтору
+                    logger.warning("Could not count message sent to %s: %s", chat_id, e)
+                return True
+            if attempt < self.max_retries:
+                self.stats.retries += 1
+
+        self.stats.failed += 1
+        return False
+
+    async def _count_sent(self):
+        key = _minute_key(datetime.now(dt_timezone.utc))
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, THROUGHPUT_TTL)
+            await pipe.execute()
+
+
+def _claim_key(inspiration_id: int, telegram_id: int, language: str) -> str:
+    return CLAIM_KEY.format(
+        inspiration_id=inspiration_id, telegram_id=telegram_id, language=language
+    )
+
+
+async def claim_recipients(redis, inspiration_id: int, recipients: list) -> list:
+    """
+    Claim (telegram_id, language) recipients before sending; returns the claimed ones.
+
+    A recipient already claimed - sent, or being sent, by this or an earlier attempt
+    of the task - is left out, so a retried task never sends the message twice.
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        for telegram_id, language in recipients:
+            pipe.set(_claim_key(inspiration_id, telegram_id, language), 1, nx=True, ex=CLAIM_TTL)
+        claimed = await pipe.execute()
+    return [recipient for recipient, ok in zip(recipients, claimed) if ok]
+
+
+async def release_claims(redis, inspiration_id: int, recipients: list):
+    """Drop claims of recipients whose send failed, so a retry can send to them."""
+    if recipients:
+        await redis.delete(*(
+            _claim_key(inspiration_id, telegram_id, language)
+            for telegram_id, language in recipients
+        ))
+
+
+async def get_throughput(redis, minutes: int = 15) -> list:
+    """Get sent messages per minute for last `minutes` minutes (oldest first)."""
+    now = datetime.now(dt_timezone.utc).replace(second=0, microsecond=0)
+    moments = [now - timedelta(minutes=offset) for offset in range(minutes - 1, -1, -1)]
+    values = await redis.mget([_minute_key(moment) for moment in moments])
+    return [(moment, int(value or 0)) for moment, value in zip(moments, values)]
@@ -0,0 +1,414 @@
+"""
+Daily delivery plan kept in Redis.
+
+A plan covers one UTC day. build_plan() resolves every active user's slot in that
+day, the inspiration of the user's local date at that slot and the rendered message
+in every needed language, and stores users in per-minute buckets:
+
+- delivery:plan:{day}: plan metadata; its presence means the plan is ready
+- delivery:plan:{day}:minutes: sorted set of bucket minutes (UTC epoch seconds)
+- delivery:plan:{day}:minute:{epoch}: hash settings_id -> "telegram_id:language:inspiration_id"
+- delivery:plan:{day}:slots: hash settings_id -> bucket minute, to move a user who changes settings
+- delivery:plan:{day}:dispatched: set of settings ids already handed to send tasks
+- delivery:messages:{inspiration_id}: hash language -> rendered message
+
+The scheduler tick only pops due buckets (take_due()), so it does not touch the
+database while the plan is ready. next_delivery_at stays the source of truth for
+slots: it is advanced by a background task after dispatch, and a plan built during
+the day takes the pending slots from it.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from datetime import timezone as dt_timezone
+from typing import Iterable, NamedTuple, Optional
+
+from django.conf import settings
+
+from core.models import UserSettings
+from core.scheduling import local_date_at
+
+logger = logging.getLogger(__name__)
+
+PLAN_KEY = "delivery:plan:{day}"
+MINUTES_KEY = "delivery:plan:{day}:minutes"
+BUCKET_KEY = "delivery:plan:{day}:minute:"
+SLOTS_KEY = "delivery:plan:{day}:slots"
+DISPATCHED_KEY = "delivery:plan:{day}:dispatched"
+MESSAGES_KEY = "delivery:messages:{inspiration_id}"
+# План живе добу після свого дня: тік ще добирає запізнілі хвилини попереднього дня
+PLAN_TTL = 3 * 24 * 60 * 60
+BUILD_LOCK_KEY = "delivery:plan:{day}:building"
+BUILD_LOCK_TTL = 10 * 60
+SETTINGS_CHUNK = 5000
+PIPELINE_CHUNK = 5000
+
+# KEYS[1] - sorted set of minutes, KEYS[2] - dispatched set
+# ARGV[1] - now (epoch seconds), ARGV[2] - bucket key prefix
+# Забирає всі хвилини до ARGV[1] атомарно: два тіки не отримають той самий кошик,
+# а користувач, уже відданий на відправку (до перебудови плану), не повториться
+TAKE_DUE_SCRIPT = """
+local minutes = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local result = {}
+for _, minute in ipairs(minutes) do
+    local key = ARGV[2] .. minute
+    local entries = redis.call('HGETALL', key)
+    for i = 1, #entries, 2 do
+        if redis.call('SADD', KEYS[2], entries[i]) == 1 then
+            table.insert(result, entries[i])
+            table.insert(result, entries[i + 1])
+        end
+    end
+    redis.call('DEL', key)
+    redis.call('ZREM', KEYS[1], minute)
+end
+return result
+"""
+
+
+class DueDeliveries(NamedTuple):
+    recipients: dict  # inspiration_id -> [(telegram_id, language)]
+    settings_ids: list
+    plan_ready: bool  # False: today's plan is missing, due users are taken from the database
+
+
+_pool = None
+
+
+def get_redis():
+    """Client on the process-wide connection pool; close() returns its connection to the pool."""
+    global _pool
+    import redis
+    if _pool is None:
+        _pool = redis.ConnectionPool.from_url(settings.REDIS_URL, decode_responses=True)
+    return redis.Redis(connection_pool=_pool)
+
+
+def day_window(day: date) -> tuple:
+    start = datetime.combine(day, dt_time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _minute(moment: datetime) -> int:
+    return int(moment.timestamp()) // 60 * 60
+
+
+def _keys(day: date) -> dict:
+    day = day.isoformat()
+    return {
+        "plan": PLAN_KEY.format(day=day),
+        "minutes": MINUTES_KEY.format(day=day),
+        "bucket": BUCKET_KEY.format(day=day),
+        "slots": SLOTS_KEY.format(day=day),
+        "dispatched": DISPATCHED_KEY.format(day=day),
+    }
+
+
+def plan_slot(settings_obj: UserSettings, day: date) -> Optional[datetime]:
+    """
+    UTC moment of the user's delivery in `day`, or None when there is none.
+
+    A slot already pending in next_delivery_at is kept (also when it is overdue), so
+    users served earlier today by the database path are not planned again.
+    """
+    if settings_obj.next_delivery_at is None:
+        return None
+    start, end = day_window(day)
+    slot = settings_obj.next_delivery_at
+    if slot < start:
+        slot = settings_obj.compute_next_delivery_at(after=start - timedelta(microseconds=1))
+    return slot if slot is not None and slot < end else None
+
+
+def _encode(telegram_id: int, language: str, inspiration_id: int) -> str:
+    return f"{telegram_id}:{language}:{inspiration_id}"
+
+
+def _decode(entry: str) -> tuple:
+    telegram_id, language, inspiration_id = entry.split(":")
+    return int(telegram_id), language, int(inspiration_id)
+
+
+def _planned_settings():
+    return (
+        UserSettings.objects
+        .filter(is_active=True, telegram_user__is_active=True, selected_book__isnull=False)
+        .exclude(next_delivery_at=None)
+        .select_related("telegram_user")
+        .only(
+            "id", "telegram_user_id", "telegram_user__telegram_id", "notification_time", "timezone",
+            "language", "selected_book_id", "is_active", "next_delivery_at",
+        )
+        .order_by("id")
+    )
+
+
+def store_messages(redis, inspiration_languages: dict):
+    """Render and keep messages of {inspiration_id: languages} not stored yet."""
+    from bot.tasks import _render_inspiration_messages
+
+    for inspiration_id, languages in inspiration_languages.items():
+        key = MESSAGES_KEY.format(inspiration_id=inspiration_id)
+        stored = set(redis.hkeys(key))
+        missing = set(languages) - stored
+        if missing:
+            redis.hset(key, mapping=_render_inspiration_messages(inspiration_id, missing))
+        redis.expire(key, PLAN_TTL)
+
+
+def stored_messages(redis, inspiration_id: int, languages: Iterable[str]) -> Optional[dict]:
+    """Messages from the plan per language, or None if one of them is missing."""
+    languages = sorted(set(languages))
+    messages = redis.hmget(MESSAGES_KEY.format(inspiration_id=inspiration_id), languages)
+    if any(message is None for message in messages):
+        return None
+    return dict(zip(languages, messages))
+
+
+def forget_messages(*inspiration_ids: int, redis=None):
+    """Drop stored messages of edited inspirations."""
+    if inspiration_ids:
+        (redis or get_redis()).delete(*(
+            MESSAGES_KEY.format(inspiration_id=inspiration_id) for inspiration_id in inspiration_ids
+        ))
+
+
+def build_plan(day: date, redis=None) -> dict:
+    """
+    Build (or rebuild) the plan of UTC `day`; returns counters of the build.
+
+    Users already served - recorded in SentInspiration or dispatched by this plan
+    before a rebuild - are left out.
+    """
+    redis = redis or get_redis()
+    keys = _keys(day)
+    dispatched = {int(settings_id) for settings_id in redis.smembers(keys["dispatched"])}
+    buckets, slots, languages, counts = _plan_users(day, _planned_settings(), dispatched)
+
+    store_messages(redis, languages)
+    _replace_plan(redis, keys, buckets, slots)
+    stats = {
+        "day": day.isoformat(),
+        "built_at": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+        "users": len(slots),
+        "minutes": len(buckets),
+        "inspirations": len(languages),
+        "without_inspiration": counts["without_inspiration"],
+        "already_sent": counts["planned"] - len(slots) - counts["without_inspiration"],
+    }
+    # Метадані пишуться останніми: до цього тік вважає план неготовим
+    redis.hset(keys["plan"], mapping={key: str(value) for key, value in stats.items()})
+    redis.expire(keys["plan"], PLAN_TTL)
+    logger.info("Delivery plan %s: %s", day.isoformat(), stats)
+    return stats
+
+
+def _plan_users(day: date, settings_queryset, dispatched: set) -> tuple:
+    """
+    Plan entries of the users in `settings_queryset` for UTC `day`.
+
+    Returns (buckets {minute: {settings_id: entry}}, slots {settings_id: minute},
+    languages {inspiration_id: languages}, counts).
+    """
+    from bot.tasks import _already_sent, _todays_inspirations
+
+    planned = []  # (settings_id, user_id, telegram_id, language, book_id, local_date, slot)
+    for settings_obj in settings_queryset.iterator(chunk_size=SETTINGS_CHUNK):
+        if settings_obj.pk in dispatched:
+            continue
+        slot = plan_slot(settings_obj, day)
+        if slot is None:
+            continue
+        planned.append((
+            settings_obj.pk, settings_obj.telegram_user_id, settings_obj.telegram_user.telegram_id,
+            settings_obj.language, settings_obj.selected_book_id,
+            local_date_at(slot, settings_obj.timezone), slot,
+        ))
+
+    inspirations = _todays_inspirations({(entry[4], entry[5]) for entry in planned})
+    sent = set()
+    for offset in range(0, len(planned), SETTINGS_CHUNK):
+        chunk = planned[offset:offset + SETTINGS_CHUNK]
+        sent |= _already_sent([entry[1] for entry in chunk], set(inspirations.values()))
+
+    buckets = {}
+    slots = {}
+    languages = {}
+    without_inspiration = 0
+    for settings_id, user_id, telegram_id, language, book_id, local_date, slot in planned:
+        inspiration_id = inspirations.get((book_id, local_date))
+        if inspiration_id is None:
+            without_inspiration += 1
+            continue
+        if (user_id, inspiration_id, language) in sent:
+            continue
+        minute = _minute(slot)
+        buckets.setdefault(minute, {})[settings_id] = _encode(telegram_id, language, inspiration_id)
+        slots[settings_id] = minute
+        languages.setdefault(inspiration_id, set()).add(language)
+    stats = {"planned": len(planned), "without_inspiration": without_inspiration}
+    return buckets, slots, languages, stats
+
+
+def _replace_plan(redis, keys: dict, buckets: dict, slots: dict):
+    old_minutes = redis.zrange(keys["minutes"], 0, -1)
+    # Метадані лишаються: під час перебудови тік не переходить на БД
+    with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(
+            keys["minutes"], keys["slots"], *(keys["bucket"] + minute for minute in old_minutes)
+        )
+        pipe.execute()
+    _write_entries(redis, keys, buckets)
+
+
+def _write_entries(redis, keys: dict, buckets: dict):
+    items = [
+        (minute, settings_id, entry)
+        for minute, entries in buckets.items()
+        for settings_id, entry in entries.items()
+    ]
+    for offset in range(0, len(items), PIPELINE_CHUNK):
+        with redis.pipeline(transaction=False) as pipe:
+            for minute, settings_id, entry in items[offset:offset + PIPELINE_CHUNK]:
+                pipe.hset(keys["bucket"] + str(minute), settings_id, entry)
+                pipe.hset(keys["slots"], settings_id, minute)
+            pipe.execute()
+    with redis.pipeline(transaction=False) as pipe:
+        if buckets:
+            pipe.zadd(keys["minutes"], {str(minute): minute for minute in buckets})
+        for minute in buckets:
+            pipe.expire(keys["bucket"] + str(minute), PLAN_TTL)
+        for key in ("minutes", "slots", "dispatched"):
+            pipe.expire(keys[key], PLAN_TTL)
+        pipe.execute()
+
+
+def is_ready(redis, day: date) -> bool:
+    return bool(redis.exists(_keys(day)["plan"]))
+
+
+def take_due(now: datetime, redis=None) -> DueDeliveries:
+    """
+    Pop buckets due at `now` from the plans of yesterday and today.
+
+    Yesterday's late minutes are taken even when today's plan is not ready.
+    """
+    redis = redis or get_redis()
+    today = now.astimezone(dt_timezone.utc).date()
+    script = redis.register_script(TAKE_DUE_SCRIPT)
+    recipients = {}
+    settings_ids = []
+    for day in (today - timedelta(days=1), today):
+        keys = _keys(day)
+        entries = script(
+            keys=[keys["minutes"], keys["dispatched"]],
+            args=[int(now.timestamp()), keys["bucket"]],
+        )
+        for settings_id, entry in zip(entries[::2], entries[1::2]):
+            telegram_id, language, inspiration_id = _decode(entry)
+            recipients.setdefault(inspiration_id, []).append((telegram_id, language))
+            settings_ids.append(int(settings_id))
+    return DueDeliveries(recipients, settings_ids, is_ready(redis, today))
+
+
+def claim_build(redis, day: date) -> bool:
+    """True for the one caller that should (re)build the plan of `day` now."""
+    lock_key = BUILD_LOCK_KEY.format(day=day.isoformat())
+    return bool(redis.set(lock_key, "1", nx=True, ex=BUILD_LOCK_TTL))
+
+
+def replan(settings_obj: UserSettings, redis=None, now: Optional[datetime] = None):
+    """
+    Move a user whose settings changed inside the ready plans of today and tomorrow.
+
+    The user is dropped from the old minute and, if a slot is left in that day, added
+    to the new one with the inspiration and message of the new book and language.
+    """
+    from bot.tasks import _already_sent, _todays_inspirations
+
+    redis = redis or get_redis()
+    now = now or datetime.now(dt_timezone.utc)
+    today = now.date()
+    for day in (today, today + timedelta(days=1)):
+        if not is_ready(redis, day):
+            continue
+        keys = _keys(day)
+        settings_id = settings_obj.pk
+        if redis.sismember(keys["dispatched"], settings_id):
+            continue
+        old_minute = redis.hget(keys["slots"], settings_id)
+        if old_minute is not None:
+            redis.hdel(keys["bucket"] + old_minute, settings_id)
+            redis.hdel(keys["slots"], settings_id)
+
+        if not (
+            settings_obj.is_active and settings_obj.selected_book_id
+            and settings_obj.telegram_user.is_active
+        ):
+            continue
+        slot = plan_slot(settings_obj, day)
+        if slot is None:
+            continue
+        book_date = (settings_obj.selected_book_id, local_date_at(slot, settings_obj.timezone))
+        inspiration_id = _todays_inspirations({book_date}).get(book_date)
+        if inspiration_id is None:
+            continue
+        if _already_sent([settings_obj.telegram_user_id], {inspiration_id}):
+            continue
+        store_messages(redis, {inspiration_id: {settings_obj.language}})
+        minute = _minute(slot)
+        with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                keys["bucket"] + str(minute), settings_id,
+                _encode(
+                    settings_obj.telegram_user.telegram_id, settings_obj.language, inspiration_id
+                ),
+            )
+            pipe.expire(keys["bucket"] + str(minute), PLAN_TTL)
+            pipe.zadd(keys["minutes"], {str(minute): minute})
+            pipe.hset(keys["slots"], settings_id, minute)
+            pipe.execute()
+
+
+def replan_book(book_id: int, redis=None, now: Optional[datetime] = None) -> int:
+    """
+    Plan the users of a book into the ready plans of today and tomorrow.
+
+    Run after the book is parsed: users whose day had no inspiration when the plan
+    was built get it now. Returns the number of users planned.
+    """
+    redis = redis or get_redis()
+    now = now or datetime.now(dt_timezone.utc)
+    planned = 0
+    for day in (now.date(), now.date() + timedelta(days=1)):
+        if not is_ready(redis, day):
+            continue
+        keys = _keys(day)
+        dispatched = {int(settings_id) for settings_id in redis.smembers(keys["dispatched"])}
+        buckets, slots, languages, _ = _plan_users(
+            day, _planned_settings().filter(selected_book_id=book_id), dispatched
+        )
+        store_messages(redis, languages)
+        # Користувач, уже запланований в іншу хвилину, переноситься, а не дублюється
+        settings_ids = list(slots)
+        old_minutes = redis.hmget(keys["slots"], settings_ids) if settings_ids else []
+        with redis.pipeline(transaction=False) as pipe:
+            for settings_id, old_minute in zip(settings_ids, old_minutes):
+                if old_minute is not None and int(old_minute) != slots[settings_id]:
+                    pipe.hdel(keys["bucket"] + old_minute, settings_id)
+            pipe.execute()
+        _write_entries(redis, keys, buckets)
+        planned += len(slots)
+    return planned
+
+
+def unplan(settings_id: int, redis=None, now: Optional[datetime] = None):
+    """Drop a deleted user from the plans of today and tomorrow."""
+    redis = redis or get_redis()
+    today = (now or datetime.now(dt_timezone.utc)).date()
+    for day in (today, today + timedelta(days=1)):
+        keys = _keys(day)
+        old_minute = redis.hget(keys["slots"], settings_id)
+        if old_minute is not None:
+            redis.hdel(keys["bucket"] + old_minute, settings_id)
+            redis.hdel(keys["slots"], settings_id)
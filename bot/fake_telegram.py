@@ -0,0 +1,106 @@
+"""
+Local stand-in for Telegram Bot API used by benchmarks and tests.
+
+Answers API methods the bot calls and records them, and builds updates that can
+be posted to the webhook as if Telegram sent them.
+"""
+import asyncio
+import itertools
+import time
+from typing import Optional
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+
+class FakeTelegram:
+    """Bot API server on localhost that records every call."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.calls = []
+        self.errors = {}  # chat_id -> (error_code, description) на sendMessage
+        self._message_ids = itertools.count(1)
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def session(self) -> AiohttpSession:
+        """aiogram session pointed to this server."""
+        return AiohttpSession(api=TelegramAPIServer.from_base(self.base_url))
+
+    def sent_messages(self) -> list:
+        return [params for method, params in self.calls if method == "sendmessage"]
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        params = dict(await request.post())
+        self.calls.append((method, params))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        error = self.errors.get(int(params.get("chat_id", 0))) if method == "sendmessage" else None
+        if error is not None:
+            error_code, description = error
+            return web.json_response(
+                {"ok": False, "error_code": error_code, "description": description},
+                status=error_code,
+            )
+        return web.json_response({"ok": True, "result": self._result(method, params)})
+
+    def _result(self, method: str, params: dict):
+        if method == "getme":
+            return {"id": 1, "is_bot": True, "first_name": "Fake bot", "username": "fake_bot"}
+        if method in ("sendmessage", "editmessagetext"):
+            return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+                "text": params.get("text", ""),
+            }
+        return True
+
+
+_update_ids = itertools.count(1)
+
+
+def text_update(telegram_id: int, text: str, update_id: Optional[int] = None) -> dict:
+    """Update with private text message from user `telegram_id`."""
+    update_id = update_id or next(_update_ids)
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": telegram_id, "type": "private"},
+            "from": {
+                "id": telegram_id, "is_bot": False, "first_name": "User", "language_code": "uk",
+            },
+            "text": text,
+        },
+    }
@@ -5,6 +5,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from asgiref.sync import sync_to_async
 from datetime import time
+from typing import Optional
 from core.models import TelegramUser, UserSettings, Book
 from core.constants import LANGUAGE_CHOICES
 from bot.keyboards import (
@@ -15,7 +16,6 @@ from bot.keyboards import (
     get_book_languages_keyboard,
 )
 from bot.templates.translations import get_text, t
-from bot.utils import get_user_language
 
 
 router = Router()
@@ -28,8 +28,7 @@ class SettingsStates(StatesGroup):
 
 
 @router.message(F.text.in_(["❌ Скасувати", "❌ Отменить", "❌ Cancel"]))
-async def cancel_handler(message: Message, state: FSMContext):
-    language = await get_user_language(message.from_user.id)
+async def cancel_handler(message: Message, state: FSMContext, language: str):
     current_state = await state.get_state()
     if current_state:
         await state.clear()
@@ -45,15 +44,30 @@ async def cancel_handler(message: Message, state: FSMContext):
 
 
 @router.message(Command("settings"))
-async def cmd_settings(message: Message):
-    language = await get_user_language(message.from_user.id)
+async def cmd_settings(
+    message: Message,
+    language: str,
+    telegram_user: Optional[TelegramUser] = None,
+    user_settings: Optional[UserSettings] = None,
+):
     language_code = message.from_user.language_code
-    try:
-        def get_settings_data(tg_user, user_language_code):
-            from bot.utils import detect_timezone_from_language_code
-            
-            detected_tz = detect_timezone_from_language_code(user_language_code) if user_language_code else detect_timezone_from_language_code("uk")
-            
+    if telegram_user is None:
+        await message.answer(
+            get_text(language, "error_not_registered"),
+            reply_markup=get_main_keyboard(language)
+        )
+        return
+    
+    def get_settings_data(tg_user, settings, user_language_code):
+        from bot.utils import detect_timezone_from_language_code
+        
+        detected_tz = (
+            detect_timezone_from_language_code(user_language_code)
+            if user_language_code
+            else detect_timezone_from_language_code("uk")
+        )
+        
+        if settings is None:
             settings, created = UserSettings.objects.select_related('selected_book').get_or_create(
                 telegram_user=tg_user,
                 defaults={
@@ -62,58 +76,72 @@ async def cmd_settings(message: Message):
                     "language": language,
                 }
             )
-            
-            if not settings.timezone:
-                settings.timezone = detected_tz
-                settings.save()
-            
-            notification_time_str = settings.notification_time.strftime('%H:%M')
-            if settings.timezone:
-                if hasattr(settings.timezone, 'zone'):
-                    timezone_str = settings.timezone.zone
-                else:
-                    timezone_str = str(settings.timezone)
-            else:
-                timezone_str = "Europe/Kyiv"
-            book_title = settings.selected_book.title if settings.selected_book else t(language, "not_specified")
-            language_display = dict(LANGUAGE_CHOICES)[settings.language]
-            status = t(language, "active") if settings.is_active else t(language, "inactive")
-            
-            return notification_time_str, timezone_str, book_title, language_display, status
         
-        telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=message.from_user.id)
-        notification_time_str, timezone_str, book_title, language_display, status = await sync_to_async(get_settings_data)(telegram_user, language_code)
+        if not settings.timezone:
+            settings.timezone = detected_tz
+            settings.save()
         
-        settings_text = get_text(
-            language,
-            "settings",
-            notification_time=notification_time_str,
-            timezone=timezone_str,
-            book_title=book_title,
-            language_name=language_display,
-            status=status
-        )
-        await message.answer(
-            settings_text.strip(),
-            reply_markup=get_main_keyboard(language)
-        )
-    except TelegramUser.DoesNotExist:
-        await message.answer(
-            get_text(language, "error_not_registered"),
-            reply_markup=get_main_keyboard(language)
+        notification_time_str = settings.notification_time.strftime('%H:%M')
+        if settings.timezone:
+            if hasattr(settings.timezone, 'zone'):
+                timezone_str = settings.timezone.zone
+            else:
+                timezone_str = str(settings.timezone)
+        else:
+            timezone_str = "Europe/Kyiv"
+        book_title = (
+            settings.selected_book.title if settings.selected_book else t(language, "not_specified")
         )
+        language_display = dict(LANGUAGE_CHOICES)[settings.language]
+        status = t(language, "active") if settings.is_active else t(language, "inactive")
+        
+        return notification_time_str, timezone_str, book_title, language_display, status
+    
+    settings_data = await sync_to_async(get_settings_data)(
+        telegram_user, user_settings, language_code
+    )
+    notification_time_str, timezone_str, book_title, language_display, status = settings_data
+    
+    settings_text = get_text(
+        language,
+        "settings",
+        notification_time=notification_time_str,
+        timezone=timezone_str,
+        book_title=book_title,
+        language_name=language_display,
+        status=status
+    )
+    await message.answer(
+        settings_text.strip(),
+        reply_markup=get_main_keyboard(language)
+    )
 
 
 @router.message(F.text.in_(["📋 Мої налаштування", "📋 Мои настройки", "📋 My Settings"]))
-async def cmd_settings_button(message: Message):
-    language = await get_user_language(message.from_user.id)
+async def cmd_settings_button(
+    message: Message,
+    language: str,
+    telegram_user: Optional[TelegramUser] = None,
+    user_settings: Optional[UserSettings] = None,
+):
     language_code = message.from_user.language_code
-    try:
-        def get_settings_data(tg_user, user_language_code):
-            from bot.utils import detect_timezone_from_language_code
-            
-            detected_tz = detect_timezone_from_language_code(user_language_code) if user_language_code else detect_timezone_from_language_code("uk")
-            
+    if telegram_user is None:
+        await message.answer(
+            get_text(language, "error_not_registered"),
+            reply_markup=get_main_keyboard(language)
+        )
+        return
+    
+    def get_settings_data(tg_user, settings, user_language_code):
+        from bot.utils import detect_timezone_from_language_code
+        
+        detected_tz = (
+            detect_timezone_from_language_code(user_language_code)
+            if user_language_code
+            else detect_timezone_from_language_code("uk")
+        )
+        
+        if settings is None:
             settings, created = UserSettings.objects.select_related('selected_book').get_or_create(
                 telegram_user=tg_user,
                 defaults={
@@ -122,51 +150,49 @@ async def cmd_settings_button(message: Message):
                     "language": language,
                 }
             )
-            
-            if not settings.timezone:
-                settings.timezone = detected_tz
-                settings.save()
-            
-            notification_time_str = settings.notification_time.strftime('%H:%M')
-            if settings.timezone:
-                if hasattr(settings.timezone, 'zone'):
-                    timezone_str = settings.timezone.zone
-                else:
-                    timezone_str = str(settings.timezone)
-            else:
-                timezone_str = "Europe/Kyiv"
-            book_title = settings.selected_book.title if settings.selected_book else t(language, "not_specified")
-            language_display = dict(LANGUAGE_CHOICES)[settings.language]
-            status = t(language, "active") if settings.is_active else t(language, "inactive")
-            
-            return notification_time_str, timezone_str, book_title, language_display, status
         
-        telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=message.from_user.id)
-        notification_time_str, timezone_str, book_title, language_display, status = await sync_to_async(get_settings_data)(telegram_user, language_code)
+        if not settings.timezone:
+            settings.timezone = detected_tz
+            settings.save()
         
-        settings_text = get_text(
-            language,
-            "settings",
-            notification_time=notification_time_str,
-            timezone=timezone_str,
-            book_title=book_title,
-            language_name=language_display,
-            status=status
-        )
-        await message.answer(
-            settings_text.strip(),
-            reply_markup=get_main_keyboard(language)
-        )
-    except TelegramUser.DoesNotExist:
-        await message.answer(
-            get_text(language, "error_not_registered"),
-            reply_markup=get_main_keyboard(language)
+        notification_time_str = settings.notification_time.strftime('%H:%M')
+        if settings.timezone:
+            if hasattr(settings.timezone, 'zone'):
+                timezone_str = settings.timezone.zone
+            else:
+                timezone_str = str(settings.timezone)
+        else:
+            timezone_str = "Europe/Kyiv"
+        book_title = (
+            settings.selected_book.title if settings.selected_book else t(language, "not_specified")
         )
+        language_display = dict(LANGUAGE_CHOICES)[settings.language]
+        status = t(language, "active") if settings.is_active else t(language, "inactive")
+        
+        return notification_time_str, timezone_str, book_title, language_display, status
+    
+    settings_data = await sync_to_async(get_settings_data)(
+        telegram_user, user_settings, language_code
+    )
+    notification_time_str, timezone_str, book_title, language_display, status = settings_data
+    
+    settings_text = get_text(
+        language,
+        "settings",
+        notification_time=notification_time_str,
+        timezone=timezone_str,
+        book_title=book_title,
+        language_name=language_display,
+        status=status
+    )
+    await message.answer(
+        settings_text.strip(),
+        reply_markup=get_main_keyboard(language)
+    )
 
 
 @router.message(Command("set_time"))
-async def cmd_set_time(message: Message, state: FSMContext):
-    language = await get_user_language(message.from_user.id)
+async def cmd_set_time(message: Message, state: FSMContext, language: str):
     await message.answer(
         get_text(language, "set_time"),
         reply_markup=get_cancel_keyboard(language)
@@ -175,8 +201,7 @@ async def cmd_set_time(message: Message, state: FSMContext):
 
 
 @router.message(F.text.in_(["⏰ Налаштувати час", "⏰ Настроить время", "⏰ Set Time"]))
-async def cmd_set_time_button(message: Message, state: FSMContext):
-    language = await get_user_language(message.from_user.id)
+async def cmd_set_time_button(message: Message, state: FSMContext, language: str):
     await message.answer(
         get_text(language, "set_time"),
         reply_markup=get_cancel_keyboard(language)
@@ -185,8 +210,8 @@ async def cmd_set_time_button(message: Message, state: FSMContext):
 
 
 @router.message(SettingsStates.waiting_for_time)
-async def process_time(message: Message, state: FSMContext):
-    language = await get_user_language(message.from_user.id)
+async def process_time(message: Message, state: FSMContext, language: str,
+                       telegram_user: Optional[TelegramUser] = None):
     cancel_text = t(language, "cancel")
     
     if message.text == cancel_text:
@@ -206,7 +231,14 @@ async def process_time(message: Message, state: FSMContext):
         
         notification_time = time(hour, minute)
         
-        telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=message.from_user.id)
+        if telegram_user is None:
+            await state.clear()
+            await message.answer(
+                get_text(language, "error_not_registered"),
+                reply_markup=get_main_keyboard(language)
+            )
+            return
+        
         from bot.utils import detect_timezone_from_language_code
         
         language_code = message.from_user.language_code
@@ -240,8 +272,7 @@ async def process_time(message: Message, state: FSMContext):
 
 
 @router.message(Command("set_book"))
-async def cmd_set_book(message: Message, state: FSMContext):
-    language = await get_user_language(message.from_user.id)
+async def cmd_set_book(message: Message, state: FSMContext, language: str):
     await message.answer(
         get_text(language, "select_book_language"),
         reply_markup=get_book_languages_keyboard(language)
@@ -250,8 +281,7 @@ async def cmd_set_book(message: Message, state: FSMContext):
 
 
 @router.message(F.text.in_(["📚 Обрати книгу", "📚 Выбрать книгу", "📚 Select Book"]))
-async def cmd_set_book_button(message: Message, state: FSMContext):
-    language = await get_user_language(message.from_user.id)
+async def cmd_set_book_button(message: Message, state: FSMContext, language: str):
     await message.answer(
         get_text(language, "select_book_language"),
         reply_markup=get_book_languages_keyboard(language)
@@ -260,9 +290,8 @@ async def cmd_set_book_button(message: Message, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("book_lang_"))
-async def process_book_language(callback: CallbackQuery, state: FSMContext):
+async def process_book_language(callback: CallbackQuery, state: FSMContext, language: str):
     book_lang_code = callback.data.split("_")[2]
-    language = await get_user_language(callback.from_user.id)
     
     try:
         books_count = await sync_to_async(Book.objects.filter(is_active=True, language=book_lang_code).count)()
@@ -294,47 +323,46 @@ async def process_book_language(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("book_"))
-async def process_book(callback: CallbackQuery, state: FSMContext):
+async def process_book(callback: CallbackQuery, state: FSMContext, language: str,
+                       telegram_user: Optional[TelegramUser] = None):
     book_id = int(callback.data.split("_")[1])
-    language = await get_user_language(callback.from_user.id)
-    book = await sync_to_async(Book.objects.get)(id=book_id)
     
-    try:
-        telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=callback.from_user.id)
-        from bot.utils import detect_timezone_from_language_code
-        
-        language_code = callback.from_user.language_code
-        detected_timezone = detect_timezone_from_language_code(language_code)
-        
-        settings, created = await sync_to_async(UserSettings.objects.get_or_create)(
-            telegram_user=telegram_user,
-            defaults={
-                "notification_time": time(8, 0),
-                "timezone": detected_timezone,
-                "language": language,
-            }
-        )
-        
-        settings.selected_book = book
-        if not settings.timezone:
-            settings.timezone = detected_timezone
-        await sync_to_async(settings.save)()
-        
-        await callback.message.edit_text(
-            get_text(language, "book_selected", book_title=book.title)
-        )
-        await callback.answer()
-        await state.clear()
-    except TelegramUser.DoesNotExist:
+    if telegram_user is None:
         await callback.answer(
             get_text(language, "error_not_registered"),
             show_alert=True
         )
+        return
+    
+    book = await sync_to_async(Book.objects.get)(id=book_id)
+    from bot.utils import detect_timezone_from_language_code
+    
+    language_code = callback.from_user.language_code
+    detected_timezone = detect_timezone_from_language_code(language_code)
+    
+    settings, created = await sync_to_async(UserSettings.objects.get_or_create)(
+        telegram_user=telegram_user,
+        defaults={
+            "notification_time": time(8, 0),
+            "timezone": detected_timezone,
+            "language": language,
+        }
+    )
+    
+    settings.selected_book = book
+    if not settings.timezone:
+        settings.timezone = detected_timezone
+    await sync_to_async(settings.save)()
+    
+    await callback.message.edit_text(
+        get_text(language, "book_selected", book_title=book.title)
+    )
+    await callback.answer()
+    await state.clear()
 
 
 @router.message(Command("set_language"))
-async def cmd_set_language(message: Message):
-    language = await get_user_language(message.from_user.id)
+async def cmd_set_language(message: Message, language: str):
     keyboard = get_languages_keyboard(language)
     await message.answer(
         get_text(language, "select_language"),
@@ -343,8 +371,7 @@ async def cmd_set_language(message: Message):
 
 
 @router.message(F.text.in_(["🌐 Обрати мову", "🌐 Выбрать язык", "🌐 Select Language"]))
-async def cmd_set_language_button(message: Message):
-    language = await get_user_language(message.from_user.id)
+async def cmd_set_language_button(message: Message, language: str):
     keyboard = get_languages_keyboard(language)
     await message.answer(
         get_text(language, "select_language"),
@@ -353,8 +380,7 @@ async def cmd_set_language_button(message: Message):
 
 
 @router.callback_query(F.data == "back_to_main")
-async def back_to_main(callback: CallbackQuery, state: FSMContext):
-    language = await get_user_language(callback.from_user.id)
+async def back_to_main(callback: CallbackQuery, state: FSMContext, language: str):
     await state.clear()
     await callback.message.delete()
     await callback.message.answer(
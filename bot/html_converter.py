@@ -0,0 +1,660 @@
+"""
+Single-pass conversion of stored book pages into Telegram HTML.
+
+The converter listens to html.parser events once and produces the same bytes as
+the previous BeautifulSoup pipeline (soup -> span_soup -> final_soup ->
+final_cleanup). Content of `span.egw_content` is streamed straight into the
+output; a small element tree is kept only for pages without content spans,
+where block structure has to be flattened.
+"""
+import re
+from html.parser import HTMLParser
+
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+
+FORMAT_TAGS = frozenset({"b", "i", "u", "s", "code", "pre"})
+RENAMED_TAGS = {"strong": "b", "em": "i"}
+ALLOWED_TAGS = FORMAT_TAGS | {"a"}
+BLOCK_TAGS = frozenset({"p", "div", "h1", "h2", "h3", "h4", "h5", "h6"})
+HEADER_TAGS = frozenset({"h1", "h3"})
+DROPPED_TAGS = frozenset({"script", "style", "noscript"})
+DROP_CANDIDATES = DROPPED_TAGS | {"span", "div"}
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr",
+    "basefont", "bgsound", "command", "frame", "image", "isindex", "nextid", "spacer",
+})
+PRESERVE_WHITESPACE_TAGS = frozenset({"pre", "textarea"})
+# Текст усередині цих тегів BeautifulSoup не віддає в get_text()
+HIDDEN_TEXT_TAGS = frozenset({"template", "rt", "rp"})
+# Атрибути, які html.parser-білдер BeautifulSoup розбиває на список токенів
+MULTI_VALUED_ATTRS = {
+    "class": None, "accesskey": None, "dropzone": None,
+    "rel": "a", "rev": "a",
+}
+HTML_SPACES = " \n\t\x0c\r"
+TEXT, MARKUP, DOCTYPE = range(3)
+
+_RE_SPACES = re.compile(r"[ \t]+")
+_RE_NEWLINES = re.compile(r"\n{3,}")
+_RE_EMPTY_PAIR = re.compile(r"<([^>]+)></\1>")
+_RE_FOREIGN_TAG = re.compile(r"<(?!/?(?:b|i|u|s|code|pre|a\b))[^>]+>")
+_RE_FOREIGN_CLOSE = re.compile(r"</(?!(?:b|i|u|s|code|pre|a\b))[^>]+>")
+# Теги прибираються по черзі: видалення одного може склеїти розмітку для наступного
+_RE_UNWANTED = [
+    re.compile(pattern.format(name=name), re.IGNORECASE)
+    for name in (
+        "span", "div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "br", "hr",
+    )
+    for pattern in (r"<{name}[^>]*>", r"</{name}>")
+]
+_RE_FORMAT_ATTRS = re.compile(r"<(b|i|u|s|code|pre)(\s[^>]*)?>")
+_RE_LINK_HREF = re.compile(r'<a\s+([^>]*href=["\']([^"\']+)["\'][^>]*)>')
+_RE_LINK_OPEN = re.compile(r"<a\s+[^>]*>", re.IGNORECASE)
+_RE_LINK_CLOSE = re.compile(r"</a>", re.IGNORECASE)
+_RE_DEC_REF = re.compile(r"^([0-9]+)(.*)")
+_RE_HEX_REF = re.compile(r"^([0-9a-f]+)(.*)")
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _collapse(data: str) -> str:
+    """As BeautifulSoup.endData: a whitespace-only (or empty) string becomes one character."""
+    if data.strip(HTML_SPACES):
+        return data
+    return "\n" if "\n" in data else " "
+
+
+def _is_http(href: str) -> bool:
+    return href.startswith("http://") or href.startswith("https://")
+
+
+def _format_attrs(tag: str, attrs: dict) -> str:
+    parts = []
+    # Форматер BeautifulSoup виводить атрибути за абеткою
+    for key, value in sorted(attrs.items()) if len(attrs) > 1 else attrs.items():
+        owner = MULTI_VALUED_ATTRS.get(key, False)
+        if owner is None or owner == tag:
+            value = " ".join(value.split())
+        value = _escape(value)
+        if '"' in value:
+            if "'" in value:
+                value = '"' + value.replace('"', "&quot;") + '"'
+            else:
+                value = "'" + value + "'"
+        else:
+            value = '"' + value + '"'
+        parts.append(f" {key}={value}")
+    return "".join(parts)
+
+
+class _Markup(str):
+    """Comment, doctype or other declaration kept verbatim in the output."""
+
+
+class _Doctype(_Markup):
+    """BeautifulSoup serializes doctype with a trailing newline."""
+
+
+class _Element:
+    __slots__ = (
+        "name", "attrs", "children", "parent", "dropped", "close", "header", "header_spans",
+        "entry",
+    )
+
+    def __init__(self, name, attrs, parent):
+        self.name = name
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+        self.dropped = False
+        self.close = None
+        self.header = None
+        self.header_spans = None
+        self.entry = None
+
+    def same_as(self, other) -> bool:
+        """Structural equality, as bs4.Tag.__eq__ compares paragraphs."""
+        if self is other:
+            return True
+        if other is None or self.name != other.name or self.attrs != other.attrs:
+            return False
+        if len(self.children) != len(other.children):
+            return False
+        for mine, theirs in zip(self.children, other.children):
+            if isinstance(mine, _Element):
+                if not isinstance(theirs, _Element) or not mine.same_as(theirs):
+                    return False
+            elif isinstance(theirs, _Element) or mine != theirs or type(mine) is not type(theirs):
+                return False
+        return True
+
+
+class _Header:
+    __slots__ = ("text", "span_text", "span_state")
+
+    def __init__(self):
+        self.text = []
+        self.span_text = []
+        # 0 - span.egw_content ще не було, 1 - всередині першого, 2 - перший закрито
+        self.span_state = 0
+
+
+class _Entry:
+    __slots__ = ("paragraph", "content")
+
+    def __init__(self, paragraph, content=""):
+        self.paragraph = paragraph
+        self.content = content
+
+
+class _Converter(HTMLParser):
+    """Collects headers and content spans of one page in a single parser pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.root = _Element("[document]", {}, None)
+        self.stack = [self.root]
+        self.open_counts = {}
+        self.closed_void = []
+        self.pending = []
+        self.dropped = 0
+        self.preserve = 0
+        self.hidden_text = 0
+        self.headers = []
+        self.open_headers = []
+        self.entries = []
+        # Активний span.egw_content: вихідні шматки та поточний текстовий відрізок
+        self.entry = None
+        self.out = []
+        self.run = []
+        self.out_preserve = 0
+
+    def updatepos(self, i, j):
+        # Номери рядків не потрібні, а їх підрахунок - помітна частка часу розбору
+        return j
+
+    # --- події html.parser ---
+
+    def handle_starttag(self, tag, attrs, void=True):
+        if self.pending:
+            self._flush_text()
+        attr_dict = {}
+        for key, value in attrs:
+            attr_dict[key] = "" if value is None else value
+
+        parent = self.stack[-1]
+        element = _Element(tag, attr_dict, parent)
+        tokens = attr_dict["class"].split() if attr_dict.get("class") else ()
+
+        if self.dropped or (tag in DROP_CANDIDATES and self._is_dropped(tag, tokens)):
+            element.dropped = not self.dropped
+            if element.dropped:
+                self.dropped += 1
+        else:
+            parent.children.append(element)
+            self._open_element(element, tag, tokens)
+
+        self.stack.append(element)
+        self.open_counts[tag] = self.open_counts.get(tag, 0) + 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self.preserve += 1
+        elif tag in HIDDEN_TEXT_TAGS:
+            self.hidden_text += 1
+
+        if void and tag in VOID_TAGS:
+            self._pop_to(tag)
+            self.closed_void.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, void=False)
+        self.handle_endtag(tag, check_closed=False)
+
+    def handle_endtag(self, tag, check_closed=True):
+        if check_closed and tag in self.closed_void:
+            self.closed_void.remove(tag)
+            return
+        if self.pending:
+            self._flush_text()
+        self._pop_to(tag)
+
+    def handle_data(self, data):
+        self.pending.append(data)
+
+    def handle_charref(self, name):
+        base, digits = (16, name[1:]) if name[:1] in ("x", "X") else (10, name)
+        try:
+            code, extra = int(digits, base), ""
+        except ValueError:
+            # Як у BeautifulSoup: числовий префікс - символ, решта - звичайний текст
+            match = (_RE_HEX_REF if base == 16 else _RE_DEC_REF).search(digits)
+            code, extra = (int(match.group(1), base), match.group(2)) if match else (None, digits)
+        if code is not None:
+            self.pending.append(UnicodeDammit.numeric_character_reference(code)[0])
+        if extra:
+            self.pending.append(extra)
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.pending.append(character if character is not None else "&" + name)
+
+    def handle_comment(self, data):
+        self._wrapped_markup("<!--", data, "-->")
+
+    def handle_decl(self, decl):
+        decl = decl[len("DOCTYPE "):]
+        self._markup(_Doctype("<!DOCTYPE " + decl + ">\n"))
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            data = data[len("CDATA["):]
+            self._wrapped_markup("<![CDATA[", data, "]]>")
+            if self.open_headers and not self.dropped:
+                self._header_text(data)
+        else:
+            self._wrapped_markup("<?", data, "?>")
+
+    def handle_pi(self, data):
+        self._wrapped_markup("<?", data, ">")
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        while len(self.stack) > 1:
+            self._pop()
+
+    # --- дерево та потік ---
+
+    @staticmethod
+    def _is_dropped(tag, tokens) -> bool:
+        if tag in DROPPED_TAGS:
+            return True
+        if tag == "span" and any("page-break" in token.lower() for token in tokens):
+            return True
+        if tag in ("span", "div"):
+            for token in tokens:
+                token = token.lower()
+                if "refcode" in token or "pager" in token or "breadcrumb" in token:
+                    return True
+        return False
+
+    def _open_element(self, element, tag, tokens):
+        if tag in HEADER_TAGS and any("egw_content" in token for token in tokens):
+            element.header = _Header()
+            self.headers.append(element.header)
+            self.open_headers.append(element.header)
+
+        if tag == "span" and "egw_content" in tokens:
+            if self.open_headers:
+                for header in self.open_headers:
+                    if header.span_state == 0:
+                        header.span_state = 1
+                        if element.header_spans is None:
+                            element.header_spans = []
+                        element.header_spans.append(header)
+                return
+            if self.entry is None:
+                paragraph = None
+                for ancestor in reversed(self.stack):
+                    if ancestor.name == "p":
+                        paragraph = ancestor
+                        break
+                element.entry = self.entry = _Entry(paragraph)
+                self.entries.append(self.entry)
+                self.out = []
+                self.run = []
+                return
+            # Вкладений span розгортається в зовнішній, сам по собі тексту не дає
+            self.entries.append(_Entry(None))
+
+        if self.entry is None:
+            return
+        name = RENAMED_TAGS.get(tag, tag)
+        if name in FORMAT_TAGS:
+            self._emit("<" + name + ">")
+            element.close = name
+            if name == "pre":
+                self.out_preserve += 1
+        elif tag == "a":
+            if "href" not in element.attrs:
+                self._emit("<a" + _format_attrs("a", element.attrs) + ">")
+                element.close = "a"
+            elif _is_http(element.attrs["href"]):
+                self._emit("<a" + _format_attrs("a", {"href": element.attrs["href"]}) + ">")
+                element.close = "a"
+
+    def _pop_to(self, tag):
+        if not self.open_counts.get(tag):
+            return
+        while self._pop().name != tag:
+            pass
+
+    def _pop(self):
+        element = self.stack.pop()
+        self.open_counts[element.name] -= 1
+        if element.name in PRESERVE_WHITESPACE_TAGS:
+            self.preserve -= 1
+        elif element.name in HIDDEN_TEXT_TAGS:
+            self.hidden_text -= 1
+        if element.dropped:
+            self.dropped -= 1
+        if element.close is not None:
+            self._emit("</" + element.close + ">")
+            if element.close == "pre":
+                self.out_preserve -= 1
+        if element.header is not None:
+            self.open_headers.remove(element.header)
+        if element.header_spans is not None:
+            for header in element.header_spans:
+                header.span_state = 2
+        if element.entry is not None:
+            self._flush_run()
+            element.entry.content = "".join(self.out)
+            self.entry = None
+        return element
+
+    def _flush_text(self):
+        if not self.pending:
+            return
+        data = "".join(self.pending)
+        self.pending = []
+        if not self.preserve and not data.strip(HTML_SPACES):
+            data = _collapse(data)
+        if self.dropped:
+            return
+        self.stack[-1].children.append(data)
+        if self.open_headers and not self.hidden_text:
+            self._header_text(data)
+        if self.entry is not None:
+            self.run.append(data)
+
+    def _header_text(self, data):
+        stripped = data.strip()
+        if stripped:
+            for header in self.open_headers:
+                header.text.append(stripped)
+                if header.span_state == 1:
+                    header.span_text.append(stripped)
+
+    def _markup(self, markup, emitted=None):
+        self._flush_text()
+        if self.dropped:
+            return
+        self.stack[-1].children.append(markup)
+        if self.entry is not None:
+            self._emit(str(markup) if emitted is None else emitted)
+            if isinstance(markup, _Doctype):
+                # Після повторного розбору цей перенос рядка стає початком наступного тексту
+                self.run.append("\n")
+
+    def _wrapped_markup(self, prefix, data, suffix):
+        # Вміст коментаря теж проходить через endData. span.egw_content розбирається
+        # вдруге вже без зовнішнього <pre>, тож у виводі діє лише <pre> усередині span
+        markup = _Markup(prefix + (data if self.preserve else _collapse(data)) + suffix)
+        self._markup(markup, prefix + (data if self.out_preserve else _collapse(data)) + suffix)
+
+    def _emit(self, markup):
+        self._flush_run()
+        self.out.append(markup)
+
+    def _flush_run(self):
+        if not self.run:
+            return
+        self.out.append(_escape(_collapse_run("".join(self.run), self.out_preserve)))
+        self.run = []
+
+    # --- результат ---
+
+    def render(self) -> str:
+        if self.headers or self.entries:
+            return _normalize(self._render_spans(), strip_tags=False)
+        return _normalize(self._render_fallback(), strip_tags=True)
+
+    def _render_spans(self) -> str:
+        tokens = []
+        for header in self.headers:
+            text = "".join(header.span_text if header.span_state else header.text)
+            if text:
+                tokens.append((MARKUP, "<b>"))
+                tokens.append((TEXT, text))
+                tokens.append((MARKUP, "</b>"))
+                tokens.append((TEXT, "\n\n"))
+
+        last = len(self.entries) - 1
+        for index, entry in enumerate(self.entries):
+            if not entry.content.strip():
+                continue
+            tokens.append((TEXT, entry.content))
+            if index < last:
+                following = self.entries[index + 1].paragraph
+                if entry.paragraph is None:
+                    same = following is None
+                else:
+                    same = entry.paragraph.same_as(following)
+                tokens.append((TEXT, " " if same else "\n\n"))
+            else:
+                tokens.append((TEXT, "\n\n"))
+        return _join_tokens(tokens, reparses=2)
+
+    def _render_fallback(self) -> str:
+        elements = _iter_elements(self.root)
+        root = (
+            _find_div(elements, "book-content")
+            or _find_div(elements, "egw_content_container")
+            or _find_tag(elements, "body")
+            or self.root
+        )
+        _flatten(root)
+        tokens = []
+        if root.name == "body":
+            tokens.append((MARKUP, ""))
+            _serialize(root.children, tokens)
+            tokens.append((MARKUP, ""))
+        else:
+            _serialize(root.children, tokens)
+        return _join_tokens(tokens, reparses=2)
+
+
+def _collapse_run(text: str, preserve: int) -> str:
+    if not preserve and not text.strip(HTML_SPACES):
+        return "\n" if "\n" in text else " "
+    return text
+
+
+def _join_tokens(tokens, reparses: int) -> str:
+    """
+    Glue (kind, value) tokens, collapsing whitespace-only text runs between
+    markup the way `reparses` rounds of parsing the serialized HTML did.
+    """
+    result = []
+    run = []
+    preserve = 0
+    after_doctype = False
+    for kind, value in tokens:
+        if kind == TEXT:
+            run.append(value)
+            continue
+        if run or after_doctype:
+            result.append(_escape(_collapse_after(run, preserve, reparses if after_doctype else 0)))
+            run = []
+        result.append(value)
+        after_doctype = kind == DOCTYPE
+        if value == "<pre>":
+            preserve += 1
+        elif value == "</pre>":
+            preserve -= 1
+    if run or after_doctype:
+        result.append(_escape(_collapse_after(run, preserve, reparses if after_doctype else 0)))
+    return "".join(result)
+
+
+def _collapse_after(run, preserve: int, newlines: int) -> str:
+    text = _collapse_run("".join(run), preserve)
+    # Кожен розбір додає перенос рядка, який серіалізатор дописав після doctype
+    for _ in range(newlines):
+        text = _collapse_run("\n" + text, preserve)
+    return text
+
+
+def _class_tokens(element) -> list:
+    value = element.attrs.get("class")
+    return value.split() if value else []
+
+
+def _iter_elements(element) -> list:
+    """Descendant elements in document order (snapshot, safe to mutate the tree)."""
+    found = []
+    # Без рекурсії: незакриті теги зіпсованої сторінки дають як завгодно глибоке дерево
+    pending = [iter(element.children)]
+    while pending:
+        for child in pending[-1]:
+            if isinstance(child, _Element):
+                found.append(child)
+                pending.append(iter(child.children))
+                break
+        else:
+            pending.pop()
+    return found
+
+
+def _find_div(elements, class_name):
+    for element in elements:
+        if element.name == "div" and class_name in _class_tokens(element):
+            return element
+    return None
+
+
+def _find_tag(elements, name):
+    for element in elements:
+        if element.name == name:
+            return element
+    return None
+
+
+def _unwrap(element):
+    siblings = element.parent.children
+    position = _index(siblings, element)
+    for child in element.children:
+        if isinstance(child, _Element):
+            child.parent = element.parent
+    siblings[position:position + 1] = element.children
+    element.children = []
+    element.parent = None
+
+
+def _index(siblings, element) -> int:
+    for position, sibling in enumerate(siblings):
+        if sibling is element:
+            return position
+    raise ValueError(element.name)
+
+
+def _attached(elements, names=None, exclude=None) -> list:
+    """Elements of the snapshot still in the tree, filtered by tag name."""
+    return [
+        element for element in elements
+        if element.parent is not None
+        and (names is None or element.name in names)
+        and (exclude is None or element.name not in exclude)
+    ]
+
+
+def _flatten(root):
+    """Turn block structure into plain text separators (pages without content spans)."""
+    # Один знімок дерева на всі проходи: розгортання не змінює порядку решти елементів,
+    # а розгорнуті й замінені елементи позначаються parent=None
+    elements = _iter_elements(root)
+    for element in elements:
+        if element.name in RENAMED_TAGS:
+            element.name = RENAMED_TAGS[element.name]
+            element.attrs = {}
+
+    for element in [e for e in elements if e.name == "a" and "href" in e.attrs]:
+        href = element.attrs["href"]
+        if _is_http(href):
+            element.attrs = {"href": href}
+        else:
+            _unwrap(element)
+
+    for names, after, before in ((BLOCK_TAGS, "\n\n", "\n"), (("ul", "ol"), "\n", None)):
+        for element in _attached(elements, names):
+            siblings = element.parent.children
+            position = _index(siblings, element)
+            if position + 1 < len(siblings):
+                siblings.insert(position + 1, after)
+            if before and position > 0:
+                siblings.insert(position, before)
+            _unwrap(element)
+
+    for element in _attached(elements, ("li",)):
+        if element.children:
+            element.children.insert(0, "• ")
+        siblings = element.parent.children
+        position = _index(siblings, element)
+        if position + 1 < len(siblings):
+            siblings.insert(position + 1, "\n")
+        _unwrap(element)
+
+    for element in _attached(elements, ("br",)):
+        siblings = element.parent.children
+        siblings[_index(siblings, element)] = "\n"
+        element.parent = None
+
+    for element in _attached(elements, exclude=ALLOWED_TAGS):
+        _unwrap(element)
+
+    for element in _attached(elements, FORMAT_TAGS):
+        element.attrs = {}
+
+
+def _serialize(children, tokens):
+    for child in children:
+        if isinstance(child, _Element):
+            tokens.append((MARKUP, "<" + child.name + _format_attrs(child.name, child.attrs) + ">"))
+            _serialize(child.children, tokens)
+            tokens.append((MARKUP, "</" + child.name + ">"))
+        elif isinstance(child, _Doctype):
+            tokens.append((DOCTYPE, str(child)))
+        elif isinstance(child, _Markup):
+            tokens.append((MARKUP, str(child)))
+        else:
+            tokens.append((TEXT, child))
+
+
+def _normalize(content: str, strip_tags: bool) -> str:
+    content = _RE_SPACES.sub(" ", content)
+    content = _RE_NEWLINES.sub("\n\n", content)
+    content = "\n\n".join(part for part in (part.strip() for part in content.split("\n\n")) if part)
+
+    if strip_tags:
+        # У потоці зі span.egw_content розмітка вже складається лише з <b>/<i>/... і коментарів
+        content = _RE_EMPTY_PAIR.sub("", content)
+        content = _RE_FOREIGN_TAG.sub("", content)
+        content = _RE_FOREIGN_CLOSE.sub("", content)
+        for pattern in _RE_UNWANTED:
+            content = pattern.sub("", content)
+        content = _RE_FORMAT_ATTRS.sub(r"<\1>", content)
+        # Підстановку href прибирає наступне правило, але збіг може захопити текст
+        # за межами тегу (лапки чи ">" у значеннях атрибутів), тож вона лишається
+        content = _RE_LINK_HREF.sub(r'<a href="\2">', content)
+        content = _RE_LINK_OPEN.sub("", content)
+        content = _RE_LINK_CLOSE.sub("", content)
+
+    lines = []
+    for line in content.split("\n"):
+        line = line.strip()
+        if line:
+            lines.append(line)
+        elif lines and lines[-1]:
+            lines.append("")
+    return "\n".join(lines).strip()
+
+
+def convert_html_to_telegram(html_str: str) -> str:
+    """Convert page HTML into text with Telegram-supported tags only."""
+    converter = _Converter()
+    converter.feed(html_str)
+    converter.close()
+    return converter.render()
@@ -0,0 +1,79 @@
+"""
+Random inspiration selection without loading the whole book.
+"""
+import random
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+
+from core.models import DailyInspiration
+
+# Поля, потрібні для відповіді "Випадковий день" (html_content не тягнемо)
+RANDOM_DAY_FIELDS = (
+    "telegram_html",
+    "translation_ukrainian",
+    "translation_russian",
+    "translation_english",
+    "original_text",
+    "date",
+    "book__title",
+    "book__language",
+)
+
+
+class BookInspirationIds:
+    """
+    Per-book cache of DailyInspiration ids.
+
+    A random day is picked from ids only and then one row is loaded by primary key.
+    Entries expire after `ttl` seconds and are dropped by signals when inspirations
+    of the book are saved or deleted in this process.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def get(self, book_id: int) -> tuple:
+        with self._lock:
+            entry = self._ids.get(book_id)
+        if entry is not None and entry[1] >= time.monotonic():
+            return entry[0]
+        ids = tuple(
+            DailyInspiration.objects
+            .filter(book_id=book_id)
+            .order_by()
+            .values_list("id", flat=True)
+        )
+        with self._lock:
+            self._ids[book_id] = (ids, time.monotonic() + self.ttl)
+        return ids
+
+    def invalidate(self, book_id: int):
+        with self._lock:
+            self._ids.pop(book_id, None)
+
+
+book_ids = BookInspirationIds(ttl=getattr(settings, "RANDOM_DAY_IDS_TTL", 600))
+
+
+def get_random_inspiration(book_id: int) -> Optional[DailyInspiration]:
+    """Get random inspiration of book (None when book has no inspirations)."""
+    for _ in range(2):
+        ids = book_ids.get(book_id)
+        if not ids:
+            return None
+        try:
+            return (
+                DailyInspiration.objects
+                .select_related("book")
+                .only(*RANDOM_DAY_FIELDS)
+                .get(pk=random.choice(ids))
+            )
+        except DailyInspiration.DoesNotExist:
+            # Рядок видалили в іншому процесі: перечитуємо список id
+            book_ids.invalidate(book_id)
+    return None
@@ -0,0 +1,58 @@
+"""
+Django management command для побудови плану доставки на день.
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bot.delivery_plan import build_plan, get_redis
+
+
+class Command(BaseCommand):
+    help = (
+        "Build (or rebuild) the Redis delivery plan of a UTC day: every active user's "
+        "slot, the inspiration of their local date and the rendered messages. The nightly "
+        "beat task builds tomorrow's plan; run this after parsing a book for today or if "
+        "the plan was lost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=str,
+            help="UTC day YYYY-MM-DD (default: today)"
+        )
+        parser.add_argument(
+            "--tomorrow",
+            action="store_true",
+            help="Build the plan of the next UTC day"
+        )
+
+    def handle(self, *args, **options):
+        if options.get("date"):
+            try:
+                day = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError(f"Invalid date: {options['date']}")
+        else:
+            day = timezone.now().date()
+            if options.get("tomorrow"):
+                day += timedelta(days=1)
+
+        redis = get_redis()
+        try:
+            stats = build_plan(day, redis)
+        finally:
+            redis.close()
+
+        self.stdout.write(
+            f"Plan {stats['day']}: users={stats['users']} minutes={stats['minutes']} "
+            f"inspirations={stats['inspirations']} already sent={stats['already_sent']}"
+        )
+        if stats["without_inspiration"]:
+            self.stdout.write(self.style.WARNING(
+                f"{stats['without_inspiration']} users skipped: "
+                "their book has no inspiration for their date"
+            ))
+        self.stdout.write(self.style.SUCCESS("Delivery plan ready"))
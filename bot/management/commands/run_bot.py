@@ -2,23 +2,45 @@
 Django management command для запуску Telegram бота.
 """
 import asyncio
-from django.core.management.base import BaseCommand
-from bot.bot import start_bot
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from bot.bot import start_bot, start_webhook
 
 
 class Command(BaseCommand):
     help = "Запускає Telegram бота"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--webhook",
+            action="store_true",
+            help="Receive updates over HTTP webhook instead of long polling"
+        )
+        parser.add_argument(
+            "--host",
+            type=str,
+            default=settings.BOT_WEBHOOK_HOST,
+            help=f"Webhook server host (default: {settings.BOT_WEBHOOK_HOST})"
+        )
+        parser.add_argument(
+            "--port",
+            type=int,
+            default=settings.BOT_WEBHOOK_PORT,
+            help=f"Webhook server port (default: {settings.BOT_WEBHOOK_PORT})"
+        )
+
     def handle(self, *args, **options):
-        self.stdout.write(self.style.SUCCESS("Запуск Telegram бота..."))
+        if options["webhook"] and not settings.TELEGRAM_WEBHOOK_SECRET:
+            # Без секрету публічний webhook приймав би підроблені оновлення
+            raise CommandError("Set TELEGRAM_WEBHOOK_SECRET to run the bot with --webhook")
         try:
-            asyncio.run(start_bot())
+            if options["webhook"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Запуск Telegram бота (webhook) на {options['host']}:{options['port']}..."
+                ))
+                asyncio.run(start_webhook(options["host"], options["port"]))
+            else:
+                self.stdout.write(self.style.SUCCESS("Запуск Telegram бота..."))
+                asyncio.run(start_bot())
         except KeyboardInterrupt:
             self.stdout.write(self.style.WARNING("Бот зупинено користувачем"))
-
-
-
-
-
-
-
@@ -0,0 +1,32 @@
+"""
+Middlewares для бота.
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from bot.user_cache import get_user_context
+
+
+class UserSettingsMiddleware(BaseMiddleware):
+    """
+    Inject user's TelegramUser, UserSettings and language into handler data.
+
+    Handlers receive them as `telegram_user`, `user_settings` (None when not
+    registered / not configured yet) and `language`.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None:
+            context = await get_user_context(user.id)
+            data["telegram_user"] = context.telegram_user
+            data["user_settings"] = context.settings
+            data["language"] = context.language
+        return await handler(event, data)
@@ -1,10 +1,121 @@
 """
-Signals для бота (якщо потрібні в майбутньому).
+Signals для бота.
 """
+import logging
 
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+from core.models import DailyInspiration, TelegramUser, UserSettings
+from core.signals import book_parsed, inspirations_updated
 
+logger = logging.getLogger(__name__)
 
 
+@receiver([post_save, post_delete], sender=TelegramUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    from bot.user_cache import cache
+    cache.invalidate(instance.telegram_id)
+    _bump_on_commit(instance.telegram_id)
 
 
+@receiver([post_save, post_delete], sender=UserSettings)
+def invalidate_cached_settings(sender, instance, **kwargs):
+    from bot.user_cache import cache
+    cache.invalidate_user_pk(instance.telegram_user_id)
+    try:
+        # Користувач зазвичай уже завантажений разом із налаштуваннями
+        telegram_id = instance.telegram_user.telegram_id
+    except TelegramUser.DoesNotExist:
+        return  # Видалений разом із користувачем: версію оновить сигнал TelegramUser
+    _bump_on_commit(telegram_id)
+
+
+def _bump_on_commit(telegram_id: int):
+    def _bump():
+        from bot.user_cache import bump_version
+        try:
+            bump_version(telegram_id)
+        except Exception:
+            logger.exception("Could not bump cached user version of %s", telegram_id)
+
+    transaction.on_commit(_bump)
+
+
+@receiver([post_save, post_delete], sender=DailyInspiration)
+def invalidate_book_inspiration_ids(sender, instance, **kwargs):
+    # Оновлення існуючого дня не змінює список id книги
+    if kwargs.get("created", True):
+        from bot.inspirations import book_ids
+        book_ids.invalidate(instance.book_id)
+
+
+@receiver(post_save, sender=UserSettings)
+def replan_delivery(sender, instance, **kwargs):
+    # post_save приходить до оновлення завантаженого стану: видно, чи змінилась доставка
+    if not instance.delivery_changed():
+        return
+
+    def _replan():
+        from bot.delivery_plan import replan
+        try:
+            replan(instance)
+        except Exception:
+            # План перебудується вночі, а до того користувач отримає старе повідомлення
+            logger.exception("Could not update delivery plan for settings %s", instance.pk)
+
+    transaction.on_commit(_replan)
+
+
+@receiver(post_delete, sender=UserSettings)
+def unplan_delivery(sender, instance, **kwargs):
+    settings_id = instance.pk
+
+    def _unplan():
+        from bot.delivery_plan import unplan
+        try:
+            unplan(settings_id)
+        except Exception:
+            logger.exception("Could not remove settings %s from delivery plan", settings_id)
+
+    transaction.on_commit(_unplan)
+
+
+@receiver([post_save, post_delete], sender=DailyInspiration)
+def drop_planned_messages(sender, instance, **kwargs):
+    # Нове повідомлення відрендериться при наступній відправці або побудові плану
+    if kwargs.get("created"):
+        return
+    _forget_on_commit([instance.pk])
+
+
+@receiver(inspirations_updated)
+def drop_reparsed_messages(sender, inspiration_ids, **kwargs):
+    _forget_on_commit(list(inspiration_ids))
+
+
+def _forget_on_commit(inspiration_ids: list):
+    def _drop():
+        from bot.delivery_plan import forget_messages
+        try:
+            forget_messages(*inspiration_ids)
+        except Exception:
+            logger.exception("Could not drop planned messages of inspirations %s", inspiration_ids)
+
+    transaction.on_commit(_drop)
+
+
+@receiver(book_parsed)
+def plan_parsed_book(sender, book, **kwargs):
+    # Дні, яких не було під час побудови плану, з'явились: додаємо їхніх читачів
+    book_id = book.pk
+
+    def _plan():
+        from bot.tasks import replan_book_deliveries
+        try:
+            replan_book_deliveries.delay(book_id)
+        except Exception:
+            logger.exception("Could not schedule delivery replan of book %s", book_id)
+
+    transaction.on_commit(_plan)
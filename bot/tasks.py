@@ -1,122 +1,391 @@
 import asyncio
-from datetime import datetime, timedelta, time
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional
 from celery import shared_task
 from django.utils import timezone as django_timezone
 from django.conf import settings
-import pytz
-from asgiref.sync import sync_to_async
 from core.models import TelegramUser, UserSettings, DailyInspiration, SentInspiration
+from core.scheduling import local_date_at
 
+logger = logging.getLogger(__name__)
 
-def _was_inspiration_sent_today(telegram_user: TelegramUser, inspiration: DailyInspiration, language: str) -> bool:
-    if settings.DEBUG:
-        return False
-    return SentInspiration.objects.filter(
-        telegram_user=telegram_user,
-        inspiration=inspiration,
-        language=language,
-    ).exists()
+
+def _already_sent(user_ids, inspiration_ids) -> set:
+    """(telegram_user_id, inspiration_id, language) already delivered, one query per tick."""
+    if settings.DEBUG or not user_ids or not inspiration_ids:
+        return set()
+    return set(
+        SentInspiration.objects
+        .filter(telegram_user_id__in=user_ids, inspiration_id__in=inspiration_ids)
+        .values_list("telegram_user_id", "inspiration_id", "language")
+    )
+
+
+def _due_settings(now: datetime):
+    """Settings whose delivery slot has come (range query over the partial usersettings_due_idx)."""
+    return (
+        UserSettings.objects
+        # Умови індексу повторюються в запиті, інакше планувальник БД його не візьме
+        .filter(next_delivery_at__lte=now, is_active=True, selected_book__isnull=False)
+        .select_related("telegram_user", "selected_book")
+        .order_by("next_delivery_at")
+    )
+
+
+def _todays_inspirations(book_dates: set) -> dict:
+    """Inspiration id per (book_id, date) in one query."""
+    if not book_dates:
+        return {}
+    rows = (
+        DailyInspiration.objects
+        .filter(
+            book_id__in={book_id for book_id, _ in book_dates},
+            date__in={day for _, day in book_dates},
+        )
+        .values_list("book_id", "date", "id")
+    )
+    # Вибірка - добуток книг і дат (дат не більше трьох через часові пояси), лишаємо потрібні пари
+    return {(book_id, day): pk for book_id, day, pk in rows if (book_id, day) in book_dates}
+
+
+def _plan_deliveries(due_settings: list, now: datetime) -> dict:
+    """
+    Recipients per inspiration id: [(telegram_id, language)] of due users whose
+    inspiration for their local today exists and was not sent yet.
+
+    Two queries however many users are due.
+    """
+    book_dates = {}
+    for settings_obj in due_settings:
+        if (
+            settings_obj.is_active
+            and settings_obj.telegram_user.is_active
+            and settings_obj.selected_book_id is not None
+        ):
+            book_dates[settings_obj.pk] = (
+                settings_obj.selected_book_id,
+                local_date_at(now, settings_obj.timezone),
+            )
+    
+    inspirations = _todays_inspirations(set(book_dates.values()))
+    user_ids = [
+        settings_obj.telegram_user_id
+        for settings_obj in due_settings
+        if settings_obj.pk in book_dates
+    ]
+    sent = _already_sent(user_ids, set(inspirations.values()))
+    
+    recipients = {}
+    for settings_obj in due_settings:
+        inspiration_id = inspirations.get(book_dates.get(settings_obj.pk))
+        delivered = (settings_obj.telegram_user_id, inspiration_id, settings_obj.language) in sent
+        if inspiration_id and not delivered:
+            recipients.setdefault(inspiration_id, []).append(
+                (settings_obj.telegram_user.telegram_id, settings_obj.language)
+            )
+    return recipients
 
 
 @shared_task
 def send_inspirations_to_users():
+    """
+    Scheduler tick: dispatch the users whose slot has come.
+    
+    Due users are popped from today's delivery plan in Redis (bot/delivery_plan.py);
+    only while that plan is missing they are selected from the database, and the
+    plan is built in the background. If Redis is unreachable, the database path
+    is used as well.
+    """
+    from redis import RedisError
+
+    from bot import delivery_plan
+    
     server_now = django_timezone.now()
+    redis = delivery_plan.get_redis()
+    try:
+        due = delivery_plan.take_due(server_now, redis)
+    except RedisError as e:
+        # Без плану розсилка йде з БД; користувачі, що лишились у плані, після відновлення
+        # Redis відсіються заявками на відправку
+        logger.warning("Delivery plan unavailable (%s), dispatching from the database", e)
+        due = delivery_plan.DueDeliveries(_dispatch_from_database(server_now), [], False)
+    else:
+        if not due.plan_ready:
+            recipients = _dispatch_from_database(server_now, exclude=set(due.settings_ids))
+            _merge_recipients(due.recipients, recipients)
+            try:
+                if delivery_plan.claim_build(redis, server_now.date()):
+                    build_delivery_plan.delay(server_now.date().isoformat())
+            except RedisError as e:
+                logger.warning("Could not schedule delivery plan build: %s", e)
+    finally:
+        redis.close()
     
-    active_settings = UserSettings.objects.filter(
-        is_active=True,
-        telegram_user__is_active=True,
-        selected_book__isnull=False,
-    ).select_related("telegram_user", "selected_book")
-    
-    for settings_obj in active_settings:
-        user_tz = settings_obj.timezone
-        if not user_tz:
-            user_tz = pytz.timezone("Europe/Kyiv")
-        elif isinstance(user_tz, str):
-            user_tz = pytz.timezone(user_tz)
-        
+    if due.settings_ids:
+        # Слоти в БД переносимо поза тіком: він не чекає на Postgres
+        advance_delivery_slots.delay(due.settings_ids, server_now.isoformat())
+    
+    for inspiration_id, inspiration_recipients in due.recipients.items():
+        for chunk in _chunks(inspiration_recipients, settings.DELIVERY_BATCH_SIZE):
+            send_inspiration_batch.delay(inspiration_id, chunk)
+
+
+def _dispatch_from_database(server_now: datetime, exclude: set = frozenset()) -> dict:
+    """Plan and reschedule due users straight from the database (no delivery plan)."""
+    due_settings = [
+        settings_obj for settings_obj in _due_settings(server_now)
+        if settings_obj.pk not in exclude
+    ]
+    recipients = _plan_deliveries(due_settings, server_now)
+    
+    for settings_obj in due_settings:
+        # Переносимо слот на наступний день навіть якщо надсилати нічого,
+        # щоб рядок не потрапляв у вибірку на кожному тіку
+        settings_obj.next_delivery_at = settings_obj.compute_next_delivery_at(after=server_now)
+    if due_settings:
+        UserSettings.objects.bulk_update(due_settings, ["next_delivery_at"], batch_size=1000)
+    return recipients
+
+
+def _merge_recipients(recipients: dict, more: dict):
+    for inspiration_id, inspiration_recipients in more.items():
+        recipients.setdefault(inspiration_id, []).extend(inspiration_recipients)
+
+
+@shared_task
+def advance_delivery_slots(settings_ids: list, moment: str):
+    """Move next_delivery_at of users dispatched from the plan past `moment`."""
+    after = datetime.fromisoformat(moment)
+    due_settings = list(
+        UserSettings.objects
+        .filter(pk__in=settings_ids, next_delivery_at__lte=after)
+        .only(
+            "id", "notification_time", "timezone", "is_active", "selected_book_id",
+            "next_delivery_at",
+        )
+    )
+    for settings_obj in due_settings:
+        settings_obj.next_delivery_at = settings_obj.compute_next_delivery_at(after=after)
+    if due_settings:
+        UserSettings.objects.bulk_update(due_settings, ["next_delivery_at"], batch_size=1000)
+
+
+@shared_task
+def build_delivery_plan(day: Optional[str] = None):
+    """
+    Build the delivery plan of a UTC day (ISO date).
+    
+    Without `day` - run by beat before midnight - the plan of the next UTC day is
+    built.
+    """
+    from bot import delivery_plan
+    
+    if day:
+        plan_day = date.fromisoformat(day)
+    else:
+        plan_day = django_timezone.now().date() + timedelta(days=1)
+    redis = delivery_plan.get_redis()
+    try:
+        return delivery_plan.build_plan(plan_day, redis)
+    finally:
+        redis.close()
+
+
+@shared_task
+def replan_book_deliveries(book_id: int):
+    """Add users of a freshly parsed book to the ready delivery plans."""
+    from bot import delivery_plan
+
+    redis = delivery_plan.get_redis()
+    try:
+        return delivery_plan.replan_book(book_id, redis)
+    finally:
+        redis.close()
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _render_inspiration_messages(inspiration_id: int, languages) -> dict:
+    """Render inspiration message once per language."""
+    from bot.templates.translations import get_text
+    
+    inspiration = (
+        DailyInspiration.objects
+        .select_related('book')
+        .defer('html_content')
+        .get(id=inspiration_id)
+    )
+    
+    return {
+        lang: get_text(
+            lang,
+            "inspiration_message",
+            book_title=inspiration.book.title,
+            content=inspiration.get_telegram_content(lang),
+        )
+        for lang in set(languages)
+    }
+
+
+def _record_sent(inspiration_id: int, delivered: list) -> int:
+    """Write delivered (telegram_id, language) pairs to SentInspiration in one bulk insert."""
+    if settings.DEBUG or not delivered:
+        return 0
+    
+    user_ids = dict(
+        TelegramUser.objects
+        .filter(telegram_id__in=[telegram_id for telegram_id, _ in delivered])
+        .values_list("telegram_id", "id")
+    )
+    records = [
+        SentInspiration(
+            telegram_user_id=user_ids[telegram_id], inspiration_id=inspiration_id,
+            language=language,
+        )
+        for telegram_id, language in delivered
+        if telegram_id in user_ids
+    ]
+    # Запис, уже зроблений попередньою спробою задачі, пропускається унікальним індексом
+    SentInspiration.objects.bulk_create(records, ignore_conflicts=True)
+    return len(records)
+
+
+def _deactivate_blocked(telegram_ids: list):
+    """Users who blocked the bot are reactivated by /start."""
+    if telegram_ids:
+        TelegramUser.objects.filter(telegram_id__in=telegram_ids).update(is_active=False)
+
+
+def _deliver(inspiration_id: int, recipients: list) -> tuple:
+    """
+    Send one inspiration to many (telegram_id, language) recipients.
+    
+    All messages go through one event loop and one bot session and share the global
+    Telegram rate limit. Returns (delivered, failed) recipient lists; failed holds
+    only transient failures worth retrying.
+    """
+    from bot.bot import create_bot
+    from bot.delivery import (
+        DeliveryPipeline,
+        DeliveryStats,
+        claim_recipients,
+        get_redis,
+        release_claims,
+    )
+    from bot.delivery_plan import get_redis as get_plan_redis, stored_messages
+    
+    languages = [lang for _, lang in recipients]
+    plan_redis = get_plan_redis()
+    try:
+        # Повідомлення, відрендерені планом, не потребують запиту до БД
+        messages = stored_messages(plan_redis, inspiration_id, languages)
+    finally:
+        plan_redis.close()
+    if messages is None:
         try:
-            user_now = server_now.astimezone(user_tz)
-        except (AttributeError, TypeError):
-            user_tz = pytz.timezone("Europe/Kyiv")
-            user_now = server_now.astimezone(user_tz)
-        
-        user_current_date = user_now.date()
-        user_current_time = user_now.time()
-        
-        current_minute = user_current_time.minute
-        window_start_minute = (current_minute // 5) * 5
-        window_start_time = user_current_time.replace(minute=window_start_minute, second=0, microsecond=0)
-        window_end_time = user_current_time.replace(second=0, microsecond=0)
-        
-        notification_time = settings_obj.notification_time
-        
-        if settings.DEBUG:
-            time_in_window = notification_time <= user_current_time
-        else:
-            time_in_window = (
-                window_start_time <= notification_time <= window_end_time
-            )
+            messages = _render_inspiration_messages(inspiration_id, languages)
+        except DailyInspiration.DoesNotExist:
+            return [], []
+    
+    async def _send_all():
+        semaphore = asyncio.Semaphore(settings.DELIVERY_CONCURRENCY)
+        redis = get_redis()
+        claimed, results, stats = [], [], DeliveryStats()
         
-        if time_in_window:
-            inspiration = DailyInspiration.objects.filter(
-                book=settings_obj.selected_book,
-                date=user_current_date,
-            ).first()
-            
-            if inspiration:
-                if not _was_inspiration_sent_today(
-                    settings_obj.telegram_user,
-                    inspiration,
-                    settings_obj.language
-                ):
-                    send_inspiration_to_user.delay(
-                        settings_obj.telegram_user.telegram_id,
-                        inspiration.id,
-                        settings_obj.language,
+        try:
+            # Отримувачі, яким ця чи попередня спроба вже надсилала, пропускаються
+            if settings.DEBUG:
+                claimed = recipients
+            else:
+                claimed = await claim_recipients(redis, inspiration_id, recipients)
+            async with create_bot() as bot:
+                pipeline = DeliveryPipeline(bot, redis)
+                stats = pipeline.stats
+                
+                async def _send(telegram_id: int, language: str):
+                    async with semaphore:
+                        return await pipeline.send(telegram_id, messages[language])
+                
+                outcomes = await asyncio.gather(
+                    *(_send(telegram_id, language) for telegram_id, language in claimed),
+                    return_exceptions=True,
+                )
+            for (telegram_id, _), outcome in zip(claimed, outcomes):
+                if isinstance(outcome, BaseException):
+                    logger.error(
+                        "Inspiration %s to %s failed: %s: %s",
+                        inspiration_id, telegram_id, type(outcome).__name__, outcome,
                     )
+            results = [outcome is True for outcome in outcomes]
+        finally:
+            # Навіть якщо пачка обірвалась, знімаємо заявки всіх, кому не надіслали,
+            # інакше повтор задачі пропустив би їх як "уже заявлених"
+            # Заблоковані й остаточно відхилені не повторюються: їхні заявки лишаються
+            final = set(stats.blocked) | set(stats.rejected)
+            results += [False] * (len(claimed) - len(results))
+            failed = [
+                recipient for recipient, ok in zip(claimed, results)
+                if not ok and recipient[0] not in final
+            ]
+            try:
+                if not settings.DEBUG:
+                    await release_claims(redis, inspiration_id, failed)
+            finally:
+                await redis.aclose()
+        return claimed, results, failed, stats
+    
+    claimed, results, failed, stats = asyncio.run(_send_all())
+    
+    delivered = [recipient for recipient, ok in zip(claimed, results) if ok]
+    blocked = set(stats.blocked)
+    
+    _record_sent(inspiration_id, delivered)
+    _deactivate_blocked(stats.blocked)
+    
+    logger.info(
+        "Inspiration %s: sent=%s failed=%s blocked=%s rejected=%s already_claimed=%s "
+        "retries=%s flood_waits=%s",
+        inspiration_id, stats.sent, len(failed), len(blocked), len(stats.rejected),
+        len(recipients) - len(claimed), stats.retries, stats.flood_waits,
+    )
+    return delivered, failed
+
+
+@shared_task(bind=True, max_retries=5)
+def send_inspiration_batch(self, inspiration_id: int, recipients: list):
+    """Send inspiration to chunk of [telegram_id, language] pairs."""
+    _, failed = _deliver(
+        inspiration_id,
+        [(int(telegram_id), language) for telegram_id, language in recipients],
+    )
+    if failed:
+        # Повторюємо лише тих отримувачів, чия невдача тимчасова
+        raise self.retry(
+            args=(inspiration_id, failed),
+            countdown=60 * (2 ** self.request.retries),
+        )
 
 
 @shared_task
 def send_inspiration_to_user(telegram_id: int, inspiration_id: int, language: str):
-    from bot.bot import bot
-    from bot.utils import convert_html_to_telegram
+    send_inspiration_batch.delay(inspiration_id, [(telegram_id, language)])
+
+
+@shared_task
+def report_delivery_throughput(minutes: int = 5):
+    """Log per-minute Telegram send rate."""
+    from bot.delivery import get_redis, get_throughput
     
-    async def _send():
+    async def _read():
+        redis = get_redis()
         try:
-            def get_inspiration_data(insp_id: int, lang: str):
-                inspiration = DailyInspiration.objects.select_related('book').get(id=insp_id)
-                book = inspiration.book
-                
-                use_html = bool(inspiration.html_content and book.language == lang)
-                
-                if use_html:
-                    content = convert_html_to_telegram(inspiration.html_content)
-                    if not content or not content.strip():
-                        content = inspiration.get_text_by_language(lang)
-                else:
-                    content = inspiration.get_text_by_language(lang)
-                
-                return content, book.title
-            
-            content, book_title = await sync_to_async(get_inspiration_data)(inspiration_id, language)
-            
-            from bot.templates.translations import get_text
-            message = get_text(language, "inspiration_message", book_title=book_title, content=content)
-            await bot.send_message(chat_id=telegram_id, text=message)
-            
-            if not settings.DEBUG:
-                try:
-                    telegram_user = TelegramUser.objects.get(telegram_id=telegram_id)
-                    inspiration = DailyInspiration.objects.get(id=inspiration_id)
-                    SentInspiration.objects.get_or_create(
-                        telegram_user=telegram_user,
-                        inspiration=inspiration,
-                        language=language,
-                    )
-                except (TelegramUser.DoesNotExist, DailyInspiration.DoesNotExist):
-                    pass
-        except Exception:
-            pass
+            return await get_throughput(redis, minutes)
+        finally:
+            await redis.aclose()
     
-    asyncio.run(_send())
+    for moment, count in asyncio.run(_read()):
+        logger.info("Delivery throughput %s: %s msg/min", moment.strftime("%H:%M"), count)
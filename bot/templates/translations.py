@@ -2,10 +2,140 @@
 Translation system for bot messages.
 """
 from pathlib import Path
+from types import MappingProxyType
+from typing import Optional
 import json
+import logging
+import string
+import threading
+import time
+
+from core.constants import LANGUAGE_CHOICES
+
+logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).parent
 TEMPLATES_DIR = BASE_DIR / "messages"
+FALLBACK_LANGUAGE = "uk"
+# Як часто в режимі hot-reload перевіряти mtime файлів шаблонів
+RELOAD_CHECK_INTERVAL = 1.0
+
+# Шаблони, які використовують хендлери та задачі: їх відсутність видно одразу при завантаженні
+REQUIRED_TEMPLATES = frozenset({
+    "book_selected", "cancel", "error_generic", "error_no_book", "error_no_inspirations",
+    "error_no_settings", "error_not_registered", "help", "inspiration_message",
+    "language_selected", "location_received", "location_skipped", "no_active_operation",
+    "no_books", "profile", "random_day", "request_location", "select_book",
+    "select_book_language", "select_language", "set_time", "settings", "start",
+    "start_existing_user", "start_new_user", "time_invalid", "time_saved", "unknown_command",
+})
+
+
+def _placeholders(template: str) -> frozenset:
+    try:
+        return frozenset(field for _, field, _, _ in string.Formatter().parse(template) if field)
+    except ValueError:
+        return frozenset()
+
+
+class TemplateRegistry:
+    """
+    Message templates of all languages loaded into an immutable mapping.
+
+    Fallback to FALLBACK_LANGUAGE is resolved at load time, so lookup is a plain
+    dict access. With auto_reload (DEBUG) changed files are picked up by mtime.
+    """
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR, auto_reload: Optional[bool] = None):
+        self.templates_dir = templates_dir
+        self.auto_reload = auto_reload
+        self._templates = None
+        self._mtimes = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def warm(self) -> int:
+        """Load templates if they are not loaded yet. Returns number of templates per language."""
+        if self._templates is None:
+            with self._lock:
+                if self._templates is None:
+                    self._load()
+        return len(self._templates[FALLBACK_LANGUAGE])
+
+    def reload(self):
+        with self._lock:
+            self._load()
+
+    def get(self, language: str, template_name: str) -> Optional[str]:
+        if self._templates is None:
+            self.warm()
+        elif self.auto_reload:
+            self._reload_if_changed()
+        templates = self._templates.get(language) or self._templates[FALLBACK_LANGUAGE]
+        return templates.get(template_name)
+
+    def _scan(self) -> dict:
+        return {path: path.stat().st_mtime_ns for path in self.templates_dir.glob("*/*.html")}
+
+    def _load(self):
+        mtimes = self._scan()
+        raw = {}
+        for path in mtimes:
+            raw.setdefault(path.parent.name, {})[path.stem] = path.read_text(encoding="utf-8")
+
+        fallback = raw.get(FALLBACK_LANGUAGE, {})
+        languages = {code for code, _ in LANGUAGE_CHOICES} | set(raw) | {FALLBACK_LANGUAGE}
+        names = set(REQUIRED_TEMPLATES).union(*(own.keys() for own in raw.values()))
+
+        for name in sorted(names - fallback.keys()):
+            logger.error("Template %s is missing in fallback language %s", name, FALLBACK_LANGUAGE)
+
+        templates = {}
+        for language in sorted(languages):
+            own = raw.get(language, {})
+            merged = dict(fallback)
+            merged.update(own)
+            if language != FALLBACK_LANGUAGE:
+                for name in sorted(fallback.keys() - own.keys()):
+                    logger.warning(
+                        "Template %s/%s is missing, %s version will be used",
+                        language, name, FALLBACK_LANGUAGE,
+                    )
+                for name in sorted(own.keys() & fallback.keys()):
+                    own_fields = _placeholders(own[name])
+                    fallback_fields = _placeholders(fallback[name])
+                    if own_fields != fallback_fields:
+                        logger.warning(
+                            "Template %s/%s has placeholders %s, %s version has %s",
+                            language, name, sorted(own_fields),
+                            FALLBACK_LANGUAGE, sorted(fallback_fields),
+                        )
+            templates[language] = MappingProxyType(merged)
+
+        if self.auto_reload is None:
+            from django.conf import settings
+            self.auto_reload = bool(getattr(settings, "DEBUG", False))
+
+        self._templates = MappingProxyType(templates)
+        self._mtimes = mtimes
+        self._checked_at = time.monotonic()
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        if self._scan() != self._mtimes:
+            logger.info("Message templates changed, reloading")
+            self.reload()
+
+
+registry = TemplateRegistry()
+
+
+def warm() -> int:
+    """Load all message templates into memory (called on bot startup)."""
+    return registry.warm()
 
 
 def load_template(language: str, template_name: str) -> str:
@@ -19,16 +149,12 @@ def load_template(language: str, template_name: str) -> str:
     Returns:
         Template content as string
     """
-    template_path = TEMPLATES_DIR / language / f"{template_name}.html"
-    
-    if not template_path.exists():
-        # Fallback to Ukrainian if template doesn't exist
-        template_path = TEMPLATES_DIR / "uk" / f"{template_name}.html"
+    template = registry.get(language, template_name)
     
-    if not template_path.exists():
+    if template is None:
         return f"[Template {template_name} not found]"
     
-    return template_path.read_text(encoding="utf-8")
+    return template
 
 
 def get_text(language: str, key: str, **kwargs) -> str:
@@ -0,0 +1,164 @@
+"""
+In-process cache of Telegram users and their settings for bot handlers.
+
+Every process that saves a TelegramUser or UserSettings (bot, admin, Celery) bumps
+the user's version key in Redis after commit. A cached entry is used only while the
+version it was loaded with is still current, so writes of other processes are seen
+on the next update at the cost of one Redis GET instead of a database query.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from core.models import TelegramUser, UserSettings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = "uk"
+VERSION_KEY = "bot:user:{telegram_id}:version"
+
+
+@dataclass(frozen=True)
+class UserContext:
+    """TelegramUser and UserSettings of one chat (both None for unknown users)."""
+    telegram_user: Optional[TelegramUser] = None
+    settings: Optional[UserSettings] = None
+
+    @property
+    def language(self) -> str:
+        return self.settings.language if self.settings else DEFAULT_LANGUAGE
+
+
+def load_user_context(telegram_id: int) -> UserContext:
+    """Fetch user with settings and selected book in one joined query."""
+    telegram_user = (
+        TelegramUser.objects
+        .select_related("settings", "settings__selected_book")
+        .filter(telegram_id=telegram_id)
+        .first()
+    )
+    if telegram_user is None:
+        return UserContext()
+    try:
+        user_settings = telegram_user.settings
+    except UserSettings.DoesNotExist:
+        user_settings = None
+    return UserContext(telegram_user, user_settings)
+
+
+class UserContextCache:
+    """
+    TTL + LRU cache of UserContext keyed by telegram_id.
+
+    Entries are dropped by signals on every TelegramUser/UserSettings save in this
+    process and are returned only for the shared version they were loaded with, so
+    writes made by other processes (admin, Celery) are seen too.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._telegram_ids = {}
+        self._lock = threading.Lock()
+
+    def get(self, telegram_id: int, version: Optional[str] = None) -> Optional[UserContext]:
+        with self._lock:
+            entry = self._entries.get(telegram_id)
+            if entry is None:
+                return None
+            context, expires_at, loaded_version = entry
+            if expires_at < time.monotonic() or loaded_version != version:
+                self._drop(telegram_id)
+                return None
+            self._entries.move_to_end(telegram_id)
+            return context
+
+    def set(self, telegram_id: int, context: UserContext, version: Optional[str] = None):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._drop(telegram_id)
+            self._entries[telegram_id] = (context, time.monotonic() + self.ttl, version)
+            if context.telegram_user is not None:
+                self._telegram_ids[context.telegram_user.pk] = telegram_id
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, telegram_id: int):
+        with self._lock:
+            self._drop(telegram_id)
+
+    def invalidate_user_pk(self, user_pk: int):
+        """Drop entry by TelegramUser primary key (what UserSettings rows reference)."""
+        with self._lock:
+            telegram_id = self._telegram_ids.get(user_pk)
+            if telegram_id is not None:
+                self._drop(telegram_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._telegram_ids.clear()
+
+    def _drop(self, telegram_id: int):
+        entry = self._entries.pop(telegram_id, None)
+        if entry is not None and entry[0].telegram_user is not None:
+            self._telegram_ids.pop(entry[0].telegram_user.pk, None)
+
+
+cache = UserContextCache(
+    ttl=getattr(settings, "BOT_USER_CACHE_TTL", 300),
+    max_size=getattr(settings, "BOT_USER_CACHE_SIZE", 10000),
+)
+
+
+# Ключ версії живе довше за запис кешу: запис не переживе зникнення свого ключа
+VERSION_TTL = int(cache.ttl) + 60
+
+_redis = None  # (event loop, async client)
+
+
+def _get_redis():
+    global _redis
+    loop = asyncio.get_running_loop()
+    if _redis is None or _redis[0] is not loop:
+        import redis.asyncio as aioredis
+        _redis = (loop, aioredis.from_url(settings.REDIS_URL, decode_responses=True))
+    return _redis[1]
+
+
+def bump_version(telegram_id: int):
+    """Mark the user's cached contexts stale in every bot process."""
+    from bot.delivery_plan import get_redis
+
+    key = VERSION_KEY.format(telegram_id=telegram_id)
+    redis = get_redis()
+    try:
+        with redis.pipeline(transaction=False) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, VERSION_TTL)
+            pipe.execute()
+    finally:
+        redis.close()
+
+
+async def get_user_context(telegram_id: int) -> UserContext:
+    try:
+        version = await _get_redis().get(VERSION_KEY.format(telegram_id=telegram_id))
+    except Exception:
+        # Без Redis не видно чужих змін: читаємо з БД і не кешуємо
+        logger.warning("User cache version of %s is unavailable", telegram_id, exc_info=True)
+        return await sync_to_async(load_user_context)(telegram_id)
+    context = cache.get(telegram_id, version)
+    if context is None:
+        context = await sync_to_async(load_user_context)(telegram_id)
+        cache.set(telegram_id, context, version)
+    return context
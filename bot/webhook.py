@@ -0,0 +1,99 @@
+"""
+Webhook mode: Telegram updates are delivered over HTTP to an aiohttp server.
+
+Each request carries one update, so several replicas can run behind a load balancer.
+"""
+import asyncio
+import logging
+from typing import Any, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Handle updates in background with at most `concurrency` handlers at a time.
+
+    When the limit is reached the HTTP response is delayed until a slot frees up,
+    so Telegram (or the load balancer) sees back pressure instead of the process
+    piling up unbounded tasks.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, concurrency: int, **kwargs: Any):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        await self._slots.acquire()
+        task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._background_feed_update_tasks.discard)
+        task.add_done_callback(self._release_slot)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    def _release_slot(self, task: asyncio.Task):
+        self._slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Update handling failed", exc_info=task.exception())
+
+    async def close(self) -> None:
+        if self._background_feed_update_tasks:
+            await asyncio.gather(*self._background_feed_update_tasks, return_exceptions=True)
+        await super().close()
+
+
+async def _health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+def create_webhook_app(
+    bot: Bot,
+    dp: Dispatcher,
+    path: Optional[str] = None,
+    secret_token: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    webhook_url: Optional[str] = None,
+) -> web.Application:
+    """
+    Build aiohttp application serving updates on `path`.
+
+    When `webhook_url` is set, the webhook is registered in Telegram on startup
+    (setWebhook is idempotent, so every replica may do it). A secret token is
+    required: without it the public endpoint would accept forged updates.
+    """
+    path = path or settings.TELEGRAM_WEBHOOK_PATH
+    secret_token = secret_token if secret_token is not None else settings.TELEGRAM_WEBHOOK_SECRET
+    concurrency = concurrency or settings.BOT_WEBHOOK_CONCURRENCY
+    if not secret_token:
+        raise ImproperlyConfigured("TELEGRAM_WEBHOOK_SECRET must be set for the webhook mode")
+
+    app = web.Application()
+    app.router.add_get("/healthz", _health)
+    BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        concurrency=concurrency,
+        secret_token=secret_token,
+    ).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+
+    if webhook_url:
+        async def _set_webhook(app: web.Application):
+            await bot.set_webhook(
+                url=webhook_url.rstrip("/") + path,
+                secret_token=secret_token,
+                max_connections=min(concurrency, 100),
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+            logger.info("Webhook registered at %s%s", webhook_url.rstrip("/"), path)
+
+        app.on_startup.append(_set_webhook)
+
+    return app
@@ -153,6 +153,8 @@ else:
             "Celery configuration is incomplete. Set REDIS_URL, CELERY_BROKER_URL, or REDIS_HOST, REDIS_PORT, REDIS_DB"
         )
 
+REDIS_URL = CELERY_BROKER_URL
+
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
@@ -165,9 +167,57 @@ CELERY_BEAT_SCHEDULE = {
         "task": "bot.tasks.send_inspirations_to_users",
         "schedule": crontab(minute="*/5"),
     },
+    "build-delivery-plan": {
+        "task": "bot.tasks.build_delivery_plan",
+        "schedule": crontab(hour=23, minute=30),
+    },
+    "report-delivery-throughput": {
+        "task": "bot.tasks.report_delivery_throughput",
+        "schedule": crontab(minute="*/5"),
+    },
+    "archive-sent-history": {
+        "task": "core.tasks.archive_sent_history",
+        "schedule": crontab(hour=4, minute=0),
+    },
 }
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
+# Стан діалогів бота (FSM) у Redis: спільний для всіх реплік і переживає перезапуск
+BOT_FSM_REDIS_URL = os.getenv("BOT_FSM_REDIS_URL") or REDIS_URL
+BOT_FSM_KEY_PREFIX = os.getenv("BOT_FSM_KEY_PREFIX", "bot:fsm")
+BOT_FSM_STATE_TTL = int(os.getenv("BOT_FSM_STATE_TTL", str(24 * 60 * 60)))
+
+# Webhook режим (run_bot --webhook): публічна адреса, шлях, секрет та ліміт паралельних апдейтів
+TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL")
+TELEGRAM_WEBHOOK_PATH = os.getenv("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook")
+TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+BOT_WEBHOOK_HOST = os.getenv("BOT_WEBHOOK_HOST", "0.0.0.0")
+BOT_WEBHOOK_PORT = int(os.getenv("BOT_WEBHOOK_PORT", "8080"))
+BOT_WEBHOOK_CONCURRENCY = int(os.getenv("BOT_WEBHOOK_CONCURRENCY", "50"))
+
+# Розсилка: кількість отримувачів в одній Celery задачі та паралельних запитів до Telegram
+DELIVERY_BATCH_SIZE = int(os.getenv("DELIVERY_BATCH_SIZE", "200"))
+DELIVERY_CONCURRENCY = int(os.getenv("DELIVERY_CONCURRENCY", "25"))
+
+# Глобальний ліміт Telegram (~30 повідомлень/сек) спільний для всіх воркерів через Redis
+TELEGRAM_RATE_LIMIT = float(os.getenv("TELEGRAM_RATE_LIMIT", "30"))
+TELEGRAM_RATE_BURST = int(os.getenv("TELEGRAM_RATE_BURST", "30"))
+TELEGRAM_SEND_MAX_RETRIES = int(os.getenv("TELEGRAM_SEND_MAX_RETRIES", "5"))
+
+# Кеш користувачів та налаштувань у процесі бота (секунди, кількість записів)
+BOT_USER_CACHE_TTL = float(os.getenv("BOT_USER_CACHE_TTL", "300"))
+BOT_USER_CACHE_SIZE = int(os.getenv("BOT_USER_CACHE_SIZE", "10000"))
+# Скільки секунд бот тримає список id днів книги для "Випадкового дня"
+RANDOM_DAY_IDS_TTL = float(os.getenv("RANDOM_DAY_IDS_TTL", "600"))
+# Скільки днів журнал доставки тримає окремі рядки; старші щоночі стискаються в архів по місяцях
+SENT_HISTORY_RETENTION_DAYS = int(os.getenv("SENT_HISTORY_RETENTION_DAYS", "60"))
+
 EGW_API_AUTH_TOKEN = os.getenv("EGW_API_AUTH_TOKEN")
 
+# HTML парсер для parse_book: selectolax, lxml або html.parser; порожньо - найшвидший встановлений
+PARSER_HTML_BACKEND = os.getenv("PARSER_HTML_BACKEND", "")
+
+
+# Стиснення html_content нових днів: zlib, zstd (потрібен пакет zstandard) або none
+INSPIRATION_COMPRESSION = os.getenv("INSPIRATION_COMPRESSION", "zlib")
@@ -5,6 +5,8 @@ from .models import (
     UserSettings,
     DailyInspiration,
     SentInspiration,
+    SentInspirationArchive,
+    ParseCheckpoint,
 )
 
 
@@ -94,5 +96,28 @@ class SentInspirationAdmin(admin.ModelAdmin):
     search_fields = ("telegram_user__username", "telegram_user__first_name", "inspiration__book__title")
     readonly_fields = ("sent_at",)
     date_hierarchy = "sent_at"
+    list_select_related = ("telegram_user", "inspiration__book")
 
 
+@admin.register(SentInspirationArchive)
+class SentInspirationArchiveAdmin(admin.ModelAdmin):
+    list_display = (
+        "telegram_user", "book", "month", "language", "delivered_days_count", "last_sent_at",
+    )
+    list_filter = ("language", "month")
+    search_fields = ("telegram_user__username", "telegram_user__first_name", "book__title")
+    readonly_fields = (
+        "telegram_user", "book", "month", "language", "days", "delivered_days", "last_sent_at",
+    )
+    list_select_related = ("telegram_user", "book")
+
+    def delivered_days_count(self, obj):
+        return len(obj.delivered_days)
+    delivered_days_count.short_description = "Days sent"
+
+
+@admin.register(ParseCheckpoint)
+class ParseCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("book", "last_date", "pages", "updated_at")
+    search_fields = ("book__title",)
+    readonly_fields = ("updated_at",)
@@ -0,0 +1,262 @@
+"""
+Parse many books in parallel.
+
+Every book is crawled by its own AsyncBookCrawler in a worker thread (the crawler
+writes to the database from that thread). All crawlers share one HostLimiters, so
+`concurrency` and `rate` cap the requests to each host for the whole batch, not per
+book. A book that fails is reported and the others go on.
+"""
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+from django.db import connections
+
+from core.crawler import AsyncBookCrawler, HostLimiters
+from core.models import Book, ParseCheckpoint
+from core.page_cache import PageCache
+from core.parsers import DEFAULT_BATCH_SIZE, EGWBookParser
+
+logger = logging.getLogger(__name__)
+
+# Скільки секунд може парситись одна книга (за замовчуванням)
+DEFAULT_BOOK_TIMEOUT = 3600.0
+# Запас понад тайм-аут, після якого книга, що не відповідає, вважається завислою
+STUCK_BOOK_GRACE = 120.0
+
+# Лічильники stats, що підсумовуються по всіх книгах
+SUMMED_STATS = (
+    "total_pages", "parsed", "new", "changed", "unchanged", "skipped", "errors", "db_time",
+)
+
+
+class BookResult(NamedTuple):
+    book_id: int
+    title: str
+    # done; errors - some pages failed, checkpoint kept for resume;
+    # failed - crawl raised, timed out or got stuck
+    status: str
+    stats: Optional[dict]
+    error: Optional[str]
+    elapsed: float
+
+
+class BatchBookParser:
+    """Crawl `books` with `workers` books at a time."""
+
+    def __init__(
+        self,
+        books: Iterable[Book],
+        workers: int = 4,
+        concurrency: int = 4,
+        rate: float = 2.0,
+        max_pages: int = 400,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        resume: bool = False,
+        page_cache: Optional[PageCache] = None,
+        offline: bool = False,
+        book_timeout: Optional[float] = DEFAULT_BOOK_TIMEOUT,
+        error_logger: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Args:
+            books: Books to parse, each from its checkpoint (resume) or source_url
+            workers: Books crawled at the same time
+            concurrency: Max parallel requests per host for all books together
+            rate: Max requests per second per host for all books together (0 - unlimited)
+            max_pages: Maximum number of pages per book
+            batch_size: Parsed days written to the database at once
+            resume: Continue books that have a checkpoint from it
+            page_cache: Shared page cache to record into / replay from (offline)
+            book_timeout: Seconds one book may take (None - no limit); a book over it is failed
+            error_logger: Optional callback function for logging errors (takes error message string)
+        """
+        self.books = list(books)
+        self.workers = max(1, workers)
+        self.limiters = HostLimiters(concurrency, rate)
+        self.max_pages = max_pages
+        self.batch_size = batch_size
+        self.resume = resume
+        self.page_cache = page_cache
+        self.offline = offline
+        self.book_timeout = book_timeout
+        self.error_logger = error_logger or (lambda msg: logger.error(msg))
+        self.results: List[BookResult] = []
+        self._running = {}  # book_id -> (Book, EGWBookParser, started)
+        self._lock = threading.Lock()
+        self._started = None
+
+    def run(
+        self, progress: Optional[Callable[[dict], None]] = None, interval: float = 2.0
+    ) -> List[BookResult]:
+        """
+        Parse all books; returns one BookResult per book in completion order.
+
+        progress(snapshot()) is called from the calling thread every `interval` seconds
+        and once at the end.
+        """
+        self._started = time.monotonic()
+        reported = self._started
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse-book")
+        try:
+            pending = {executor.submit(self._parse_one, book): book for book in self.books}
+            while pending:
+                done, _ = wait(pending, timeout=interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                for future in self._abandon_stuck(pending):
+                    pending.pop(future)
+                if progress is not None and pending and time.monotonic() - reported >= interval:
+                    reported = time.monotonic()
+                    progress(self.snapshot())
+        finally:
+            # Завислий потік книги не тримає всю партію; його результат більше не враховується
+            executor.shutdown(wait=False, cancel_futures=True)
+        if progress is not None:
+            progress(self.snapshot())
+        return self.results
+
+    def _abandon_stuck(self, pending: dict) -> list:
+        """Futures of books running far past book_timeout; they are recorded as failed."""
+        if not self.book_timeout:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            stuck = {
+                book_id: started for book_id, (_, _, started) in self._running.items()
+                if now - started > self.book_timeout + STUCK_BOOK_GRACE
+            }
+        abandoned = []
+        for future, book in pending.items():
+            if book.pk in stuck:
+                elapsed = now - stuck[book.pk]
+                error = f"stuck for {elapsed:.0f} s, abandoned"
+                self.error_logger(f'Book "{book.title}" (ID {book.pk}) failed: {error}')
+                self._record(BookResult(book.pk, book.title, "failed", None, error, elapsed))
+                abandoned.append(future)
+        return abandoned
+
+    def _record(self, result: BookResult):
+        with self._lock:
+            self._running.pop(result.book_id, None)
+            # Книга, визнана завислою, може ще завершитись: перший результат остаточний
+            if all(recorded.book_id != result.book_id for recorded in self.results):
+                self.results.append(result)
+
+    def snapshot(self) -> dict:
+        """Aggregated progress: finished and running books and stats summed over all of them."""
+        with self._lock:
+            results = list(self.results)
+            running = [(book, parser.stats) for book, parser, _ in self._running.values()]
+        totals = {key: 0 for key in SUMMED_STATS}
+        for stats in [result.stats for result in results] + [stats for _, stats in running]:
+            if stats:
+                for key in SUMMED_STATS:
+                    totals[key] += stats[key]
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        return {
+            "books": len(self.books),
+            "done": sum(1 for result in results if result.status == "done"),
+            "with_errors": sum(1 for result in results if result.status == "errors"),
+            "failed": sum(1 for result in results if result.status == "failed"),
+            "running": [
+                (book.title, stats["total_pages"] if stats else 0) for book, stats in running
+            ],
+            "elapsed": elapsed,
+            "pages_per_second": totals["total_pages"] / elapsed if elapsed else 0.0,
+            **totals,
+        }
+
+    def _parse_one(self, book: Book) -> BookResult:
+        started = time.monotonic()
+        stats = None
+        error = None
+        try:
+            parser = self._parser_for(book)
+            with self._lock:
+                self._running[book.pk] = (book, parser, started)
+            crawler = AsyncBookCrawler(parser, limiters=self.limiters)
+            stats = crawler.run(max_pages=self.max_pages, timeout=self.book_timeout)
+        except Exception as e:
+            error = f"{type(e).__name__} - {str(e)}"
+            self.error_logger(
+                f'Book "{book.title}" (ID {book.pk}) failed: {error}\n{traceback.format_exc()}'
+            )
+        finally:
+            # Потоки пулу живуть довше за книгу: закриваємо їхні з'єднання з БД
+            connections.close_all()
+        if error:
+            status = "failed"
+        else:
+            status = "errors" if stats["errors"] else "done"
+        result = BookResult(book.pk, book.title, status, stats, error, time.monotonic() - started)
+        self._record(result)
+        return result
+
+    def _parser_for(self, book: Book) -> EGWBookParser:
+        checkpoint = None
+        start_url = book.source_url
+        if self.resume:
+            checkpoint = ParseCheckpoint.objects.filter(book=book).exclude(next_url=None).first()
+            if checkpoint is not None and checkpoint.next_url:
+                start_url = checkpoint.next_url
+            else:
+                checkpoint = None
+        if not start_url:
+            raise ValueError("Book has no source_url")
+
+        def log_error(msg: str):
+            self.error_logger(f"[{book.title}] {msg}")
+
+        return EGWBookParser(
+            book=book,
+            start_url=start_url,
+            error_logger=log_error,
+            batch_size=self.batch_size,
+            checkpoint=checkpoint,
+            page_cache=self.page_cache,
+            offline=self.offline,
+        )
+
+
+def books_to_parse(book_ids: Iterable[int] = (), all_unparsed: bool = False, force: bool = False,
+                   resume: bool = False):
+    """
+    Books selected by id or all active unparsed ones.
+
+    Returns (books, problems): ids that do not exist, already parsed books (without
+    force or resume) and books with no URL to start from are reported in problems
+    and not parsed.
+    """
+    book_ids = list(dict.fromkeys(book_ids))
+    books = {book.pk: book for book in Book.objects.filter(pk__in=book_ids)} if book_ids else {}
+    selected = [books[book_id] for book_id in book_ids if book_id in books]
+    problems = [f"Book with ID {book_id} not found" for book_id in book_ids if book_id not in books]
+    if all_unparsed:
+        selected += (
+            Book.objects.filter(is_parsed=False, is_active=True)
+            .exclude(pk__in=books)
+            .order_by("pk")
+        )
+
+    resumable = set()
+    if resume:
+        resumable = set(
+            ParseCheckpoint.objects.filter(book__in=selected)
+            .exclude(next_url=None)
+            .values_list("book_id", flat=True)
+        )
+    result = []
+    for book in selected:
+        if book.is_parsed and not force and book.pk not in resumable:
+            problems.append(
+                f'Book "{book.title}" (ID {book.pk}) already parsed, use --force to reparse'
+            )
+        elif not book.source_url and book.pk not in resumable:
+            problems.append(f'Book "{book.title}" (ID {book.pk}) has no source_url')
+        else:
+            result.append(book)
+    return result, problems
@@ -0,0 +1,90 @@
+"""
+Бенчмарк пулу браузерів на локальному сайті з JavaScript (manage.py bench browser_pool).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.browser import SELENIUM_AVAILABLE, BrowserPool
+from core.fake_egw import FakeEGWSite
+from core.models import Book
+from core.parsers import EGWBookParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Parse a fake book whose text is inserted by JavaScript with a pool of 1 and of "
+        "--browsers headless Chrome browsers and compare timings (tests/test_browser_pool.py "
+        "checks the texts, blocked assets and browser shutdown). Skipped when Selenium or "
+        "Chrome is not available. All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=30,
+            help="Pages in the fake book (default: 30)"
+        )
+        parser.add_argument(
+            "--render-delay",
+            type=float,
+            default=0.3,
+            help="Seconds before the page script inserts the text (default: 0.3)"
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.05,
+            help="Fixture site response latency in seconds (default: 0.05)"
+        )
+        parser.add_argument(
+            "--browsers",
+            type=int,
+            default=4,
+            help="Browsers of the parallel run (default: 4)"
+        )
+
+    def handle(self, *args, **options):
+        if not SELENIUM_AVAILABLE:
+            self.stdout.write(self.style.WARNING("Selenium is not installed, skipped"))
+            return
+
+        def log_error(msg: str):
+            self.stdout.write(self.style.ERROR(f"ERROR: {msg}"))
+
+        site = FakeEGWSite(pages=options["pages"], latency=options["latency"], assets=True,
+                           render_delay=options["render_delay"])
+        with site, transaction.atomic():
+            for size in sorted({1, max(1, options["browsers"])}):
+                pool = BrowserPool(size=size, error_logger=log_error)
+                try:
+                    pool.start()
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(
+                        f"Chrome is not available, skipped: {type(e).__name__} - {e}"
+                    ))
+                    transaction.set_rollback(True)
+                    return
+                started = time.perf_counter()
+                with pool:
+                    saved = self._parse(site, log_error, pool)
+                elapsed = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"browsers={size:<3} pages={saved:>4}  elapsed={elapsed:7.2f} s  "
+                    f"rate={saved / elapsed:6.1f} pages/s"
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Synthetic data rolled back"))
+
+    @staticmethod
+    def _parse(site: FakeEGWSite, log_error, browser_pool: BrowserPool) -> int:
+        book = Book.objects.create(title="Browser pool benchmark", language="uk")
+        parser = EGWBookParser(book=book, start_url=site.start_url, delay=0, error_logger=log_error,
+                               browser_pool=browser_pool)
+        parser.parse_book(max_pages=site.pages)
+        return book.daily_inspirations.count()
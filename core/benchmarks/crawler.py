@@ -0,0 +1,92 @@
+"""
+Бенчмарк синхронного та асинхронного парсингу книги (manage.py bench crawler).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.crawler import AsyncBookCrawler
+from core.fake_egw import FakeEGWSite
+from core.models import Book
+from core.parsers import DEFAULT_BATCH_SIZE, EGWBookParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Parse a fake book served by a local fixture site with the sync parser and the "
+        "async crawler and compare timings (tests/test_crawler.py checks that the results "
+        "match). "
+        "All data is created inside a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=366,
+            help="Pages in the fake book (default: 366)"
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.05,
+            help="Fixture site response latency in seconds (default: 0.05)"
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.0,
+            help="Delay between requests of the sync parser (default: 0)"
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=0,
+            help="Async crawler requests per second per host, 0 - unlimited (default: 0)"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Async crawler parallel requests per host (default: 4)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Parsed days written to the database at once (default: {DEFAULT_BATCH_SIZE})"
+        )
+
+    def handle(self, *args, **options):
+        def log_error(msg: str):
+            self.stdout.write(self.style.ERROR(f"ERROR: {msg}"))
+
+        site = FakeEGWSite(pages=options["pages"], latency=options["latency"])
+        with site, transaction.atomic():
+            for engine in ("sync", "async"):
+                book = Book.objects.create(title=f"Benchmark book ({engine})", language="uk")
+                parser = EGWBookParser(book=book, start_url=site.start_url, delay=options["delay"],
+                                       error_logger=log_error, batch_size=options["batch_size"])
+                started = time.perf_counter()
+                if engine == "async":
+                    crawler = AsyncBookCrawler(
+                        parser, concurrency=options["concurrency"], rate=options["rate"]
+                    )
+                    stats = crawler.run(max_pages=options["pages"])
+                else:
+                    stats = parser.parse_book(max_pages=options["pages"])
+                elapsed = time.perf_counter() - started
+
+                parse_ms = stats["parse_time"] * 1000 / max(stats["pages_timed"], 1)
+                self.stdout.write(
+                    f"{engine:<6} pages={stats['total_pages']:>4}  parsed={stats['parsed']:>4}  "
+                    f"errors={stats['errors']:>3}  elapsed={elapsed:7.2f} s  "
+                    f"rate={stats['total_pages'] / elapsed:7.1f} pages/s  "
+                    f"db={stats['db_time']:6.2f} s/{stats['db_writes']} writes  "
+                    f"parse={parse_ms:5.2f} ms/page"
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished, synthetic data rolled back"))
@@ -0,0 +1,80 @@
+"""
+Бенчмарк HTML парсерів на збережених сторінках egwwritings (manage.py bench html_backends).
+"""
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.fake_egw import saved_pages
+from core.html_backend import available_backends, default_backend
+from core.models import Book
+from core.page_cache import PageCache
+from core.parsers import EGWBookParser
+
+REFERENCE_BACKEND = "html.parser"
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract date, next link and text from the converter fixtures wrapped into full pages "
+        "with every installed HTML backend and compare speed (tests/test_html_backends.py "
+        "checks that the results match html.parser)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages",
+            type=str,
+            help="Directory with saved *.html pages (default: converter fixtures as full pages)"
+        )
+        parser.add_argument(
+            "--cache-dir",
+            type=str,
+            help="Use pages of a book recorded with parse_book --cache-dir instead of --pages"
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Passes over the whole corpus per backend (default: 20)"
+        )
+
+    def handle(self, *args, **options):
+        if options.get("cache_dir"):
+            corpus = list(PageCache(options["cache_dir"]).items())
+            if not corpus:
+                raise CommandError(f"Page cache {options['cache_dir']} is empty")
+        else:
+            if options.get("pages"):
+                pages = [
+                    (page.stem, page.read_text(encoding="utf-8"))
+                    for page in sorted(Path(options["pages"]).glob("*.html"))
+                ]
+                if not pages:
+                    raise CommandError(f"No *.html pages in {options['pages']}")
+            else:
+                pages = saved_pages()
+            corpus = [(f"https://egwwritings.org/read/{name}#22", raw) for name, raw in pages]
+
+        parsers = {
+            backend: EGWBookParser(book=Book(title="Benchmark"), start_url=corpus[0][0],
+                                   html_backend=backend)
+            for backend in available_backends()
+        }
+
+        self.stdout.write(f"pages={len(corpus)}  default backend={default_backend()}")
+        timings = {}
+        for backend, parser in parsers.items():
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                for url, raw in corpus:
+                    html_content, _, _ = parser.process_page(raw, url)
+                    parser._extract_text_from_html(html_content)
+            elapsed = time.perf_counter() - started
+            timings[backend] = elapsed * 1000 / (options["repeat"] * len(corpus))
+
+        for backend, ms in timings.items():
+            self.stdout.write(
+                f"{backend:<12} {ms:7.3f} ms/page  speedup={timings[REFERENCE_BACKEND] / ms:5.1f}x"
+            )
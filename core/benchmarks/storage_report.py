@@ -0,0 +1,175 @@
+"""
+Звіт про розмір таблиці днів і швидкість запитів до неї (manage.py bench storage_report).
+"""
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bot.inspirations import RANDOM_DAY_FIELDS
+from core.models import DailyInspiration, DailyInspirationManager
+
+
+def _columns(field_names) -> list:
+    """Columns of DailyInspiration fields (lookups through book are skipped)."""
+    return [
+        DailyInspiration._meta.get_field(name).column for name in field_names if "__" not in name
+    ]
+
+
+# Запити, які вимірюються: назва -> стовпці, що вибираються за id
+QUERIES = {
+    "random day": _columns(RANDOM_DAY_FIELDS),
+    "default": [
+        field.column for field in DailyInspiration._meta.concrete_fields
+        if field.name not in DailyInspirationManager.deferred_fields
+    ],
+    "full row": [field.column for field in DailyInspiration._meta.concrete_fields],
+}
+MEASURED_COLUMNS = (
+    "html_content", "telegram_html", "original_text",
+    "translation_ukrainian", "translation_russian", "translation_english",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Report DailyInspiration table size, bytes stored per large column and latency of "
+        "loading one day with the random day, default and full row column sets. Save the "
+        "report before a migration with --save and compare after it with --compare. Works "
+        "with the table before and after compression: columns are read with raw SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=200,
+            help="Days loaded per query (default: 200)"
+        )
+        parser.add_argument(
+            "--save",
+            type=str,
+            help="Write the report as JSON to this file"
+        )
+        parser.add_argument(
+            "--compare",
+            type=str,
+            help="JSON report saved earlier to compare with"
+        )
+
+    def handle(self, *args, **options):
+        table = DailyInspiration._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id FROM {table}")
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            raise CommandError("No daily inspirations in the database")
+
+        report = {
+            "vendor": connection.vendor,
+            "rows": len(ids),
+            "table_bytes": self._table_bytes(table),
+            "columns": self._column_bytes(table),
+            "queries": {
+                name: self._measure(table, columns, ids, options["repeat"])
+                for name, columns in QUERIES.items()
+            },
+        }
+
+        before = None
+        if options.get("compare"):
+            with open(options["compare"], encoding="utf-8") as saved:
+                before = json.load(saved)
+        self._print(report, before)
+
+        if options.get("save"):
+            with open(options["save"], "w", encoding="utf-8") as saved:
+                json.dump(report, saved, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report saved to {options['save']}"))
+
+    def _table_bytes(self, table: str):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Разом з TOAST та індексами
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+                return cursor.fetchone()[0]
+            if connection.vendor == "sqlite":
+                try:
+                    cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [table])
+                    return cursor.fetchone()[0]
+                except Exception:
+                    # SQLite зібраний без dbstat
+                    return None
+        return None
+
+    def _column_bytes(self, table: str) -> dict:
+        # pg_column_size - розмір після вбудованого стиснення TOAST, тобто реально збережений
+        size = "pg_column_size" if connection.vendor == "postgresql" else "LENGTH"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT "
+                + ", ".join(f"COALESCE(SUM({size}({column})), 0)" for column in MEASURED_COLUMNS)
+                + f" FROM {table}"
+            )
+            return dict(zip(MEASURED_COLUMNS, cursor.fetchone()))
+
+    def _measure(self, table: str, columns: list, ids: list, repeat: int) -> dict:
+        sql = f"SELECT {', '.join(columns)} FROM {table} WHERE id = %s"
+        sample = [random.choice(ids) for _ in range(repeat)]
+        timings = []
+        transferred = 0
+        with connection.cursor() as cursor:
+            for inspiration_id in sample:
+                started = time.perf_counter()
+                cursor.execute(sql, [inspiration_id])
+                row = cursor.fetchone()
+                timings.append((time.perf_counter() - started) * 1000)
+                transferred += sum(
+                    len(value) for value in row if isinstance(value, (str, bytes, memoryview))
+                )
+        return {
+            "median_ms": statistics.median(timings),
+            "p95_ms": (
+                sorted(timings)[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+            ),
+            "bytes_per_row": transferred / len(sample),
+        }
+
+    def _print(self, report: dict, before=None):
+        def change(old, new):
+            if not before or old is None or new is None:
+                return ""
+            if not old:
+                return f"  (before {old:>12,.0f})"
+            return f"  (before {old:>12,.0f}, {new / old - 1:+.0%})"
+
+        previous = before or {"columns": {}, "queries": {}}
+        self.stdout.write(f"rows={report['rows']}  database={report['vendor']}")
+        table_bytes = report["table_bytes"]
+        if table_bytes is None:
+            self.stdout.write(f"{'table':<22}{'n/a':>12}")
+        else:
+            self.stdout.write(
+                f"{'table':<22}{table_bytes:>12,} bytes"
+                + change(previous.get("table_bytes"), table_bytes)
+            )
+        for column, size in report["columns"].items():
+            self.stdout.write(
+                f"{column:<22}{size:>12,} bytes" + change(previous["columns"].get(column), size)
+            )
+        for name, result in report["queries"].items():
+            old = previous["queries"].get(name, {})
+            self.stdout.write(
+                f"{name:<12}  median={result['median_ms']:7.3f} ms  "
+                f"p95={result['p95_ms']:7.3f} ms  "
+                f"row={result['bytes_per_row']:>10,.0f} bytes"
+                + (
+                    f"  (before median={old['median_ms']:7.3f} ms, "
+                    f"row={old['bytes_per_row']:>10,.0f} bytes)"
+                    if old else ""
+                )
+            )
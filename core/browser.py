@@ -0,0 +1,275 @@
+"""
+Pool of headless Chrome drivers for books rendered with JavaScript.
+
+Starting Chrome takes longer than loading a page, so drivers are started once and
+reused for every page; with several drivers, pages that are likely to come next are
+rendered ahead of time in parallel tabs. A page is taken as soon as the content
+container appears instead of after a fixed sleep, images, fonts and stylesheets are
+not downloaded at all, and close() (or leaving the `with` block) quits every driver.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+try:
+    from selenium import webdriver
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+CHROME_ARGUMENTS = (
+    "--headless=new",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--window-size=1920,1080",
+)
+# Ресурси, які для тексту сторінки не потрібні; блокуються через DevTools (Network.setBlockedURLs)
+BLOCKED_EXTENSIONS = (
+    "css", "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico",
+    "woff", "woff2", "ttf", "otf", "eot", "mp4", "webm", "mp3",
+)
+BLOCKED_URL_PATTERNS = tuple(
+    pattern
+    for extension in BLOCKED_EXTENSIONS
+    for pattern in (f"*.{extension}", f"*.{extension}?*")
+)
+# Скільки вгаданих сторінок на один браузер тримати, доки їх не запитали
+PREFETCH_PER_BROWSER = 2
+
+
+class PageAbandonedError(Exception):
+    """Page load stopped because nobody needs the page any more (wrong guess or pool closing)."""
+
+
+class BrowserPool:
+    """
+    `size` reusable headless Chrome drivers.
+
+    Use as a context manager (or call start() and close()). fetch() is safe to call
+    from several threads; each call takes a free driver for the time of one page.
+    """
+
+    def __init__(self, size: int = 1, ready_timeout: float = 10.0, load_timeout: float = 30.0,
+                 block_resources: bool = True, user_agent: str = USER_AGENT,
+                 error_logger: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            size: Number of browsers (1 - pages are loaded one by one, no prefetch)
+            ready_timeout: Seconds to wait for the content container after the document loaded
+            load_timeout: Seconds to wait for the document itself
+            block_resources: Do not download images, fonts and stylesheets
+            user_agent: User-Agent header of every browser
+            error_logger: Optional callback function for logging errors (takes error message string)
+        """
+        self.size = max(1, size)
+        self.ready_timeout = ready_timeout
+        self.load_timeout = load_timeout
+        self.block_resources = block_resources
+        self.user_agent = user_agent
+        self.error_logger = error_logger or (lambda msg: logger.error(msg))
+        self._drivers = []
+        self._idle = queue.Queue()
+        # url -> (Future з HTML сторінки, Event "більше не потрібна"), від найстаршої
+        self._prefetched = {}
+        self._closing = threading.Event()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> "BrowserPool":
+        """Start all browsers in parallel; if one fails, quit the started ones and raise."""
+        if not SELENIUM_AVAILABLE:
+            raise RuntimeError("Selenium is not available. Install selenium and webdriver-manager.")
+        if self._drivers:
+            return self
+        self._closing.clear()
+        with ThreadPoolExecutor(max_workers=self.size) as starter:
+            futures = [starter.submit(self._create_driver) for _ in range(self.size)]
+        errors = []
+        for future in futures:
+            try:
+                driver = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            self._drivers.append(driver)
+            self._idle.put(driver)
+        if errors:
+            self.close()
+            raise errors[0]
+        if self.size > 1:
+            # Один браузер завжди лишається для сторінки, яку чекають зараз
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.size - 1, thread_name_prefix="browser-prefetch"
+            )
+        return self
+
+    def close(self):
+        """Drop prefetched pages and quit every browser. Call after all fetches returned."""
+        # Завантаження, що ще чекають на контейнер, перериваються,
+        # щоб не тримати закриття до таймауту
+        self._closing.set()
+        with self._lock:
+            prefetched, self._prefetched = list(self._prefetched.values()), {}
+        for future, abandoned in prefetched:
+            abandoned.set()
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        drivers, self._drivers = self._drivers, []
+        self._idle = queue.Queue()
+        for driver in drivers:
+            self._quit(driver)
+
+    def __enter__(self) -> "BrowserPool":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def fetch(self, url: str, ready_selector: str = "body") -> str:
+        """
+        Rendered HTML of the page.
+
+        Waits until an element matching ready_selector (CSS) exists; a page that has
+        none is returned once its document has loaded and ready_timeout passed.
+        Raises TimeoutException or WebDriverException.
+        """
+        with self._lock:
+            future, _ = self._prefetched.pop(url, (None, None))
+        if future is not None:
+            try:
+                return future.result()
+            except Exception:
+                # Завантажуємо ще раз: про помилку повідомить звичайне завантаження
+                pass
+        return self._load_with_free_driver(url, ready_selector, self._closing)
+
+    def prefetch(self, urls: Iterable[str], ready_selector: str = "body"):
+        """Start rendering pages in the other browsers; fetch() of such a URL waits for it."""
+        if self._executor is None:
+            return
+        with self._lock:
+            for url in urls:
+                if url not in self._prefetched:
+                    abandoned = threading.Event()
+                    future = self._executor.submit(
+                        self._load_with_free_driver, url, ready_selector, abandoned
+                    )
+                    self._prefetched[url] = (future, abandoned)
+            # Невгадані сторінки ніхто не запитає: найстаріші скасовуємо
+            while len(self._prefetched) > PREFETCH_PER_BROWSER * self.size:
+                future, abandoned = self._prefetched.pop(next(iter(self._prefetched)))
+                abandoned.set()
+                future.cancel()
+
+    @contextmanager
+    def driver(self):
+        """Take a free browser for the duration of the block."""
+        if not self._drivers:
+            raise RuntimeError("Browser pool is not started")
+        driver = self._idle.get()
+        try:
+            yield driver
+        except WebDriverException as e:
+            if not isinstance(e, TimeoutException):
+                driver = self._replace_if_dead(driver)
+            raise
+        finally:
+            self._idle.put(driver)
+
+    def load(self, driver, url: str, ready_selector: str = "body",
+             abandoned: Optional[threading.Event] = None) -> str:
+        """Open url in driver and wait for ready_selector; stops waiting once `abandoned` is set."""
+        driver.get(url)
+
+        def ready(d):
+            if abandoned is not None and (abandoned.is_set() or self._closing.is_set()):
+                raise PageAbandonedError(url)
+            return d.find_elements(By.CSS_SELECTOR, ready_selector)
+
+        try:
+            WebDriverWait(driver, self.ready_timeout, poll_frequency=0.05).until(ready)
+        except TimeoutException:
+            # Сторінку без контейнера парсер розбирає з body,
+            # тож віддаємо її, якщо документ завантажився
+            if driver.execute_script("return document.readyState") != "complete":
+                raise
+        return driver.page_source
+
+    def _load_with_free_driver(
+        self, url: str, ready_selector: str, abandoned: threading.Event
+    ) -> str:
+        if abandoned.is_set():
+            raise PageAbandonedError(url)
+        with self.driver() as driver:
+            return self.load(driver, url, ready_selector, abandoned)
+
+    def _create_driver(self):
+        chrome_options = Options()
+        for argument in CHROME_ARGUMENTS:
+            chrome_options.add_argument(argument)
+        chrome_options.add_argument(f"user-agent={self.user_agent}")
+        # Не чекаємо на ресурси сторінки: готовність визначає контейнер контенту
+        chrome_options.page_load_strategy = "eager"
+        if self.block_resources:
+            chrome_options.add_experimental_option(
+                "prefs", {"profile.managed_default_content_settings.images": 2}
+            )
+
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver = webdriver.Chrome(
+                service=Service(ChromeDriverManager().install()), options=chrome_options
+            )
+        except ImportError:
+            driver = webdriver.Chrome(options=chrome_options)
+
+        try:
+            driver.set_page_load_timeout(self.load_timeout)
+            if self.block_resources:
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd(
+                    "Network.setBlockedURLs", {"urls": list(BLOCKED_URL_PATTERNS)}
+                )
+        except Exception:
+            self._quit(driver)
+            raise
+        return driver
+
+    def _replace_if_dead(self, driver):
+        """Driver after a WebDriver error: the same one if Chrome still answers, else a new one."""
+        try:
+            driver.execute_script("return 1")
+            return driver
+        except WebDriverException:
+            pass
+        self._quit(driver)
+        try:
+            replacement = self._create_driver()
+        except Exception as e:
+            self.error_logger(f"Could not restart browser: {type(e).__name__} - {str(e)}")
+            # Лишаємо мертвий драйвер у пулі: його сторінки завершаться помилкою, а не зависанням
+            return driver
+        with self._lock:
+            self._drivers = [replacement if d is driver else d for d in self._drivers]
+        return replacement
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            self.error_logger(f"Could not quit browser: {type(e).__name__} - {str(e)}")
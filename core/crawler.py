@@ -0,0 +1,311 @@
+"""
+Asynchronous crawl engine for EGWBookParser.
+
+Pages of a book form a chain (next URL is known only from the previous page), so
+the engine keeps the chain moving: the next page is requested as soon as its link
+is found, while text extraction and database writes of earlier pages run in
+parallel. When next links just increment a number in the URL, the following pages
+are downloaded ahead of time; a wrong guess is dropped and the real link is fetched.
+Requests go through one pooled HTTP session and a per-host limiter instead of a
+fixed sleep between pages.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urldefrag, urlsplit
+
+import aiohttp
+
+from core.extractors import predict_following
+from core.parsers import NOT_MODIFIED, EGWBookParser
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+# Скільки останніх документів тримати: сторінки, що відрізняються лише #якорем,
+# не завантажуємо повторно
+DOCUMENT_CACHE_SIZE = 4
+# Як часто перевіряти, чи звільнився слот ліміту хоста (секунди)
+SLOT_POLL_INTERVAL = 0.005
+# Як часто споживач перевіряє, чи живий потік завантаження (секунди)
+PRODUCER_POLL_INTERVAL = 1.0
+# Скільки чекати на зупинку потоку завантаження після завершення обходу (секунди)
+PRODUCER_STOP_TIMEOUT = 60.0
+
+
+class HostLimiter:
+    """
+    At most `concurrency` requests in flight and `rate` requests per second to one host.
+
+    Thread-safe and not bound to an event loop, so crawlers of several books running
+    in their own threads share one limit per host.
+    """
+
+    def __init__(self, concurrency: int, rate: float):
+        self._semaphore = threading.BoundedSemaphore(max(1, concurrency))
+        self._interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def slot(self):
+        # Семафор потоковий: чекаємо опитуванням, щоб скасована задача не забрала дозвіл
+        while not self._semaphore.acquire(blocking=False):
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+        try:
+            wait = self._reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield
+        finally:
+            self._semaphore.release()
+
+    def _reserve(self) -> float:
+        """Seconds to wait for the next free request slot (taken by this call)."""
+        if not self._interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        return wait
+
+
+class HostLimiters:
+    """HostLimiter per host; share one instance between crawlers hitting the same site."""
+
+    def __init__(self, concurrency: int = 4, rate: float = 1.0):
+        self.concurrency = concurrency
+        self.rate = rate
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = HostLimiter(self.concurrency, self.rate)
+            return self._limiters[host]
+
+
+class AsyncBookCrawler:
+    """
+    Crawl a book with EGWBookParser extraction logic on asyncio.
+
+    Results and stats are the same as EGWBookParser.parse_book; `prefetch` bounds how
+    many parsed pages may wait for their database write and how many guessed pages
+    are downloaded ahead.
+    """
+
+    def __init__(self, parser: EGWBookParser, concurrency: int = 4, rate: float = 1.0,
+                 prefetch: int = 8, workers: int = 4, limiters: Optional[HostLimiters] = None):
+        if parser.use_selenium:
+            raise ValueError("Async crawler does not support Selenium pages")
+        self.parser = parser
+        self.prefetch = prefetch
+        self.workers = workers
+        self.limiters = limiters or HostLimiters(concurrency, rate)
+        self._documents = {}
+        self._speculative = {}
+
+    def run(self, max_pages: int = 400, timeout: Optional[float] = None) -> dict:
+        """
+        Crawl the book; returns stats like EGWBookParser.parse_book.
+
+        The event loop runs in a background thread; database writes stay in the calling
+        thread, so they take part in its transaction. With `timeout` (seconds) the crawl
+        stops and raises TimeoutError when the book is not finished in time; days parsed
+        so far are written.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        stats = self.parser.new_stats()
+        self.parser.start_crawl(stats)
+        completed = False
+        pages = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        errors = []
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        producer = threading.Thread(
+            target=self._run_producer,
+            args=(pages, stop, executor, max_pages, errors),
+            daemon=True,
+        )
+        producer.start()
+        try:
+            while True:
+                try:
+                    item = pages.get(timeout=PRODUCER_POLL_INTERVAL)
+                except queue.Empty:
+                    item = False
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"Book not finished in {timeout:.0f} s")
+                if item is False:
+                    # Потік завершився, не залишивши навіть маркера кінця
+                    if producer.is_alive() or not pages.empty():
+                        continue
+                    break
+                if item is None:
+                    break
+                url, page = item
+                if page is None:
+                    self.parser.record_failure(url, stats)
+                    break
+                if page == NOT_MODIFIED:
+                    finished, next_url = self.parser.record_unchanged(url, stats)
+                else:
+                    html_content, date_str, text, next_url = page
+                    finished = self.parser.record_page(
+                        url, html_content, date_str, stats, text.result(), next_url=next_url
+                    )
+                if finished:
+                    completed = True
+                    break
+                if not next_url:
+                    self.parser.error_logger(f"No next URL found after parsing: {url}")
+                    completed = True
+                    break
+        finally:
+            stop.set()
+            # Завислий потік (демон) покидаємо, а не чекаємо вічно
+            give_up = time.monotonic() + PRODUCER_STOP_TIMEOUT
+            while producer.is_alive() and time.monotonic() < give_up:
+                try:
+                    pages.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.parser.flush(stats)
+
+        if errors:
+            raise errors[0]
+        self.parser.finish(stats, completed)
+        return stats
+
+    def _run_producer(self, pages: queue.Queue, stop: threading.Event, executor, max_pages: int,
+                      errors: list):
+        """Producer thread body: always ends the queue and keeps the error for run()."""
+        try:
+            asyncio.run(self._produce(pages, stop, executor, max_pages))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            while not stop.is_set():
+                try:
+                    pages.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    async def _produce(self, pages: queue.Queue, stop: threading.Event, executor, max_pages: int):
+        loop = asyncio.get_running_loop()
+        connector = aiohttp.TCPConnector(
+            limit_per_host=self.limiters.concurrency, ttl_dns_cache=300
+        )
+        async with aiohttp.ClientSession(
+            connector=connector,
+            headers={'User-Agent': USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as session:
+            url = self.parser.start_url
+            count = 0
+            while url and count < max_pages and not stop.is_set():
+                raw = await self.fetch(session, url)
+                page = next_url = None
+                if raw == NOT_MODIFIED:
+                    page, next_url = NOT_MODIFIED, self.parser.known_pages[url].next_url
+                elif raw is not None:
+                    html_content, date_str, next_url = await loop.run_in_executor(
+                        executor, self.parser.process_page, raw, url
+                    )
+                    if html_content:
+                        text = executor.submit(self.parser._extract_text_from_html, html_content)
+                        page = (html_content, date_str, text, next_url)
+                if page is not None and next_url:
+                    self.speculate(session, url, next_url)
+                if not await self._put(pages, stop, (url, page)) or page is None or not next_url:
+                    break
+                url = next_url
+                count += 1
+            tasks = [task for _, task in self._speculative.values()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._speculative.clear()
+
+    @staticmethod
+    async def _put(pages: queue.Queue, stop: threading.Event, item) -> bool:
+        """Hand page to the writer thread without blocking the event loop."""
+        while not stop.is_set():
+            try:
+                pages.put_nowait(item)
+                return True
+            except queue.Full:
+                await asyncio.sleep(0.01)
+        return False
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        """Download page (None on error, already logged; NOT_MODIFIED on 304)."""
+        if self.parser.offline:
+            return self.parser.read_cached_page(url)
+        document_url, _ = urldefrag(url)
+        if document_url in self._documents:
+            return self._documents[document_url]
+
+        raw = None
+        speculative_url, speculative = self._speculative.pop(document_url, (None, None))
+        if speculative is not None:
+            raw = await speculative
+            # 304 стосується лише тієї сторінки, для якої надіслано валідатори
+            if raw == NOT_MODIFIED and speculative_url != url:
+                raw = None
+        if raw is None:
+            raw = await self._download(session, document_url, url, log_errors=True)
+            if raw is None:
+                return None
+        if raw == NOT_MODIFIED:
+            return raw
+
+        self._documents[document_url] = raw
+        while len(self._documents) > DOCUMENT_CACHE_SIZE:
+            self._documents.pop(next(iter(self._documents)))
+        return raw
+
+    def speculate(self, session: aiohttp.ClientSession, url: str, next_url: str):
+        """Start downloading pages that are likely to follow next_url."""
+        if self.parser.offline:
+            return
+        for predicted in predict_following(url, next_url, self.prefetch):
+            document_url, _ = urldefrag(predicted)
+            if document_url not in self._speculative and document_url not in self._documents:
+                self._speculative[document_url] = (predicted, asyncio.create_task(
+                    self._download(session, document_url, predicted, log_errors=False)
+                ))
+
+    async def _download(
+        self, session, document_url: str, url: str, log_errors: bool
+    ) -> Optional[str]:
+        async with self.limiters.for_url(url).slot():
+            try:
+                async with session.get(
+                    document_url, headers=self.parser.conditional_headers(url)
+                ) as response:
+                    if response.status == 304:
+                        return NOT_MODIFIED
+                    response.raise_for_status()
+                    # Як і requests: некоректні байти замінюються, а не обривають обхід книги
+                    raw = await response.text(encoding='utf-8', errors='replace')
+                    self.parser.remember_validators(url, response.headers)
+                    self.parser.cache_page(url, raw, response.headers)
+                    return raw
+            except asyncio.TimeoutError as e:
+                error = f"Request timeout for URL {url}: {str(e)}"
+            except aiohttp.ClientResponseError as e:
+                error = f"HTTP error for URL {url}: Status {e.status} - {str(e)}"
+            except aiohttp.ClientError as e:
+                error = f"Request error for URL {url}: {type(e).__name__} - {str(e)}"
+        if log_errors:
+            self.parser.error_logger(error)
+        return None
+
@@ -0,0 +1,211 @@
+"""
+Precompiled extractors of the reading date and the next page link.
+
+Both keep the priorities of the original per-pattern / per-text search, but work in
+one pass: one combined month regex over the date text and one pass over the page's
+<a> elements that ranks next-link candidates. predict_following() guesses the pages
+after a next link for downloading them ahead of time.
+"""
+import re
+from datetime import date, datetime
+from typing import Optional
+from urllib.parse import urljoin
+
+from core.html_backend import HtmlNode
+
+MONTHS_UK = ['січня', 'лютого', 'березня', 'квітня', 'травня', 'червня',
+             'липня', 'серпня', 'вересня', 'жовтня', 'листопада', 'грудня']
+MONTHS_RU = ['января', 'февраля', 'марта', 'апреля', 'мая', 'июня',
+             'июля', 'августа', 'сентября', 'октября', 'ноября', 'декабря']
+MONTHS_EN = ['January', 'February', 'March', 'April', 'May', 'June',
+             'July', 'August', 'September', 'October', 'November', 'December']
+MONTHS_EN_SHORT = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                   'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Групи регулярного виразу в порядку пріоритету: спершу шукається українська дата,
+# потім російська, ...
+_DATE_KINDS = (
+    ("uk", MONTHS_UK),
+    ("ru", MONTHS_RU),
+    ("en", MONTHS_EN),
+    ("en_short", MONTHS_EN_SHORT),
+)
+_MONTH_NUMBERS = {
+    kind: {name.lower(): number for number, name in enumerate(names, 1)}
+    for kind, names in _DATE_KINDS
+}
+# Lookahead дає збіг на кожній позиції, тож перекриття між мовами не губляться
+DATE_PATTERN = re.compile(
+    "(?=(?:"
+    rf"(?P<uk>(?P<uk_day>\d{{1,2}})\s+(?P<uk_month>{'|'.join(MONTHS_UK)}))"
+    rf"|(?P<ru>(?P<ru_day>\d{{1,2}})\s+(?P<ru_month>{'|'.join(MONTHS_RU)}))"
+    rf"|(?P<en>(?P<en_month>{'|'.join(MONTHS_EN)})\s+(?P<en_day>\d{{1,2}}))"
+    rf"|(?P<en_short>(?P<en_short_month>{'|'.join(MONTHS_EN_SHORT)})\.?\s+(?P<en_short_day>\d{{1,2}}))"
+    "))",
+    re.IGNORECASE,
+)
+
+NEXT_TEXTS = ('next', 'наступна', 'следующая', 'далі', 'далее', '→', '>', 'наступний', 'следующий')
+NEXT_CLASSES = ('next', 'next-page', 'next-link', 'pagination-next', 'btn-next')
+# Швидка перевірка, чи варто перебирати тексти окремо
+_ANY_NEXT_TEXT = re.compile('|'.join(re.escape(text) for text in NEXT_TEXTS), re.IGNORECASE)
+_FRAGMENT_NUMBER = re.compile(r'#(\d+)$')
+_NUMBER = re.compile(r"(\d+)")
+
+# Ранги кандидатів: (група, номер тексту/класу, спосіб); менший - кращий
+_EXACT, _CONTAINS, _TITLE, _ARIA_LABEL = range(4)
+_BY_TEXT, _BY_CLASS = range(2)
+
+
+def date_text(content: HtmlNode) -> str:
+    """Text the date is looked for in: headers and the first paragraph, or the whole content."""
+    text_to_search = [header.text() for header in content.find_all('h1, h2, h3, h4')]
+    first_p = content.find('p')
+    if first_p:
+        text_to_search.append(first_p.text())
+    if not text_to_search:
+        text_to_search = [content.text()]
+    return ' '.join(text_to_search)
+
+
+def extract_date(text: str, year: Optional[int] = None) -> Optional[str]:
+    """
+    First valid "1 січня" / "1 января" / "January 1" / "Jan. 1" date in text as YYYY-MM-DD.
+
+    Ukrainian dates win over Russian ones, Russian over English, whatever their position.
+    """
+    year = year or datetime.now().year
+    candidates = {kind: [] for kind, _ in _DATE_KINDS}
+    for match in DATE_PATTERN.finditer(text):
+        for kind, _ in _DATE_KINDS:
+            if match.group(kind) is not None:
+                break
+        candidates[kind].append((match.start(kind), match.end(kind), match.group(f"{kind}_day"),
+                                 match.group(f"{kind}_month")))
+
+    for kind, _ in _DATE_KINDS:
+        # Як finditer окремого шаблону: збіги однієї мови не перекриваються
+        last_end = 0
+        for start, end, day, month in candidates[kind]:
+            if start < last_end:
+                continue
+            last_end = end
+            try:
+                found = date(year, _MONTH_NUMBERS[kind][month.lower()], int(day))
+            except ValueError:
+                continue
+            return found.strftime('%Y-%m-%d')
+    return None
+
+
+def find_next_link(soup: HtmlNode, current_url: str) -> Optional[str]:
+    """
+    Link to the next page.
+
+    Priority: link text equal to / containing one of NEXT_TEXTS (in their order), then
+    title and aria-label, then a "next"-like class, then links in page navigation, then
+    a "#N+1" link after a "#N" page.
+    """
+    best_rank = None
+    best_url = None
+    first_by_key = set()
+    anchors = []
+
+    for position, link in enumerate(soup.find_all('a')):
+        attributes = link.attributes()
+        href = attributes.get('href')
+        anchors.append(href)
+        ranks = []
+
+        string = link.string()
+        if string is not None and _ANY_NEXT_TEXT.search(string):
+            lowered = string.lower()
+            for index, text in enumerate(NEXT_TEXTS):
+                if lowered == text or lowered == text + "\n":
+                    ranks.append((_BY_TEXT, index, _EXACT))
+                if text in lowered:
+                    ranks.append((_BY_TEXT, index, _CONTAINS))
+
+        # Для title, aria-label та класу береться лише перше відповідне посилання
+        for attribute, kind in (('title', _TITLE), ('aria-label', _ARIA_LABEL)):
+            value = attributes.get(attribute)
+            if value is not None and _ANY_NEXT_TEXT.search(value):
+                lowered = value.lower()
+                for index, text in enumerate(NEXT_TEXTS):
+                    if text in lowered and (_BY_TEXT, index, kind) not in first_by_key:
+                        first_by_key.add((_BY_TEXT, index, kind))
+                        ranks.append((_BY_TEXT, index, kind))
+        classes = attributes.get('class')
+        # Усі NEXT_CLASSES містять "next"
+        if classes is not None and 'next' in classes.lower():
+            tokens = classes.lower().split()
+            for index, class_name in enumerate(NEXT_CLASSES):
+                if (
+                    any(class_name in token for token in tokens)
+                    and (_BY_CLASS, index, 0) not in first_by_key
+                ):
+                    first_by_key.add((_BY_CLASS, index, 0))
+                    ranks.append((_BY_CLASS, index, 0))
+
+        if not ranks or not href:
+            continue
+        next_url = urljoin(current_url, href)
+        if next_url == current_url:
+            continue
+        rank = (min(ranks), position)
+        if best_rank is None or rank < best_rank:
+            best_rank, best_url = rank, next_url
+
+    if best_url:
+        return best_url
+
+    # Шукаємо в навігації
+    nav = soup.find('nav') or soup.find('div.pagination') or soup.find('div.navigation')
+    if nav:
+        for link in nav.find_all('a'):
+            href = link.get('href')
+            if href:
+                link_text = link.text().lower().strip()
+                if any(text in link_text for text in NEXT_TEXTS):
+                    next_url = urljoin(current_url, href)
+                    if next_url != current_url:
+                        return next_url
+
+    # Сторінка "#22" -> посилання "#23"
+    current_match = _FRAGMENT_NUMBER.search(current_url)
+    if current_match:
+        wanted = int(current_match.group(1)) + 1
+        for href in anchors:
+            if href is None:
+                continue
+            match = _FRAGMENT_NUMBER.search(href)
+            if match and int(match.group(1)) == wanted:
+                return urljoin(current_url, href)
+
+    return None
+
+
+def predict_following(url: str, next_url: str, count: int) -> list:
+    """
+    Guess URLs after next_url when the chain increments one number.
+
+    ".../read/7" -> ".../read/8" gives ".../read/9", ".../read/10", ...; "#22" -> "#23"
+    works the same way. Returns [] when links do not follow such a pattern.
+    """
+    current, following = _NUMBER.split(url), _NUMBER.split(next_url)
+    if len(current) != len(following):
+        return []
+    changed = [index for index, (a, b) in enumerate(zip(current, following)) if a != b]
+    # Числа стоять на непарних позиціях результату split з групою
+    if len(changed) != 1 or changed[0] % 2 == 0:
+        return []
+    index = changed[0]
+    step = int(following[index]) - int(current[index])
+    if step <= 0:
+        return []
+    predicted = []
+    for offset in range(1, count + 1):
+        parts = list(following)
+        parts[index] = str(int(following[index]) + step * offset)
+        predicted.append("".join(parts))
+    return predicted
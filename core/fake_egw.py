@@ -0,0 +1,273 @@
+"""
+Local fixture site that serves a fake daily-readings book for crawler benchmarks.
+
+Page N (1-based) is the reading of the N-th day of a leap year, with a Ukrainian
+date header, some text and a "Наступна" link to page N + 1. For browser checks pages
+can also reference a stylesheet, an image and a font (`assets`) and insert their
+content with JavaScript after a delay (`render_delay`).
+
+saved_pages() wraps the converter fixtures of bot/fixtures/converter into the full
+egwwritings page layout (menu, table of contents, navigation, footer) for the HTML
+backend checks.
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+MONTHS_UK = [
+    "січня", "лютого", "березня", "квітня", "травня", "червня",
+    "липня", "серпня", "вересня", "жовтня", "листопада", "грудня",
+]
+FIRST_DAY = date(2024, 1, 1)
+
+CONVERTER_FIXTURES_DIR = Path(__file__).resolve().parents[1] / "bot" / "fixtures" / "converter"
+# Бібліотека, Пошук і назва розділу у змісті книги
+PAGE_LABELS = {
+    "uk": ("Бібліотека", "Пошук", "Розділ"),
+    "ru": ("Библиотека", "Поиск", "Глава"),
+    "en": ("Library", "Search", "Chapter"),
+}
+TOC_ITEMS = 239
+# Посилання на наступну сторінку в різних варіантах розмітки сайту
+PAGE_NAVIGATION = {
+    "en_april_22": (
+        '<div class="reader-footer"><a href="/read/1965.121">Previous</a> | '
+        '<a href="/read/1965.123">Next</a></div>'
+    ),
+    "en_fallback_plain": (
+        '<div class="reader-footer"><a href="/read/1965.3" rel="next">Next day &raquo;</a></div>'
+    ),
+    "en_june_10": (
+        '<nav class="reader-nav">'
+        '<a href="/read/1965.160" class="next-link">Continue reading</a></nav>'
+    ),
+    "ru_march_03": '<nav><a href="/read/1000.31" title="Следующая глава">→</a></nav>',
+    "ru_multi_headers": (
+        '<div class="pager">'
+        '<a class="pagination-next" href="/read/1000.77"><span>›</span></a></div>'
+    ),
+    "ru_october_05": (
+        '<div class="reader-footer"><a href="/read/1000.290"><span>Следующая</span></a></div>'
+    ),
+    "uk_december_31": (
+        '<div class="pagination"><a href="/read/14255.900">Попередня</a> '
+        '<a href="/read/14255.910" class="btn-next">Далі</a></div>'
+    ),
+    "uk_fallback_book_content": (
+        '<div class="navigation"><a href="/read/14255.22#22">22</a> '
+        '<a href="/read/14255.23#23">23</a></div>'
+    ),
+    "uk_february_14": (
+        '<nav class="reader-nav"><a href="/read/14255.120" aria-label="Попередня сторінка">‹</a>'
+        '<a href="/read/14255.140" aria-label="Наступна сторінка">›</a></nav>'
+    ),
+}
+
+
+# Відповіді на /static/... для перевірки блокування ресурсів браузером
+ASSETS = {
+    "/static/site.css": (
+        "text/css",
+        b"@font-face{font-family:Book;src:url(/static/book.woff2)}body{font-family:Book}",
+    ),
+    "/static/logo.png": ("image/png", b"\x89PNG\r\n\x1a\n"),
+    "/static/book.woff2": ("font/woff2", b"wOF2"),
+}
+
+
+def render_page(number: int, pages: int, revision: int = 0, assets: bool = False,
+                render_delay: Optional[float] = None) -> str:
+    day = FIRST_DAY + timedelta(days=number - 1)
+    edited = f" Редакція {revision}." if revision else ""
+    next_link = f'<a href="/read/{number + 1}">Наступна</a>' if number < pages else ""
+    paragraphs = "".join(
+        f'<p class="egw_paragraph"><span class="egw_content">'
+        f'Читання {number}, абзац {index}. '
+        f'Бог є любов, і хто перебуває в любові, той перебуває в Бозі.{edited}'
+        f'</span></p>'
+        for index in range(1, 6)
+    )
+    content = (
+        f'<div class="content"><h2>{day.day} {MONTHS_UK[day.month - 1]}</h2>{paragraphs}</div>'
+        f"<nav>{next_link}</nav>"
+    )
+    if render_delay is not None:
+        # Як у односторінкових застосунках: у HTML лише порожній контейнер, текст вставляє скрипт
+        markup = json.dumps(content, ensure_ascii=False).replace("</", "<\\/")
+        content = (
+            '<div id="app"></div>'
+            "<script>setTimeout(function () { "
+            f"document.getElementById('app').outerHTML = {markup}; }}, "
+            f"{int(render_delay * 1000)});</script>"
+        )
+    head = '<link rel="stylesheet" href="/static/site.css">' if assets else ""
+    logo = '<img src="/static/logo.png" alt="">' if assets else ""
+    return (
+        f"<!DOCTYPE html><html><head><title>Книга</title>{head}</head><body>"
+        f"<header>{logo}<a href=\"/\">Головна</a></header>"
+        f"{content}"
+        "<footer>© fake egwwritings</footer></body></html>"
+    )
+
+
+def render_saved_page(content: str, language: str, navigation: str = "") -> str:
+    """Wrap the reader content into a full egwwritings page as a browser saves it."""
+    library, search, chapter = PAGE_LABELS[language]
+    toc = "".join(
+        f'<li class="toc-item"><a href="/read/14255.{7 * number}" data-id="{number}">'
+        f"{number}. {chapter} {number}</a></li>"
+        for number in range(1, TOC_ITEMS + 1)
+    )
+    return (
+        f'<!DOCTYPE html>\n<html lang="{language}"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        '<title>EGW Writings</title><link rel="stylesheet" href="/static/app.css">'
+        "<style>.reader{max-width:720px}.toc-item{list-style:none}</style>"
+        '<script src="/static/app.js" defer></script></head><body class="reader-page">'
+        '<header class="topbar"><a class="logo" href="/">EGW Writings</a><nav class="menu">'
+        f'<a href="/library">{library}</a> <a href="/search">{search}</a> '
+        '<a href="/about">About</a>'
+        '</nav></header><div class="layout"><aside class="sidebar"><div class="toc">'
+        f'<ul>{toc}</ul></div></aside><section class="reader">{content}{navigation}</section></div>'
+        '<footer class="site-footer"><p>© Ellen G. White Estate, Inc.</p>'
+        '<a href="/privacy">Privacy</a></footer>'
+        '<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}'
+        'gtag("js",new Date());</script></body></html>\n'
+    )
+
+
+def saved_pages(directory: Path = CONVERTER_FIXTURES_DIR) -> list:
+    """(name, html) of every converter fixture wrapped into a full page."""
+    return [
+        (
+            path.stem,
+            render_saved_page(
+                path.read_text(encoding="utf-8"), path.stem[:2], PAGE_NAVIGATION.get(path.stem, "")
+            ),
+        )
+        for path in sorted(directory.glob("*.html"))
+    ]
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Клієнт може скасувати запит (наприклад, непотрібне попереднє завантаження)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeEGWSite:
+    """HTTP server in a background thread; usable by both requests and aiohttp clients."""
+
+    def __init__(
+        self,
+        pages: int = 366,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        validators: bool = True,
+        assets: bool = False,
+        render_delay: Optional[float] = None,
+    ):
+        self.pages = pages
+        self.latency = latency
+        self.assets = assets  # Посилатися на стилі, картинку та шрифт з /static/
+        # Секунди до вставки тексту скриптом; None - текст одразу в HTML
+        self.render_delay = render_delay
+        self.asset_requests = 0
+        self.validators = validators  # Надсилати ETag і відповідати 304
+        self.revisions = {}  # Номер сторінки -> редакція; змініть, щоб імітувати правку на сайті
+        self.failing = set()  # Номери сторінок, що відповідають 503
+        self.invalid_utf8 = set()  # Номери сторінок з байтом, що не є UTF-8
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._server = _QuietServer((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def start_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/read/1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки й тіло йдуть окремими пакетами; без цього keep-alive чекає на delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if self.path in ASSETS:
+                    site.asset_requests += 1
+                    content_type, body = ASSETS[self.path]
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                try:
+                    number = int(self.path.split("?")[0].rstrip("/").rsplit("/", 1)[-1])
+                except ValueError:
+                    number = 0
+                if not 1 <= number <= site.pages:
+                    self.send_error(404)
+                    return
+                if number in site.failing:
+                    self.send_error(503)
+                    return
+                body = render_page(
+                    number, site.pages, site.revisions.get(number, 0), site.assets,
+                    site.render_delay,
+                ).encode("utf-8")
+                if number in site.invalid_utf8:
+                    marker = b'<span class="egw_content">'
+                    body = body.replace(marker, marker + b"\xff", 1)
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if site.validators and self.headers.get("If-None-Match") == etag:
+                    site.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                site.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if site.validators:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
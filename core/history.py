@@ -0,0 +1,108 @@
+"""
+Rolling archive of the delivery ledger.
+
+SentInspiration gets a row per user per day. Only recent rows matter for
+delivery: the already-sent check looks up the inspirations of the users' local
+today, which is never older than a day. archive_sent_history() moves older rows
+into SentInspirationArchive, one row per user, book, month and language with the
+delivered days as a bit mask, so the ledger holds only the retention window.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import SentInspiration, SentInspirationArchive
+
+ARCHIVE_BATCH_SIZE = 5000
+# Ключів в одному OR-фільтрі: SQLite обмежує глибину виразу 1000 рівнями
+ARCHIVE_LOOKUP_CHUNK = 200
+# Нижня межа з запасом: перевірка "вже надіслано" бачить дати лише від учора до завтра
+MIN_RETENTION_DAYS = 3
+
+
+def archive_cutoff(retention_days=None, now=None) -> datetime:
+    """Moment before which deliveries are archived."""
+    if retention_days is None:
+        retention_days = settings.SENT_HISTORY_RETENTION_DAYS
+    if retention_days < MIN_RETENTION_DAYS:
+        raise ValueError(
+            f"Retention must be at least {MIN_RETENTION_DAYS} days, got {retention_days}"
+        )
+    return (now or timezone.now()) - timedelta(days=retention_days)
+
+
+def _locked_archive_entries(keys) -> dict:
+    """Archive rows of the (user, book, month, language) keys, locked for update."""
+    keys = sorted(keys)
+    entries = {}
+    for start in range(0, len(keys), ARCHIVE_LOOKUP_CHUNK):
+        condition = Q()
+        for user_id, book_id, month, language in keys[start:start + ARCHIVE_LOOKUP_CHUNK]:
+            condition |= Q(
+                telegram_user_id=user_id, book_id=book_id, month=month, language=language
+            )
+        for entry in SentInspirationArchive.objects.select_for_update().filter(condition):
+            entries[(entry.telegram_user_id, entry.book_id, entry.month, entry.language)] = entry
+    return entries
+
+
+def archive_sent_history(before: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> dict:
+    """
+    Move SentInspiration rows sent before `before` into SentInspirationArchive.
+
+    Works in batches, each in its own transaction, so the ledger stays writable
+    and an interrupted run continues where it stopped. Rows are merged into the
+    archive rows of earlier runs.
+    """
+    stats = {"moved": 0, "created": 0, "updated": 0, "batches": 0}
+    while True:
+        with transaction.atomic():
+            rows = list(
+                SentInspiration.objects
+                .filter(sent_at__lt=before)
+                .order_by()
+                # Паралельний запуск бере інші рядки замість очікування
+                .select_for_update(skip_locked=True, of=("self",))
+                .values_list(
+                    "id", "telegram_user_id", "inspiration__book_id", "inspiration__date",
+                    "language", "sent_at",
+                )
+                [:batch_size]
+            )
+            if not rows:
+                break
+
+            months = {}
+            for _, user_id, book_id, day, language, sent_at in rows:
+                key = (user_id, book_id, day.replace(day=1), language)
+                days, last_sent_at = months.get(key, (0, sent_at))
+                months[key] = (days | 1 << (day.day - 1), max(last_sent_at, sent_at))
+
+            archived = _locked_archive_entries(months)
+            created, updated = [], []
+            for key, (days, last_sent_at) in months.items():
+                entry = archived.get(key)
+                if entry is None:
+                    user_id, book_id, month, language = key
+                    created.append(SentInspirationArchive(
+                        telegram_user_id=user_id, book_id=book_id, month=month,
+                        language=language, days=days, last_sent_at=last_sent_at,
+                    ))
+                else:
+                    entry.days |= days
+                    entry.last_sent_at = max(entry.last_sent_at, last_sent_at)
+                    updated.append(entry)
+            SentInspirationArchive.objects.bulk_create(created, batch_size=1000)
+            SentInspirationArchive.objects.bulk_update(
+                updated, ["days", "last_sent_at"], batch_size=1000
+            )
+            SentInspiration.objects.filter(id__in=[row[0] for row in rows]).delete()
+
+        stats["moved"] += len(rows)
+        stats["created"] += len(created)
+        stats["updated"] += len(updated)
+        stats["batches"] += 1
+    return stats
@@ -0,0 +1,302 @@
+"""
+HTML parser backends for page extraction.
+
+parse_html() returns the document wrapped in a small node API (find, find_all, text,
+string, get, html, decompose) that EGWBookParser uses, so the extraction logic does
+not depend on the parser. Backends, fastest first:
+
+- selectolax: lexbor HTML5 parser (C)
+- lxml: libxml2 HTML parser (C)
+- html.parser: BeautifulSoup with the pure-Python parser from the standard library
+
+The first installed one is used unless PARSER_HTML_BACKEND names another.
+Selectors are a small CSS subset: "tag", "tag.class", "tag#id", "tag[attr]", "*"
+and comma-separated lists of those; results are in document order.
+"""
+import re
+from functools import lru_cache
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+BACKENDS = ("selectolax", "lxml", "html.parser")
+# Текст усередині цих тегів BeautifulSoup не віддає в get_text()
+HIDDEN_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+_SIMPLE_SELECTOR = re.compile(
+    r"^(?P<tag>[a-z][a-z0-9]*|\*)(?:\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)|\[(?P<attr>[\w-]+)\])?$"
+)
+
+
+def available_backends() -> List[str]:
+    installed = {"selectolax": SELECTOLAX_AVAILABLE, "lxml": LXML_AVAILABLE, "html.parser": True}
+    return [name for name in BACKENDS if installed[name]]
+
+
+@lru_cache(maxsize=1)
+def default_backend() -> str:
+    """PARSER_HTML_BACKEND if set and installed, otherwise the fastest installed backend."""
+    configured = getattr(settings, "PARSER_HTML_BACKEND", "")
+    backends = available_backends()
+    if configured:
+        if configured not in backends:
+            raise ValueError(
+                f"HTML backend {configured!r} is not installed (available: {', '.join(backends)})"
+            )
+        return configured
+    return backends[0]
+
+
+def parse_html(markup: str, backend: Optional[str] = None) -> "HtmlNode":
+    """Parse document or fragment; returns its root node."""
+    backend = backend or default_backend()
+    if backend == "selectolax":
+        return SelectolaxNode(LexborHTMLParser(markup).root)
+    if backend == "lxml":
+        return LxmlNode(lxml.html.document_fromstring(markup))
+    if backend == "html.parser":
+        from bs4 import BeautifulSoup
+        return SoupNode(BeautifulSoup(markup, "html.parser"))
+    raise ValueError(f"Unknown HTML backend {backend!r}")
+
+
+def _parse_selector(selector: str) -> list:
+    parts = []
+    for part in selector.split(","):
+        match = _SIMPLE_SELECTOR.match(part.strip())
+        if not match:
+            raise ValueError(f"Unsupported selector {part.strip()!r}")
+        parts.append(match.groupdict())
+    return parts
+
+
+class HtmlNode:
+    """Element of a parsed document; subclasses adapt one backend."""
+
+    name: str
+
+    def find_all(self, selector: str) -> List["HtmlNode"]:
+        raise NotImplementedError
+
+    def find(self, selector: str) -> Optional["HtmlNode"]:
+        found = self.find_all(selector)
+        return found[0] if found else None
+
+    def get(self, attribute: str) -> Optional[str]:
+        """Attribute value as written in the markup ("class" is the whole string)."""
+        return self.attributes().get(attribute)
+
+    def attributes(self) -> dict:
+        """All attributes at once, values as in get()."""
+        raise NotImplementedError
+
+    def strings(self) -> Iterator[str]:
+        """Text nodes in document order, without comments and script/style/template text."""
+        raise NotImplementedError
+
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        """Same as BeautifulSoup get_text()."""
+        if strip:
+            return separator.join(s for s in (s.strip() for s in self.strings()) if s)
+        return separator.join(self.strings())
+
+    def string(self) -> Optional[str]:
+        """Same as BeautifulSoup Tag.string: text of the only child, through single elements."""
+        raise NotImplementedError
+
+    def html(self) -> str:
+        raise NotImplementedError
+
+    def decompose(self):
+        """Remove element with its content from the document."""
+        raise NotImplementedError
+
+    def remove_all(self, selector: str):
+        # Спершу вкладені: зовнішній елемент видаляється останнім, посилання на внутрішні не висять
+        for node in reversed(self.find_all(selector)):
+            node.decompose()
+
+    def __bool__(self) -> bool:
+        return True
+
+
+class SoupNode(HtmlNode):
+    def __init__(self, tag):
+        self._tag = tag
+        self.name = tag.name
+
+    def find_all(self, selector: str) -> List[HtmlNode]:
+        parts = _parse_selector(selector)
+        if len(parts) > 1 and all(
+            p["cls"] is None and p["id"] is None and p["attr"] is None for p in parts
+        ):
+            found = self._tag.find_all([p["tag"] for p in parts])
+        elif len(parts) == 1:
+            part = parts[0]
+            kwargs = {}
+            if part["cls"]:
+                kwargs["class_"] = part["cls"]
+            if part["id"]:
+                kwargs["id"] = part["id"]
+            if part["attr"]:
+                kwargs[part["attr"]] = True
+            found = self._tag.find_all(True if part["tag"] == "*" else part["tag"], **kwargs)
+        else:
+            found = self._tag.select(selector)
+        return [SoupNode(tag) for tag in found]
+
+    def get(self, attribute: str) -> Optional[str]:
+        value = self._tag.get(attribute)
+        return " ".join(value) if isinstance(value, list) else value
+
+    def attributes(self) -> dict:
+        return {
+            name: " ".join(value) if isinstance(value, list) else value
+            for name, value in self._tag.attrs.items()
+        }
+
+    def strings(self) -> Iterator[str]:
+        return self._tag._all_strings()
+
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        return self._tag.get_text(separator=separator, strip=strip)
+
+    def string(self) -> Optional[str]:
+        value = self._tag.string
+        return None if value is None else str(value)
+
+    def html(self) -> str:
+        return str(self._tag)
+
+    def decompose(self):
+        self._tag.decompose()
+
+
+class LxmlNode(HtmlNode):
+    def __init__(self, element):
+        self._element = element
+        self.name = element.tag
+
+    def find_all(self, selector: str) -> List[HtmlNode]:
+        return [LxmlNode(element) for element in self._element.xpath(self._xpath(selector))]
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _xpath(selector: str) -> str:
+        paths = []
+        for part in _parse_selector(selector):
+            path = f".//{part['tag']}"
+            if part["cls"]:
+                path += f"[contains(concat(' ', normalize-space(@class), ' '), ' {part['cls']} ')]"
+            if part["id"]:
+                path += f"[@id='{part['id']}']"
+            if part["attr"]:
+                path += f"[@{part['attr']}]"
+            paths.append(path)
+        return " | ".join(paths)
+
+    def get(self, attribute: str) -> Optional[str]:
+        return self._element.get(attribute)
+
+    def attributes(self) -> dict:
+        return dict(self._element.attrib)
+
+    def strings(self) -> Iterator[str]:
+        return self._strings(self._element)
+
+    def _strings(self, element) -> Iterator[str]:
+        if element.tag not in HIDDEN_TEXT_TAGS and element.text:
+            yield element.text
+        for child in element:
+            if isinstance(child.tag, str):
+                yield from self._strings(child)
+            if child.tail:
+                yield child.tail
+
+    def string(self) -> Optional[str]:
+        children = self._children(self._element)
+        if len(children) != 1:
+            return None
+        child = children[0]
+        if isinstance(child, str):
+            return child
+        if not isinstance(child.tag, str):
+            return child.text
+        return LxmlNode(child).string()
+
+    @staticmethod
+    def _children(element) -> list:
+        children = [element.text] if element.text else []
+        for child in element:
+            children.append(child)
+            if child.tail:
+                children.append(child.tail)
+        return children
+
+    def html(self) -> str:
+        return lxml.html.tostring(self._element, encoding="unicode", with_tail=False)
+
+    def decompose(self):
+        element = self._element
+        parent = element.getparent()
+        if parent is None:
+            return
+        # У lxml текст після елемента належить йому (tail), переносимо його сусідові
+        if element.tail:
+            previous = element.getprevious()
+            if previous is not None:
+                previous.tail = (previous.tail or "") + element.tail
+            else:
+                parent.text = (parent.text or "") + element.tail
+        parent.remove(element)
+
+
+class SelectolaxNode(HtmlNode):
+    def __init__(self, node):
+        self._node = node
+        self.name = node.tag
+
+    def find_all(self, selector: str) -> List[HtmlNode]:
+        _parse_selector(selector)
+        return [SelectolaxNode(node) for node in self._node.css(selector)]
+
+    def attributes(self) -> dict:
+        return self._node.attributes
+
+    def strings(self) -> Iterator[str]:
+        return self._strings(self._node)
+
+    def _strings(self, node) -> Iterator[str]:
+        for child in node.iter(include_text=True):
+            if child.tag == "-text":
+                yield child.text_content
+            elif child.tag not in HIDDEN_TEXT_TAGS and not child.tag.startswith("-"):
+                yield from self._strings(child)
+
+    def string(self) -> Optional[str]:
+        child = self._node.child
+        if child is None or child.next is not None:
+            return None
+        if child.tag == "-text":
+            return child.text_content
+        if child.tag == "-comment":
+            return child.comment_content
+        return SelectolaxNode(child).string()
+
+    def html(self) -> str:
+        return self._node.html
+
+    def decompose(self):
+        self._node.decompose()
@@ -0,0 +1,61 @@
+"""
+Django management command для архівування старих записів журналу доставки.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.history import ARCHIVE_BATCH_SIZE, archive_cutoff, archive_sent_history
+from core.models import SentInspiration, SentInspirationArchive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move SentInspiration rows older than the retention window into the monthly "
+        "archive (one row per user, book, month and language). The nightly beat task "
+        "does the same with SENT_HISTORY_RETENTION_DAYS; run this for the first "
+        "archive of a large ledger or with --dry-run to see how many rows would move."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Keep rows of the last N days (default: SENT_HISTORY_RETENTION_DAYS)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help=f"Rows moved per transaction (default: {ARCHIVE_BATCH_SIZE})"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows that would be archived"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            before = archive_cutoff(options.get("days"))
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        old_rows = SentInspiration.objects.filter(sent_at__lt=before).count()
+        self.stdout.write(f"Rows sent before {before:%Y-%m-%d %H:%M} UTC: {old_rows}")
+        if options["dry_run"] or not old_rows:
+            return
+
+        started = time.perf_counter()
+        stats = archive_sent_history(before, batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"moved={stats['moved']} archive created={stats['created']} updated={stats['updated']} "
+            f"batches={stats['batches']} elapsed={elapsed:.1f} s "
+            f"({stats['moved'] / elapsed:,.0f} rows/s)"
+        )
+        self.stdout.write(
+            f"Ledger rows left: {SentInspiration.objects.count()}, "
+            f"archive rows: {SentInspirationArchive.objects.count()}"
+        )
+        self.stdout.write(self.style.SUCCESS("Delivery history archived"))
@@ -0,0 +1,47 @@
+"""
+Management command that runs the project benchmarks.
+
+Every benchmark is a BaseCommand in bot/benchmarks or core/benchmarks, imported only
+when it is run, so `python manage.py help` does not list a command per benchmark.
+Correctness checks live in tests/.
+"""
+import sys
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+
+BENCHMARKS = {
+    "scheduler": "bot.benchmarks.scheduler",
+    "converter": "bot.benchmarks.converter",
+    "random_day": "bot.benchmarks.random_day",
+    "webhook": "bot.benchmarks.webhook",
+    "crawler": "core.benchmarks.crawler",
+    "html_backends": "core.benchmarks.html_backends",
+    "browser_pool": "core.benchmarks.browser_pool",
+    "storage_report": "core.benchmarks.storage_report",
+    "delivery_ledger": "bot.benchmarks.delivery_ledger",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a benchmark: manage.py bench <name> [options]. Without a name lists the "
+        "benchmarks; manage.py bench <name> --help shows the options of one."
+    )
+
+    def run_from_argv(self, argv):
+        name = argv[2] if len(argv) > 2 else None
+        if name is None or name.startswith("-"):
+            super().run_from_argv(argv)
+            return
+        try:
+            module = import_module(BENCHMARKS[name])
+        except KeyError:
+            sys.stderr.write(f"Unknown benchmark {name!r}; available: {', '.join(BENCHMARKS)}\n")
+            sys.exit(1)
+        module.Command().run_from_argv([argv[0], f"bench {name}", *argv[3:]])
+
+    def handle(self, *args, **options):
+        for name, path in BENCHMARKS.items():
+            help_text = import_module(path).Command.help
+            self.stdout.write(f"{name:<20} {help_text.split('. ')[0].rstrip('.')}")
@@ -1,10 +1,14 @@
 """
 Management command for parsing books from egwwritings.org.
 """
+from contextlib import ExitStack
+
 from django.core.management.base import BaseCommand, CommandError
 
-from core.models import Book
-from core.parsers import EGWBookParser
+from core.browser import SELENIUM_AVAILABLE, BrowserPool
+from core.models import Book, ParseCheckpoint
+from core.page_cache import PageCache
+from core.parsers import DEFAULT_BATCH_SIZE, EGWBookParser
 
 
 class Command(BaseCommand):
@@ -38,11 +42,65 @@ class Command(BaseCommand):
             action="store_true",
             help="Reparse book even if already parsed"
         )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue an interrupted crawl from its last checkpoint"
+        )
         parser.add_argument(
             "--use-selenium",
             action="store_true",
             help="Use Selenium for parsing (for JavaScript sites)"
         )
+        parser.add_argument(
+            "--browsers",
+            type=int,
+            default=1,
+            help="With --use-selenium: headless browsers to keep open; more than 1 renders "
+                 "the following pages ahead in parallel tabs (default: 1)"
+        )
+        parser.add_argument(
+            "--cache-dir",
+            type=str,
+            help="Directory of the page cache: every downloaded page is archived there"
+        )
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help=(
+                "Replay pages from --cache-dir without network "
+                "(re-run extraction on a recorded book)"
+            )
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=(
+                "Parsed days written to the database at once, 1 - one by one "
+                f"(default: {DEFAULT_BATCH_SIZE})"
+            )
+        )
+        parser.add_argument(
+            "--engine",
+            choices=["sync", "async"],
+            default="sync",
+            help=(
+                "sync: one page at a time with --delay; "
+                "async: pooled asyncio crawler (default: sync)"
+            )
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Async engine: max parallel requests per host (default: 4)"
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="Async engine: max requests per second per host (default: 1 / --delay)"
+        )
 
     def handle(self, *args, **options):
         book_id = options["book_id"]
@@ -51,13 +109,43 @@ class Command(BaseCommand):
         max_pages = options.get("max_pages", 400)
         force = options.get("force", False)
         use_selenium = options.get("use_selenium", False)
+        engine = options.get("engine", "sync")
+        resume = options.get("resume", False)
+        if engine == "async" and use_selenium:
+            raise CommandError("--engine async does not support --use-selenium")
+        cache_dir = options.get("cache_dir")
+        offline = options.get("offline", False)
+        if offline and not cache_dir:
+            raise CommandError("--offline replays a recorded book, specify its --cache-dir")
+        if offline and use_selenium:
+            self.stdout.write(self.style.WARNING(
+                "--offline reads rendered pages from the cache, Selenium is not started"
+            ))
+            use_selenium = False
+        if use_selenium and not SELENIUM_AVAILABLE:
+            self.stdout.write(
+                self.style.WARNING("Selenium is not installed, parsing with requests")
+            )
+            use_selenium = False
+        if resume and start_url:
+            raise CommandError(
+                "--resume continues from the checkpoint, do not combine it with --start-url"
+            )
 
         try:
             book = Book.objects.get(pk=book_id)
         except Book.DoesNotExist:
             raise CommandError(f"Book with ID {book_id} not found")
 
-        if book.is_parsed and not force:
+        checkpoint = None
+        if resume:
+            checkpoint = ParseCheckpoint.objects.filter(book=book).first()
+            if checkpoint is None or not checkpoint.next_url:
+                raise CommandError(
+                    f'Book "{book.title}" has no checkpoint to resume from. Run without --resume.'
+                )
+            start_url = checkpoint.next_url
+        elif book.is_parsed and not force:
             self.stdout.write(
                 self.style.WARNING(
                     f'Book "{book.title}" already parsed. '
@@ -74,32 +162,96 @@ class Command(BaseCommand):
                     "Specify --start-url or add source_url to book."
                 )
 
+        page_cache = PageCache(cache_dir) if cache_dir else None
+        if offline and not len(page_cache):
+            raise CommandError(f"Page cache {cache_dir} is empty, record it first with --cache-dir")
+
         self.stdout.write(f"Starting to parse book: {book.title}")
         self.stdout.write(f"Start URL: {start_url}")
+        if checkpoint:
+            self.stdout.write(
+                f"Resuming after {checkpoint.last_date or checkpoint.last_url} "
+                f"({checkpoint.pages} pages already walked)"
+            )
         self.stdout.write(f"Delay between requests: {delay} sec")
         self.stdout.write(f"Max pages: {max_pages}")
         self.stdout.write(f"Using Selenium: {use_selenium}")
+        if use_selenium:
+            self.stdout.write(f"Browsers: {options['browsers']}")
+        self.stdout.write(f"Engine: {engine}")
+        if page_cache is not None:
+            self.stdout.write(
+                f"Page cache: {page_cache.directory} ({len(page_cache)} pages, "
+                f"{'replaying offline' if offline else 'recording'})"
+            )
 
         # Створюємо функцію для логування помилок
         def log_error(msg: str):
             self.stdout.write(self.style.ERROR(f"ERROR: {msg}"))
 
-        parser = EGWBookParser(
-            book=book, 
-            start_url=start_url, 
-            delay=delay, 
-            use_selenium=use_selenium,
-            error_logger=log_error
-        )
-
         try:
-            stats = parser.parse_book(max_pages=max_pages)
+            with ExitStack() as stack:
+                browser_pool = None
+                if use_selenium:
+                    # Браузери закриваються при виході з блоку, навіть після помилки чи Ctrl+C
+                    browser_pool = stack.enter_context(
+                        BrowserPool(size=options["browsers"], error_logger=log_error)
+                    )
+                parser = EGWBookParser(
+                    book=book, 
+                    start_url=start_url, 
+                    delay=delay, 
+                    error_logger=log_error,
+                    batch_size=options["batch_size"],
+                    checkpoint=checkpoint,
+                    browser_pool=browser_pool,
+                    page_cache=page_cache,
+                    offline=offline
+                )
+                
+                if engine == "async":
+                    from core.crawler import AsyncBookCrawler
+                    
+                    rate = options.get("rate")
+                    if rate is None:
+                        rate = 1.0 / delay if delay > 0 else 0
+                    crawler = AsyncBookCrawler(
+                        parser, concurrency=options["concurrency"], rate=rate
+                    )
+                    stats = crawler.run(max_pages=max_pages)
+                else:
+                    stats = parser.parse_book(max_pages=max_pages)
             
             self.stdout.write(self.style.SUCCESS("\nParsing completed!"))
             self.stdout.write(f"Total pages processed: {stats['total_pages']}")
             self.stdout.write(f"Created/updated inspirations: {stats['parsed']}")
+            self.stdout.write(
+                f"New: {stats['new']}, changed: {stats['changed']}, unchanged: {stats['unchanged']}"
+            )
             self.stdout.write(f"Skipped: {stats['skipped']}")
             self.stdout.write(f"Errors: {stats['errors']}")
+            if stats['pages_timed']:
+                self.stdout.write(
+                    f"Parse time: {stats['parse_time']:.2f} s, "
+                    f"{stats['parse_time'] * 1000 / stats['pages_timed']:.1f} ms/page avg, "
+                    f"{stats['parse_time_max'] * 1000:.1f} ms max ({stats['slowest_page']})"
+                )
+            self.stdout.write(
+                f"Database time: {stats['db_time']:.2f} s in {stats['db_writes']} writes "
+                f"(batch size {parser.batch_size})"
+            )
+            if stats['db_rows']:
+                # Збереження по одному дню (--batch-size 1) робить окремий запис на кожен рядок
+                self.stdout.write(
+                    f"Batching saved {stats['db_rows'] - stats['db_writes']} writes: "
+                    f"{stats['db_writes']} instead of {stats['db_rows']} row by row "
+                    f"({stats['db_time'] * 1000 / stats['db_rows']:.2f} ms/row)"
+                )
+            if page_cache is not None:
+                self.stdout.write(
+                    f"Page cache: {page_cache.hits} read, {page_cache.misses} missing, "
+                    f"{page_cache.stored} recorded"
+                )
             
             # Виводимо деталі помилок, якщо вони є
             if stats.get('error_details'):
@@ -0,0 +1,163 @@
+"""
+Management command for parsing many books from egwwritings.org in parallel.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.batch_parser import DEFAULT_BOOK_TIMEOUT, BatchBookParser, books_to_parse
+from core.page_cache import PageCache
+from core.parsers import DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Parse several books in parallel, each from its source_url (or checkpoint with --resume). "
+        "Request limits are shared by all books crawling the same host."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "book_ids",
+            nargs="*",
+            type=int,
+            help="Book IDs from database"
+        )
+        parser.add_argument(
+            "--all-unparsed",
+            action="store_true",
+            help="Parse every active book that is not parsed yet"
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Reparse books even if already parsed"
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue books with a checkpoint of an interrupted crawl from it"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Books parsed at the same time (default: 4)"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Max parallel requests per host, all books together (default: 4)"
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=2.0,
+            help="Max requests per second per host, all books together; 0 - unlimited (default: 2)"
+        )
+        parser.add_argument(
+            "--max-pages",
+            type=int,
+            default=400,
+            help="Maximum number of pages per book (default: 400)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Parsed days written to the database at once (default: {DEFAULT_BATCH_SIZE})"
+        )
+        parser.add_argument(
+            "--book-timeout",
+            type=float,
+            default=DEFAULT_BOOK_TIMEOUT,
+            help=(
+                "Seconds one book may take before it counts as failed; 0 - no limit "
+                f"(default: {DEFAULT_BOOK_TIMEOUT:.0f})"
+            )
+        )
+        parser.add_argument(
+            "--cache-dir",
+            type=str,
+            help="Directory of the page cache: every downloaded page is archived there"
+        )
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help="Replay pages from --cache-dir without network"
+        )
+        parser.add_argument(
+            "--progress-interval",
+            type=float,
+            default=5.0,
+            help="Seconds between progress lines (default: 5)"
+        )
+
+    def handle(self, *args, **options):
+        if not options["book_ids"] and not options["all_unparsed"]:
+            raise CommandError("Specify book IDs or --all-unparsed")
+        if options["offline"] and not options["cache_dir"]:
+            raise CommandError("--offline replays recorded books, specify their --cache-dir")
+
+        books, problems = books_to_parse(
+            options["book_ids"], options["all_unparsed"], options["force"], options["resume"]
+        )
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(problem))
+        if not books:
+            self.stdout.write(self.style.WARNING("No books to parse"))
+            return
+
+        self.stdout.write(
+            f"Parsing {len(books)} books, {options['workers']} at a time; per host: "
+            f"{options['concurrency']} parallel requests, "
+            f"{options['rate'] or 'unlimited'} requests/s"
+        )
+
+        def log_error(msg: str):
+            self.stdout.write(self.style.ERROR(f"ERROR: {msg}"))
+
+        batch = BatchBookParser(
+            books,
+            workers=options["workers"],
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            max_pages=options["max_pages"],
+            batch_size=options["batch_size"],
+            resume=options["resume"],
+            page_cache=PageCache(options["cache_dir"]) if options["cache_dir"] else None,
+            offline=options["offline"],
+            book_timeout=options["book_timeout"] or None,
+            error_logger=log_error,
+        )
+        results = batch.run(progress=self._report_progress, interval=options["progress_interval"])
+
+        self.stdout.write(self.style.SUCCESS("\nParsing completed!"))
+        for result in sorted(results, key=lambda result: result.title):
+            if result.status == "failed":
+                self.stdout.write(self.style.ERROR(
+                    f"  {result.title} (ID {result.book_id}): failed - {result.error}"
+                ))
+                continue
+            stats = result.stats
+            line = (
+                f"  {result.title} (ID {result.book_id}): {stats['total_pages']} pages, "
+                f"new {stats['new']}, changed {stats['changed']}, unchanged {stats['unchanged']}, "
+                f"errors {stats['errors']}, {result.elapsed:.1f} s"
+            )
+            if result.status == "errors":
+                self.stdout.write(self.style.WARNING(line + " - continue with --resume"))
+            else:
+                self.stdout.write(line)
+
+    def _report_progress(self, snapshot: dict):
+        finished = snapshot["done"] + snapshot["with_errors"] + snapshot["failed"]
+        running = ", ".join(f"{title} ({pages})" for title, pages in snapshot["running"])
+        self.stdout.write(
+            f"[{snapshot['elapsed']:6.0f} s] books {finished}/{snapshot['books']} "
+            f"(failed {snapshot['failed']}, with errors {snapshot['with_errors']})  "
+            f"pages {snapshot['total_pages']} ({snapshot['pages_per_second']:.1f}/s)  "
+            f"new {snapshot['new']}, changed {snapshot['changed']}, "
+            f"unchanged {snapshot['unchanged']}, "
+            f"errors {snapshot['errors']}"
+            + (f"  running: {running}" if running else "")
+        )
@@ -0,0 +1,61 @@
+"""
+Management command for pre-rendering Telegram HTML of daily inspirations.
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import DailyInspiration
+
+
+class Command(BaseCommand):
+    help = "Render telegram_html for daily inspirations that were saved before it existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--book",
+            type=int,
+            help="Render only inspirations of this book ID"
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render inspirations that already have telegram_html"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Rows per bulk update (default: 200)"
+        )
+
+    def handle(self, *args, **options):
+        book_id = options.get("book")
+        force = options.get("force", False)
+        batch_size = options.get("batch_size", 200)
+
+        queryset = DailyInspiration.objects.filter(html_content__isnull=False).only(
+            "id", "html_content"
+        )
+        if book_id:
+            queryset = queryset.filter(book_id=book_id)
+        if not force:
+            queryset = queryset.filter(telegram_html__isnull=True)
+
+        total = queryset.count()
+        self.stdout.write(f"Inspirations to render: {total}")
+
+        rendered = 0
+        batch = []
+        for inspiration in queryset.iterator(chunk_size=batch_size):
+            inspiration.render_telegram_html()
+            batch.append(inspiration)
+            if len(batch) >= batch_size:
+                DailyInspiration.objects.bulk_update(batch, ["telegram_html"])
+                rendered += len(batch)
+                batch = []
+                self.stdout.write(f"Rendered {rendered}/{total}")
+
+        if batch:
+            DailyInspiration.objects.bulk_update(batch, ["telegram_html"])
+            rendered += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered inspirations: {rendered}"))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+from core.scheduling import schedule_for
+
+
+def fill_next_delivery_at(apps, schema_editor):
+    UserSettings = apps.get_model("core", "UserSettings")
+    now = timezone.now()
+    batch = []
+    for settings_obj in UserSettings.objects.all().iterator(chunk_size=2000):
+        settings_obj.next_delivery_at = schedule_for(
+            settings_obj.notification_time,
+            settings_obj.timezone,
+            settings_obj.is_active,
+            settings_obj.selected_book_id is not None,
+            now,
+        )
+        batch.append(settings_obj)
+        if len(batch) >= 2000:
+            UserSettings.objects.bulk_update(batch, ["next_delivery_at"])
+            batch = []
+    if batch:
+        UserSettings.objects.bulk_update(batch, ["next_delivery_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_add_timezone_to_usersettings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersettings',
+            name='next_delivery_at',
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                null=True,
+                verbose_name='Next delivery at (UTC)',
+            ),
+        ),
+        migrations.RunPython(fill_next_delivery_at, migrations.RunPython.noop),
+    ]
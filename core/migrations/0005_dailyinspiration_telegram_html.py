@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_usersettings_next_delivery_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyinspiration',
+            name='telegram_html',
+            field=models.TextField(
+                blank=True, editable=False, null=True, verbose_name='Telegram HTML'
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_dailyinspiration_telegram_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyinspiration',
+            name='content_hash',
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, null=True, verbose_name='Content hash'
+            ),
+        ),
+        migrations.AddField(
+            model_name='dailyinspiration',
+            name='etag',
+            field=models.CharField(
+                blank=True, editable=False, max_length=255, null=True, verbose_name='ETag'
+            ),
+        ),
+        migrations.AddField(
+            model_name='dailyinspiration',
+            name='last_modified',
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, null=True, verbose_name='Last-Modified'
+            ),
+        ),
+        migrations.AddField(
+            model_name='dailyinspiration',
+            name='next_url',
+            field=models.URLField(
+                blank=True, editable=False, null=True, verbose_name='Next page URL'
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_dailyinspiration_page_validators'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParseCheckpoint',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('last_url', models.URLField(verbose_name='Last page URL')),
+                ('last_date', models.DateField(blank=True, null=True, verbose_name='Last date')),
+                ('next_url', models.URLField(blank=True, null=True, verbose_name='Next page URL')),
+                ('pages', models.PositiveIntegerField(default=0, verbose_name='Pages walked')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                (
+                    'book',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='parse_checkpoint',
+                        to='core.book',
+                        verbose_name='Book',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Parse checkpoint',
+                'verbose_name_plural': 'Parse checkpoints',
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+import hashlib
+
+from django.db import migrations
+
+import core.storage
+
+BATCH_SIZE = 500
+
+
+def compress_html(apps, schema_editor):
+    """Copy html_content into the compressed column, without scripts and styles."""
+    DailyInspiration = apps.get_model("core", "DailyInspiration")
+    rows = (
+        DailyInspiration.objects
+        .filter(html_content__isnull=False)
+        .only("pk", "html_content", "content_hash")
+        .order_by("pk")
+    )
+    batch = []
+    for inspiration in rows.iterator(chunk_size=BATCH_SIZE):
+        html_content = core.storage.canonical_html(inspiration.html_content)
+        if html_content != inspiration.html_content:
+            # Інакше наступний парсинг вважав би змінним кожен такий день
+            inspiration.content_hash = hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+        inspiration.html_content_compact = html_content
+        batch.append(inspiration)
+        if len(batch) >= BATCH_SIZE:
+            DailyInspiration.objects.bulk_update(batch, ["html_content_compact", "content_hash"])
+            batch = []
+    if batch:
+        DailyInspiration.objects.bulk_update(batch, ["html_content_compact", "content_hash"])
+
+
+def decompress_html(apps, schema_editor):
+    DailyInspiration = apps.get_model("core", "DailyInspiration")
+    rows = (
+        DailyInspiration.objects
+        .filter(html_content_compact__isnull=False)
+        .only("pk", "html_content_compact")
+        .order_by("pk")
+    )
+    batch = []
+    for inspiration in rows.iterator(chunk_size=BATCH_SIZE):
+        inspiration.html_content = inspiration.html_content_compact
+        batch.append(inspiration)
+        if len(batch) >= BATCH_SIZE:
+            DailyInspiration.objects.bulk_update(batch, ["html_content"])
+            batch = []
+    if batch:
+        DailyInspiration.objects.bulk_update(batch, ["html_content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_parsecheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyinspiration',
+            name='html_content_compact',
+            field=core.storage.CompressedTextField(
+                blank=True, null=True, verbose_name='HTML content'
+            ),
+        ),
+        migrations.RunPython(compress_html, decompress_html),
+        migrations.RemoveField(
+            model_name='dailyinspiration',
+            name='html_content',
+        ),
+        migrations.RenameField(
+            model_name='dailyinspiration',
+            old_name='html_content_compact',
+            new_name='html_content',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_dailyinspiration_compressed_html'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usersettings',
+            name='next_delivery_at',
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name='Next delivery at (UTC)'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='sentinspiration',
+            index=models.Index(fields=['-sent_at'], name='sentinspiration_sent_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersettings',
+            index=models.Index(
+                condition=models.Q(('is_active', True), ('selected_book__isnull', False)),
+                fields=['next_delivery_at'],
+                name='usersettings_due_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_scheduler_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentInspirationArchive',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('month', models.DateField(verbose_name='Month')),
+                (
+                    'language',
+                    models.CharField(
+                        choices=[('uk', 'Ukrainian'), ('en', 'English'), ('ru', 'Russian')],
+                        max_length=2,
+                        verbose_name='Language',
+                    ),
+                ),
+                ('days', models.IntegerField(default=0, verbose_name='Days (bit mask)')),
+                ('last_sent_at', models.DateTimeField(verbose_name='Last sent at')),
+                (
+                    'book',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='archived_deliveries',
+                        to='core.book',
+                        verbose_name='Book',
+                    ),
+                ),
+                (
+                    'telegram_user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='archived_inspirations',
+                        to='core.telegramuser',
+                        verbose_name='Telegram user',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Archived deliveries',
+                'verbose_name_plural': 'Archived deliveries',
+                'ordering': ['-month'],
+                'unique_together': {('telegram_user', 'book', 'month', 'language')},
+            },
+        ),
+    ]
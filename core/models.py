@@ -3,9 +3,12 @@ Models for storing books and daily inspirations.
 """
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from timezone_field import TimeZoneField
 
 from core.constants import LANGUAGE_CHOICES
+from core.scheduling import schedule_for
+from core.storage import CompressedTextField
 
 
 class Book(models.Model):
@@ -34,6 +37,38 @@ class Book(models.Model):
         return self.title
 
 
+class ParseCheckpoint(models.Model):
+    """Position of an unfinished book crawl, saved after every committed batch."""
+    book = models.OneToOneField(
+        Book,
+        on_delete=models.CASCADE,
+        related_name="parse_checkpoint",
+        verbose_name="Book"
+    )
+    last_url = models.URLField(verbose_name="Last page URL")
+    last_date = models.DateField(blank=True, null=True, verbose_name="Last date")
+    next_url = models.URLField(blank=True, null=True, verbose_name="Next page URL")
+    pages = models.PositiveIntegerField(default=0, verbose_name="Pages walked")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated at")
+
+    class Meta:
+        verbose_name = "Parse checkpoint"
+        verbose_name_plural = "Parse checkpoints"
+
+    def __str__(self) -> str:
+        return f"{self.book.title} - {self.last_date or self.last_url}"
+
+
+class DailyInspirationManager(models.Manager):
+    """Leaves the page HTML out of queries; load it with only("html_content") or defer(None)."""
+
+    # Сира сторінка потрібна лише для рендеру telegram_html, доставка її не читає
+    deferred_fields = ("html_content",)
+
+    def get_queryset(self):
+        return super().get_queryset().defer(*self.deferred_fields)
+
+
 class DailyInspiration(models.Model):
     """Daily inspiration from a book."""
     book = models.ForeignKey(
@@ -51,11 +86,17 @@ class DailyInspiration(models.Model):
         verbose_name="Paragraph ID"
     )
     original_text = models.TextField(verbose_name="Original text")
-    html_content = models.TextField(
+    html_content = CompressedTextField(
         blank=True,
         null=True,
         verbose_name="HTML content"
     )
+    telegram_html = models.TextField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Telegram HTML"
+    )
     translation_ukrainian = models.TextField(
         blank=True,
         null=True,
@@ -76,9 +117,38 @@ class DailyInspiration(models.Model):
         null=True,
         verbose_name="Source URL"
     )
+    next_url = models.URLField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Next page URL"
+    )
+    etag = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="ETag"
+    )
+    last_modified = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Last-Modified"
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Content hash"
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created at")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated at")
 
+    objects = DailyInspirationManager()
+
     class Meta:
         verbose_name = "Daily inspiration"
         verbose_name_plural = "Daily inspirations"
@@ -88,6 +158,49 @@ class DailyInspiration(models.Model):
     def __str__(self) -> str:
         return f"{self.book.title} - {self.date}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_html_content = instance.__dict__.get("html_content")
+        return instance
+
+    def render_telegram_html(self) -> None:
+        """Convert html_content to Telegram-safe HTML and store it in telegram_html."""
+        from bot.html_converter import convert_html_to_telegram
+
+        self.telegram_html = (
+            convert_html_to_telegram(self.html_content) if self.html_content else None
+        )
+
+    def save(self, *args, **kwargs):
+        # telegram_html інвалідовується лише коли змінився html_content
+        if "html_content" in self.__dict__ and (
+            getattr(self, "_loaded_html_content", None) != self.html_content
+            or (self.html_content and self.telegram_html is None)
+        ):
+            self.render_telegram_html()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "telegram_html"}
+        super().save(*args, **kwargs)
+        self._loaded_html_content = self.__dict__.get("html_content")
+
+    def get_telegram_content(self, language: str) -> str:
+        """
+        Get message content for language.
+
+        Uses pre-rendered HTML when book is in user's language, otherwise translation.
+        """
+        if self.book.language == language:
+            content = self.telegram_html
+            if content is None and self.html_content:
+                # Рядок ще не пройшов backfill
+                from bot.html_converter import convert_html_to_telegram
+                content = convert_html_to_telegram(self.html_content)
+            if content and content.strip():
+                return content
+        return self.get_text_by_language(language)
+
     def get_text_by_language(self, language: str) -> str:
         """Get inspiration text in specified language."""
         if language == "uk" and self.translation_ukrainian:
@@ -156,16 +269,75 @@ class UserSettings(models.Model):
         verbose_name="Selected book"
     )
     is_active = models.BooleanField(default=True, verbose_name="Active")
+    next_delivery_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Next delivery at (UTC)"
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created at")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated at")
 
     class Meta:
         verbose_name = "User settings"
         verbose_name_plural = "User settings"
+        indexes = [
+            # Тік шукає лише активних користувачів з книгою; решта рядків в індекс не потрапляє
+            models.Index(
+                fields=["next_delivery_at"],
+                condition=models.Q(is_active=True, selected_book__isnull=False),
+                name="usersettings_due_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Settings for {self.telegram_user}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_schedule_state = instance._schedule_state()
+        instance._loaded_language = instance.__dict__.get("language")
+        return instance
+
+    def _schedule_state(self) -> tuple:
+        """Fields that define delivery slot."""
+        return (
+            self.__dict__.get("notification_time"),
+            str(self.__dict__.get("timezone")),
+            self.__dict__.get("is_active"),
+            self.__dict__.get("selected_book_id"),
+        )
+
+    def delivery_changed(self) -> bool:
+        """True if slot, book or language differ from the loaded row (or it is new)."""
+        return (
+            getattr(self, "_loaded_schedule_state", None) != self._schedule_state()
+            or getattr(self, "_loaded_language", None) != self.__dict__.get("language")
+        )
+
+    def compute_next_delivery_at(self, after=None):
+        """Get next delivery slot (UTC) for current settings."""
+        return schedule_for(
+            self.notification_time,
+            self.timezone,
+            self.is_active,
+            self.selected_book_id is not None,
+            after or timezone.now(),
+        )
+
+    def save(self, *args, **kwargs):
+        # Слот перераховується лише коли змінились час, часовий пояс, активність або книга,
+        # щоб збереження інших полів не скасувало сьогоднішню доставку
+        if getattr(self, "_loaded_schedule_state", None) != self._schedule_state():
+            self.next_delivery_at = self.compute_next_delivery_at()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "next_delivery_at"}
+        super().save(*args, **kwargs)
+        self._loaded_schedule_state = self._schedule_state()
+        self._loaded_language = self.__dict__.get("language")
+
 
 class SentInspiration(models.Model):
     """Sent inspiration to user."""
@@ -193,6 +365,52 @@ class SentInspiration(models.Model):
         verbose_name_plural = "Sent inspirations"
         ordering = ["-sent_at"]
         unique_together = [("telegram_user", "inspiration", "language")]
+        indexes = [
+            models.Index(fields=["-sent_at"], name="sentinspiration_sent_at_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.telegram_user} - {self.inspiration.date} ({self.language})"
+
+
+class SentInspirationArchive(models.Model):
+    """
+    Deliveries older than the retention window, one row per user, book, month and language.
+
+    Bit N-1 of `days` is set when the inspiration of day N of the month was sent,
+    so the history stays exact in a month of rows compacted into one.
+    """
+    telegram_user = models.ForeignKey(
+        TelegramUser,
+        on_delete=models.CASCADE,
+        related_name="archived_inspirations",
+        verbose_name="Telegram user"
+    )
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name="archived_deliveries",
+        verbose_name="Book"
+    )
+    month = models.DateField(verbose_name="Month")
+    language = models.CharField(
+        max_length=2,
+        choices=LANGUAGE_CHOICES,
+        verbose_name="Language"
+    )
+    days = models.IntegerField(default=0, verbose_name="Days (bit mask)")
+    last_sent_at = models.DateTimeField(verbose_name="Last sent at")
+
+    class Meta:
+        verbose_name = "Archived deliveries"
+        verbose_name_plural = "Archived deliveries"
+        ordering = ["-month"]
+        unique_together = [("telegram_user", "book", "month", "language")]
+
+    def __str__(self) -> str:
+        return f"{self.telegram_user} - {self.book} {self.month:%Y-%m} ({self.language})"
+
+    @property
+    def delivered_days(self) -> list:
+        """Days of the month whose inspiration was sent."""
+        return [day for day in range(1, 32) if self.days >> (day - 1) & 1]
@@ -0,0 +1,133 @@
+"""
+On-disk archive of downloaded pages for re-parsing books without the network.
+
+Layout of the cache directory:
+
+- objects/ab/abcdef....html.gz: page bodies, gzip-compressed, named by the SHA-256 of
+  the body, so a body shared by several URLs is stored once;
+- index.jsonl: one JSON line per recorded response (URL without #fragment, body hash,
+  ETag, Last-Modified, time); the last line of a URL wins.
+
+Bodies are written to a temporary file and renamed, and index lines are appended
+after their body, so an interrupted crawl leaves a usable cache.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import urldefrag
+
+INDEX_FILE = "index.jsonl"
+OBJECTS_DIR = "objects"
+COMPRESS_LEVEL = 6
+
+
+class CachedPage(NamedTuple):
+    sha256: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: str
+
+
+class PageCache:
+    """
+    Compressed, content-addressed pages keyed by URL.
+
+    Pages differing only by #anchor share one entry.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / OBJECTS_DIR).mkdir(exist_ok=True)
+        self._index = {}  # URL документа -> CachedPage
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._load_index()
+
+    def _load_index(self):
+        path = self.directory / INDEX_FILE
+        if not path.exists():
+            return
+        with path.open(encoding="utf-8") as index:
+            for line in index:
+                try:
+                    entry = json.loads(line)
+                    self._index[entry["url"]] = CachedPage(
+                        entry["sha256"], entry.get("etag"), entry.get("last_modified"),
+                        entry.get("fetched_at", ""),
+                    )
+                except (ValueError, KeyError):
+                    # Рядок, недописаний при перериванні
+                    continue
+
+    def __contains__(self, url: str) -> bool:
+        return urldefrag(url)[0] in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, url: str) -> Optional[Tuple[str, CachedPage]]:
+        """(body, entry) of the page, or None when it was never recorded."""
+        entry = self._index.get(urldefrag(url)[0])
+        if entry is None:
+            self.misses += 1
+            return None
+        try:
+            with gzip.open(self._object_path(entry.sha256), "rb") as body:
+                raw = body.read().decode("utf-8")
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return raw, entry
+
+    def put(self, url: str, raw: str, headers=None):
+        """Record page body with its ETag / Last-Modified headers."""
+        data = raw.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._object_path(sha256)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as tmp:
+                    tmp.write(gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        headers = headers or {}
+        entry = CachedPage(
+            sha256, headers.get("ETag"), headers.get("Last-Modified"),
+            datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
+        document_url = urldefrag(url)[0]
+        with self._lock:
+            known = self._index.get(document_url)
+            if known is not None and known[:3] == entry[:3]:
+                return
+            with (self.directory / INDEX_FILE).open("a", encoding="utf-8") as index:
+                index.write(
+                    json.dumps({"url": document_url, **entry._asdict()}, ensure_ascii=False) + "\n"
+                )
+            self._index[document_url] = entry
+            self.stored += 1
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """(url, body) of every recorded page, in recording order."""
+        for url in list(self._index):
+            cached = self.get(url)
+            if cached is not None:
+                yield url, cached[0]
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.directory / OBJECTS_DIR / sha256[:2] / f"{sha256}.html.gz"
@@ -1,41 +1,82 @@
 """
 Parser for extracting morning readings from egwwritings.org.
 """
+import hashlib
 import logging
-import re
 import time
 import traceback
 from datetime import datetime, date
-from typing import Optional, Tuple, Callable
-from urllib.parse import urljoin
+from typing import Optional, Tuple, Callable, NamedTuple
+from urllib.parse import urldefrag
 
 import requests
-from bs4 import BeautifulSoup
+from django.db import transaction
 from django.utils import timezone
 
-from core.models import Book, DailyInspiration
+from core.browser import SELENIUM_AVAILABLE, BrowserPool
+from core.extractors import date_text, extract_date, find_next_link, predict_following
+from core.html_backend import default_backend, parse_html
+from core.models import Book, DailyInspiration, ParseCheckpoint
+from core.page_cache import PageCache
+from core.signals import book_parsed, inspirations_updated
+from core.storage import strip_non_content
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 50
+# Поля, що перезаписуються, коли день книги вже є в БД
+UPSERT_FIELDS = [
+    "html_content", "source_url", "next_url", "original_text", "telegram_html",
+    "etag", "last_modified", "content_hash", "updated_at",
+]
+# Контейнери основного тексту сторінки, у порядку пріоритету
+CONTENT_SELECTORS = (
+    'div.content', 'div#content', 'main', 'article', 'div.book-content', 'div.book-text',
+    'div.text-content',
+)
+# Браузер віддає сторінку, щойно з'явився будь-який із контейнерів
+READY_SELECTOR = ", ".join(CONTENT_SELECTORS)
+# Повертається fetch_page, коли сервер відповів 304 Not Modified
+NOT_MODIFIED = "<not modified>"
+
+
+class KnownPage(NamedTuple):
+    """Page of the book already stored in the database."""
+    pk: int
+    date: date
+    next_url: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: Optional[str]
+
+
+def content_hash(html_content: str) -> str:
+    return hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+
 # Спробуємо імпортувати selenium, якщо він доступний
 try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
     from selenium.common.exceptions import TimeoutException, WebDriverException
-    SELENIUM_AVAILABLE = True
 except ImportError:
-    SELENIUM_AVAILABLE = False
+    pass
 
 
 class EGWBookParser:
     """Parser for books from egwwritings.org."""
     
-    def __init__(self, book: Book, start_url: str, delay: float = 1.0, use_selenium: bool = False, 
-                 error_logger: Optional[Callable[[str], None]] = None):
+    def __init__(
+        self,
+        book: Book,
+        start_url: str,
+        delay: float = 1.0,
+        use_selenium: bool = False,
+        error_logger: Optional[Callable[[str], None]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        checkpoint: Optional[ParseCheckpoint] = None,
+        html_backend: Optional[str] = None,
+        browser_pool: Optional[BrowserPool] = None,
+        page_cache: Optional[PageCache] = None,
+        offline: bool = False,
+    ):
         """
         Initialize parser.
         
@@ -45,52 +86,74 @@ class EGWBookParser:
             delay: Delay between requests in seconds
             use_selenium: Use Selenium for parsing (for JavaScript sites)
             error_logger: Optional callback function for logging errors (takes error message string)
+            batch_size: Parsed days written to the database at once (1 - every day separately)
+            checkpoint: Checkpoint of an interrupted crawl to continue (start_url is its next_url)
+            html_backend: HTML parser (selectolax, lxml, html.parser); fastest installed by default
+            browser_pool: Started BrowserPool to load pages with (implies use_selenium);
+                by default use_selenium starts a pool of one browser, quit by close()
+            page_cache: Archive every downloaded page into this cache
+            offline: Read pages only from page_cache, without network or browser
         """
+        if offline and page_cache is None:
+            raise ValueError("Offline parsing needs a page cache")
         self.book = book
         self.start_url = start_url
         self.delay = delay
-        self.use_selenium = use_selenium and SELENIUM_AVAILABLE
+        self.use_selenium = (
+            (use_selenium or browser_pool is not None) and SELENIUM_AVAILABLE and not offline
+        )
         self.error_logger = error_logger or (lambda msg: logger.error(msg))
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         self.parsed_dates = set()  # Для відстеження вже розпарсених дат
-        self.driver = None
+        self.batch_size = max(1, batch_size)
+        self._pending = []  # Розпарсені дні, що ще не записані в БД
+        self._validator_updates = []  # Незмінені дні з новими ETag/Last-Modified
+        self.known_pages = {}  # source_url -> KnownPage
+        self._known_dates = {}  # date -> (source_url, KnownPage)
+        self._validators = {}  # URL документа -> (etag, last_modified) з останньої відповіді
+        self._parse_timings = {}  # url -> секунди process_page
+        self.checkpoint = checkpoint
+        self.html_backend = html_backend or default_backend()
+        self._pages_walked = checkpoint.pages if checkpoint else 0
+        self._last_date = checkpoint.last_date if checkpoint else None
+        self._position = None  # (url, next_url) останньої пройденої сторінки
+        self._since_checkpoint = 0
+        self.stats = None  # stats поточного обходу (start_crawl)
+        self.browser_pool = browser_pool if self.use_selenium else None
+        self._owns_browser_pool = False
+        self.page_cache = page_cache
+        self.offline = offline
         
-        if self.use_selenium:
+        if self.use_selenium and self.browser_pool is None:
             self._init_selenium()
     
     def _init_selenium(self):
-        """Initialize Selenium WebDriver."""
-        if not SELENIUM_AVAILABLE:
-            raise RuntimeError("Selenium is not available. Install selenium and webdriver-manager.")
-        
+        """Start a pool of one browser; without Chrome the parser falls back to requests."""
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-            
-            try:
-                from webdriver_manager.chrome import ChromeDriverManager
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            except ImportError:
-                self.driver = webdriver.Chrome(options=chrome_options)
-        except Exception:
+            self.browser_pool = BrowserPool(size=1, error_logger=self.error_logger).start()
+            self._owns_browser_pool = True
+        except Exception as e:
+            self.error_logger(
+                f"Could not start Selenium, using requests: {type(e).__name__} - {str(e)}"
+            )
             self.use_selenium = False
     
-    def __del__(self):
-        """Close driver on object deletion."""
-        if self.driver:
-            try:
-                self.driver.quit()
-            except Exception:
-                pass
+    def close(self):
+        """Quit the browser started by this parser; a pool passed in is closed by its owner."""
+        if self._owns_browser_pool:
+            self.browser_pool.close()
+            self.browser_pool = None
+            self._owns_browser_pool = False
+            self.use_selenium = False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
         
     def parse_page(self, url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         """
@@ -99,91 +162,142 @@ class EGWBookParser:
         Returns:
             Tuple[html_content, date_str, next_url]
         """
+        html_content_raw = self.fetch_page(url, conditional=False)
+        if html_content_raw is None:
+            return None, None, None
+        return self.process_page(html_content_raw, url)
+    
+    def fetch_page(self, url: str, conditional: bool = True) -> Optional[str]:
+        """Download raw page HTML (None on error, already logged; NOT_MODIFIED on 304)."""
+        if self.offline:
+            return self.read_cached_page(url)
         try:
-            if self.use_selenium and self.driver:
+            if self.use_selenium:
                 # Використовуємо Selenium для отримання сторінки
                 try:
-                    self.driver.get(url)
-                    # Чекаємо завантаження контенту
-                    try:
-                        WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((By.TAG_NAME, "body"))
-                        )
-                        time.sleep(1)
-                    except TimeoutException as e:
-                        self.error_logger(f"Timeout waiting for page to load: {url} - {str(e)}")
-                        return None, None, None
-                    
-                    html_content_raw = self.driver.page_source
+                    html_content_raw = self.browser_pool.fetch(url, READY_SELECTOR)
+                    self.cache_page(url, html_content_raw)
+                except TimeoutException as e:
+                    self.error_logger(f"Timeout waiting for page to load: {url} - {str(e)}")
+                    return None
                 except WebDriverException as e:
                     self.error_logger(f"Selenium WebDriver error for URL {url}: {type(e).__name__} - {str(e)}")
-                    return None, None, None
+                    return None
                 except Exception as e:
                     self.error_logger(f"Selenium error for URL {url}: {type(e).__name__} - {str(e)}\n{traceback.format_exc()}")
-                    return None, None, None
+                    return None
             else:
                 # Використовуємо requests
                 try:
-                    response = self.session.get(url, timeout=30)
+                    response = self.session.get(
+                        url,
+                        timeout=30,
+                        headers=self.conditional_headers(url) if conditional else None,
+                    )
+                    if response.status_code == 304:
+                        return NOT_MODIFIED
                     response.raise_for_status()
                     response.encoding = 'utf-8'
                     html_content_raw = response.text
+                    self.remember_validators(url, response.headers)
+                    self.cache_page(url, html_content_raw, response.headers)
                 except requests.exceptions.Timeout as e:
                     self.error_logger(f"Request timeout for URL {url}: {str(e)}")
-                    return None, None, None
+                    return None
                 except requests.exceptions.HTTPError as e:
                     self.error_logger(f"HTTP error for URL {url}: Status {response.status_code} - {str(e)}")
-                    return None, None, None
+                    return None
                 except requests.exceptions.RequestException as e:
                     self.error_logger(f"Request error for URL {url}: {type(e).__name__} - {str(e)}")
-                    return None, None, None
+                    return None
             
+            return html_content_raw
+        except Exception as e:
+            self.error_logger(
+                f"Unexpected error fetching page {url}: {type(e).__name__} - {str(e)}\n"
+                f"{traceback.format_exc()}"
+            )
+            return None
+    
+    def read_cached_page(self, url: str) -> Optional[str]:
+        """Page from page_cache with its recorded validators (None if not recorded, logged)."""
+        cached = self.page_cache.get(url)
+        if cached is None:
+            self.error_logger(f"Page is not in the cache {self.page_cache.directory}: {url}")
+            return None
+        html_content_raw, entry = cached
+        self._validators[urldefrag(url)[0]] = (entry.etag, entry.last_modified)
+        return html_content_raw
+    
+    def cache_page(self, url: str, html_content_raw: str, headers=None):
+        """Archive downloaded page; a full disk must not stop the crawl."""
+        if self.page_cache is None:
+            return
+        try:
+            self.page_cache.put(url, html_content_raw, headers)
+        except OSError as e:
+            self.error_logger(f"Could not cache page {url}: {type(e).__name__} - {str(e)}")
+    
+    def process_page(
+        self, html_content_raw: str, url: str
+    ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        Extract HTML content, date and next page URL from downloaded page.
+        
+        The time it took is added to stats when the page is recorded.
+        
+        Returns:
+            Tuple[html_content, date_str, next_url]
+        """
+        started = time.perf_counter()
+        result = self._process_page(html_content_raw, url)
+        # Може виконуватись у потоках async-краулера, тож лише записуємо,
+        # а в stats додає record_page
+        self._parse_timings[url] = time.perf_counter() - started
+        return result
+    
+    def _process_page(
+        self, html_content_raw: str, url: str
+    ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        try:
             try:
-                soup = BeautifulSoup(html_content_raw, 'html.parser')
+                soup = parse_html(html_content_raw, self.html_backend)
             except Exception as e:
                 self.error_logger(f"Error parsing HTML for URL {url}: {type(e).__name__} - {str(e)}")
                 return None, None, None
             
             # Знаходимо основний контент сторінки
             # Для egwwritings.org контент може бути в різних місцях
-            content_div = (
-                soup.find('div', class_='content') or
-                soup.find('div', id='content') or
-                soup.find('main') or
-                soup.find('article') or
-                soup.find('div', class_='book-content') or
-                soup.find('div', class_='book-text') or
-                soup.find('div', class_='text-content')
-            )
+            content_div = None
+            for selector in CONTENT_SELECTORS:
+                content_div = soup.find(selector)
+                if content_div:
+                    break
             
             if not content_div:
                 # Якщо не знайдено спеціальний контейнер, беремо body без header/footer
                 content_div = soup.find('body')
                 if content_div:
                     # Видаляємо header, footer, navigation, скрипти та стилі
-                    for tag in content_div.find_all(['header', 'footer', 'nav', 'script', 'style']):
-                        tag.decompose()
+                    content_div.remove_all('header, footer, nav, script, style')
             
             if not content_div:
                 self.error_logger(f"Could not find content container on page: {url}")
-                self.error_logger(f"Available tags in soup: {[tag.name for tag in soup.find_all(True)[:20]]}")
+                self.error_logger(
+                    f"Available tags in soup: {[tag.name for tag in soup.find_all('*')[:20]]}"
+                )
                 return None, None, None
             
-            # Створюємо копію для збереження HTML
-            try:
-                content_copy = BeautifulSoup(str(content_div), 'html.parser')
-            except Exception as e:
-                self.error_logger(f"Error creating content copy for URL {url}: {type(e).__name__} - {str(e)}")
-                return None, None, None
+            # Скрипти й стилі не потрапляють ні в повідомлення, ні в текст, тож не зберігаємо їх
+            strip_non_content(content_div)
+            # Дерево далі лише читається, тож HTML контенту беремо з нього без повторного розбору
+            html_content = content_div.html()
             
             # Знаходимо дату з контенту
-            date_str = self._extract_date(content_div, url)
+            date_str = extract_date(date_text(content_div))
             
-            # Знаходимо посилання на наступну сторінку (до видалення навігації)
-            next_url = self._find_next_link(soup, url)
-            
-            # Отримуємо HTML контент з форматуванням
-            html_content = str(content_copy)
+            # Знаходимо посилання на наступну сторінку
+            next_url = find_next_link(soup, url)
             
             return html_content, date_str, next_url
             
@@ -191,274 +305,386 @@ class EGWBookParser:
             self.error_logger(f"Unexpected error parsing page {url}: {type(e).__name__} - {str(e)}\n{traceback.format_exc()}")
             return None, None, None
     
-    def _extract_date(self, content: BeautifulSoup, url: str) -> Optional[str]:
-        """
-        Extract date from page content.
-        
-        Searches for date in formats "1 січня", "1 января", "January 1", etc.
+    def parse_book(self, max_pages: int = 400) -> dict:
         """
-        # Спочатку шукаємо в заголовках (h1, h2, h3)
-        headers = content.find_all(['h1', 'h2', 'h3', 'h4'])
-        text_to_search = []
-        for header in headers:
-            header_text = header.get_text()
-            text_to_search.append(header_text)
-        
-        # Також шукаємо в першому параграфі або перших 500 символах
-        first_p = content.find('p')
-        if first_p:
-            text_to_search.append(first_p.get_text())
-        
-        # Додаємо весь текст якщо не знайдено в заголовках
-        if not text_to_search:
-            text_to_search = [content.get_text()]
-        
-        # Об'єднуємо весь текст для пошуку
-        text = ' '.join(text_to_search)
-        
-        # Патерни для різних форматів дат
-        patterns = [
-            # Українська: "1 січня", "1 січня.", "1 січня 2024", "1 січня. Джерело"
-            r'(\d{1,2})\s+(січня|лютого|березня|квітня|травня|червня|липня|серпня|вересня|жовтня|листопада|грудня)',
-            # Російська: "1 января", "1 января."
-            r'(\d{1,2})\s+(января|февраля|марта|апреля|мая|июня|июля|августа|сентября|октября|ноября|декабря)',
-            # Англійська: "January 1", "Jan 1"
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2})',
-            r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\.?\s+(\d{1,2})',
-        ]
+        Parse entire book starting from start_url.
         
-        month_names_uk = {
-            'січня': 1, 'лютого': 2, 'березня': 3, 'квітня': 4,
-            'травня': 5, 'червня': 6, 'липня': 7, 'серпня': 8,
-            'вересня': 9, 'жовтня': 10, 'листопада': 11, 'грудня': 12
-        }
+        Args:
+            max_pages: Maximum number of pages to parse (protection against loops)
         
-        month_names_ru = {
-            'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4,
-            'мая': 5, 'июня': 6, 'июля': 7, 'августа': 8,
-            'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12
-        }
+        Returns:
+            Dictionary with parsing statistics
+        """
+        stats = self.new_stats()
         
-        month_names_en = {
-            'january': 1, 'february': 2, 'march': 3, 'april': 4,
-            'may': 5, 'june': 6, 'july': 7, 'august': 8,
-            'september': 9, 'october': 10, 'november': 11, 'december': 12,
-            'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4,
-            'may': 5, 'jun': 6, 'jul': 7, 'aug': 8,
-            'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-        }
+        current_url = self.start_url
+        pages_parsed = 0
         
-        current_year = datetime.now().year
+        self.start_crawl(stats)
+        completed = False
         
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                groups = match.groups()
+        try:
+            while current_url and pages_parsed < max_pages:
+                html_content_raw = self.fetch_page(current_url)
                 
-                if len(groups) == 2:
-                    if groups[0].isdigit():
-                        # Формат: "1 січня" або "1 января"
-                        day = int(groups[0])
-                        month_name = groups[1].lower()
-                        
-                        if month_name in month_names_uk:
-                            month = month_names_uk[month_name]
-                        elif month_name in month_names_ru:
-                            month = month_names_ru[month_name]
-                        else:
-                            continue
-                    else:
-                        # Формат: "January 1"
-                        month_name = groups[0].lower()
-                        day = int(groups[1])
-                        
-                        if month_name in month_names_en:
-                            month = month_names_en[month_name]
-                        else:
-                            continue
+                if html_content_raw == NOT_MODIFIED:
+                    stop, next_url = self.record_unchanged(current_url, stats)
+                    if stop:
+                        completed = True
+                        break
+                else:
+                    html_content, date_str, next_url = (
+                        self.process_page(html_content_raw, current_url)
+                        if html_content_raw is not None else (None, None, None)
+                    )
+                    
+                    if not html_content:
+                        self.record_failure(current_url, stats)
+                        break
                     
-                    try:
-                        parsed_date = date(current_year, month, day)
-                        return parsed_date.strftime('%Y-%m-%d')
-                    except ValueError:
-                        continue
+                    if self.record_page(
+                        current_url, html_content, date_str, stats, next_url=next_url
+                    ):
+                        completed = True
+                        break
+                
+                if next_url:
+                    self._prefetch_pages(current_url, next_url)
+                    current_url = next_url
+                else:
+                    self.error_logger(f"No next URL found after parsing: {current_url}")
+                    completed = True
+                    break
+                
+                pages_parsed += 1
+                
+                # Затримка між запитами
+                if self.delay > 0 and not self.offline:
+                    time.sleep(self.delay)
+        finally:
+            # Зберігаємо вже розпарсені дні навіть при перериванні (Ctrl+C, помилка)
+            self.flush(stats)
         
-        # Якщо не знайдено дату в тексті, спробуємо витягнути з URL
-        # URL може містити дату в форматі #22 (номер розділу)
-        # Але для визначення дати з номера розділу потрібно знати структуру книги
-        return None
+        self.finish(stats, completed)
+        return stats
+    
+    def _prefetch_pages(self, url: str, next_url: str):
+        """With several browsers, render next_url and the likely next pages during the delay."""
+        if self.use_selenium and self.browser_pool.size > 1:
+            self.browser_pool.prefetch(
+                [next_url] + predict_following(url, next_url, self.browser_pool.size - 2),
+                READY_SELECTOR,
+            )
+    
+    @staticmethod
+    def new_stats() -> dict:
+        return {
+            'parsed': 0,
+            'skipped': 0,
+            'errors': 0,
+            'total_pages': 0,
+            'new': 0,
+            'changed': 0,
+            'unchanged': 0,  # 304 або той самий хеш контенту
+            'parse_time': 0.0,  # Секунди розбору сторінок (process_page)
+            'pages_timed': 0,
+            'parse_time_max': 0.0,
+            'slowest_page': None,
+            'db_time': 0.0,  # Секунди, витрачені на запис у БД
+            'db_writes': 0,  # Запити на запис: пакети або окремі дні
+            'db_rows': 0,  # Записані рядки: стільки запитів зробив би запис по одному дню
+            'error_details': []  # Список деталей помилок
+        }
+    
+    def record_failure(self, url: str, stats: dict):
+        self._parse_timings.pop(url, None)
+        error_msg = f"Failed to parse page: {url} (no content returned)"
+        stats["errors"] += 1
+        stats["error_details"].append(error_msg)
+        self.error_logger(error_msg)
     
-    def _find_next_link(self, soup: BeautifulSoup, current_url: str) -> Optional[str]:
+    def record_page(self, url: str, html_content: str, date_str: Optional[str], stats: dict,
+                    original_text: Optional[str] = None, next_url: Optional[str] = None) -> bool:
         """
-        Find link to next page.
+        Buffer parsed page as inspiration of its date; written by flush() every
+        batch_size days. Pages whose content hash matches the stored one are not written.
         
-        Searches for "Next" button or similar link.
+        Returns True when the last day of the year was saved and crawling should stop.
         """
-        # Шукаємо посилання з текстом "Next", "Наступна", "Следующая" тощо
-        next_texts = ['next', 'наступна', 'следующая', 'далі', 'далее', '→', '>', 'наступний', 'следующий']
+        finished = self._record_page(url, html_content, date_str, stats, original_text, next_url)
+        self._record_timing(url, stats)
+        self._advance(url, next_url, stats)
+        return finished
+    
+    def _record_timing(self, url: str, stats: dict):
+        elapsed = self._parse_timings.pop(url, None)
+        if elapsed is None:
+            return
+        stats["parse_time"] += elapsed
+        stats["pages_timed"] += 1
+        if elapsed > stats["parse_time_max"]:
+            stats["parse_time_max"] = elapsed
+            stats["slowest_page"] = url
+    
+    def _record_page(self, url: str, html_content: str, date_str: Optional[str], stats: dict,
+                     original_text: Optional[str], next_url: Optional[str]) -> bool:
+        stats["total_pages"] += 1
         
-        # Спочатку шукаємо точний текст
-        for text in next_texts:
-            # Шукаємо посилання з таким текстом (точний збіг або частина)
-            links = soup.find_all('a', string=re.compile(f'^{re.escape(text)}$', re.IGNORECASE))
-            for link in links:
-                if link.get('href'):
-                    next_url = urljoin(current_url, link['href'])
-                    # Перевіряємо, що це не поточне посилання
-                    if next_url != current_url:
-                        return next_url
-            
-            # Шукаємо посилання, що містить текст
-            links = soup.find_all('a', string=re.compile(text, re.IGNORECASE))
-            for link in links:
-                if link.get('href'):
-                    next_url = urljoin(current_url, link['href'])
-                    if next_url != current_url:
-                        return next_url
-            
-            # Шукаємо посилання з title або aria-label
-            link = soup.find('a', {'title': re.compile(text, re.IGNORECASE)})
-            if link and link.get('href'):
-                next_url = urljoin(current_url, link['href'])
-                if next_url != current_url:
-                    return next_url
-            
-            link = soup.find('a', {'aria-label': re.compile(text, re.IGNORECASE)})
-            if link and link.get('href'):
-                next_url = urljoin(current_url, link['href'])
-                if next_url != current_url:
-                    return next_url
+        if not date_str:
+            # Якщо дата не знайдена, це не критична помилка, але варто залогувати
+            self.error_logger(f"Warning: Could not extract date from URL {url}")
+            return False
         
-        # Шукаємо посилання з класом "next" або подібним
-        next_classes = ['next', 'next-page', 'next-link', 'pagination-next', 'btn-next']
-        for class_name in next_classes:
-            # Може бути список класів
-            link = soup.find('a', class_=re.compile(class_name, re.IGNORECASE))
-            if link and link.get('href'):
-                next_url = urljoin(current_url, link['href'])
-                if next_url != current_url:
-                    return next_url
+        try:
+            inspiration_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError as e:
+            error_msg = f"Invalid date format '{date_str}' from URL {url}: {str(e)}"
+            stats["errors"] += 1
+            stats["error_details"].append(error_msg)
+            self.error_logger(error_msg)
+            return False
         
-        # Шукаємо в навігації
-        nav = soup.find('nav') or soup.find('div', class_='pagination') or soup.find('div', class_='navigation')
-        if nav:
-            links = nav.find_all('a')
-            for link in links:
-                href = link.get('href')
-                if href:
-                    link_text = link.get_text().lower().strip()
-                    if any(text in link_text for text in next_texts):
-                        next_url = urljoin(current_url, href)
-                        if next_url != current_url:
-                            return next_url
+        if inspiration_date in self.parsed_dates:
+            stats["skipped"] += 1
+            return False
+        self.parsed_dates.add(inspiration_date)
+        self._last_date = inspiration_date
+        is_last_day = inspiration_date.month == 12 and inspiration_date.day == 31
         
-        # Шукаємо всі посилання і шукаємо такі, що містять номер сторінки більший за поточний
-        # Або просто шукаємо посилання з номером розділу більшим за поточний
-        try:
-            # Спробуємо витягнути номер з поточного URL (наприклад, #22)
-            current_match = re.search(r'#(\d+)$', current_url)
-            if current_match:
-                current_num = int(current_match.group(1))
-                # Шукаємо посилання з номером більшим за поточний
-                all_links = soup.find_all('a', href=True)
-                for link in all_links:
-                    href = link.get('href')
-                    match = re.search(r'#(\d+)$', href)
-                    if match:
-                        link_num = int(match.group(1))
-                        if link_num == current_num + 1:
-                            next_url = urljoin(current_url, href)
-                            return next_url
-        except (ValueError, AttributeError):
-            pass
+        page_hash = content_hash(html_content)
+        etag, last_modified = self._validators.get(urldefrag(url)[0], (None, None))
+        stored_url, known = self._known_dates.get(inspiration_date, (None, None))
+        if known is not None and known.content_hash == page_hash and stored_url == url:
+            stats["unchanged"] += 1
+            if (known.etag, known.last_modified, known.next_url) != (etag, last_modified, next_url):
+                self._validator_updates.append(DailyInspiration(
+                    pk=known.pk, etag=etag, last_modified=last_modified, next_url=next_url,
+                ))
+            return is_last_day
         
-        return None
+        inspiration = DailyInspiration(
+            book=self.book,
+            date=inspiration_date,
+            html_content=html_content,
+            source_url=url,
+            next_url=next_url,
+            original_text=(
+                original_text if original_text is not None
+                else self._extract_text_from_html(html_content)
+            ),
+            etag=etag,
+            last_modified=last_modified,
+            content_hash=page_hash,
+        )
+        inspiration._change = "changed" if known is not None else "new"
+        inspiration._stored_pk = known.pk if known is not None else None
+        self._pending.append(inspiration)
+        return is_last_day
     
-    def parse_book(self, max_pages: int = 400) -> dict:
+    def _advance(self, url: str, next_url: Optional[str], stats: dict):
+        """Move crawl position past url; every batch_size pages flush and save checkpoint."""
+        self._position = (url, next_url)
+        self._pages_walked += 1
+        self._since_checkpoint += 1
+        if len(self._pending) >= self.batch_size or self._since_checkpoint >= self.batch_size:
+            self.flush(stats)
+    
+    def record_unchanged(self, url: str, stats: dict) -> Tuple[bool, Optional[str]]:
         """
-        Parse entire book starting from start_url.
+        Count page that answered 304 Not Modified.
         
-        Args:
-            max_pages: Maximum number of pages to parse (protection against loops)
-        
-        Returns:
-            Dictionary with parsing statistics
+        Returns (stop, next_url) taken from the stored page.
         """
-        stats = {
-            'parsed': 0,
-            'skipped': 0,
-            'errors': 0,
-            'total_pages': 0,
-            'error_details': []  # Список деталей помилок
-        }
+        known = self.known_pages[url]
+        stats["total_pages"] += 1
+        if known.date in self.parsed_dates:
+            stats["skipped"] += 1
+        else:
+            stats["unchanged"] += 1
+            self.parsed_dates.add(known.date)
+        self._last_date = known.date
+        self._advance(url, known.next_url, stats)
+        return (known.date.month == 12 and known.date.day == 31), known.next_url
+    
+    def start_crawl(self, stats: Optional[dict] = None):
+        """
+        Prepare for a crawl from start_url: load stored pages, drop a stale checkpoint.
         
-        current_url = self.start_url
-        pages_parsed = 0
+        `stats` of the crawl stay readable as self.stats for progress reports.
+        """
+        self.stats = stats
+        self.load_known_pages()
+        if self.checkpoint is None:
+            ParseCheckpoint.objects.filter(book=self.book).delete()
+    
+    def load_known_pages(self):
+        """Load validators of already stored pages for conditional requests."""
+        self.known_pages = {}
+        self._known_dates = {}
+        rows = DailyInspiration.objects.filter(book=self.book).values_list(
+            "pk", "date", "source_url", "next_url", "etag", "last_modified", "content_hash"
+        )
+        for pk, inspiration_date, source_url, next_url, etag, last_modified, page_hash in rows:
+            known = KnownPage(pk, inspiration_date, next_url, etag, last_modified, page_hash)
+            self._known_dates[inspiration_date] = (source_url, known)
+            if source_url:
+                self.known_pages[source_url] = known
+    
+    def conditional_headers(self, url: str) -> dict:
+        """If-None-Match / If-Modified-Since for a stored page that can be skipped on 304."""
+        known = self.known_pages.get(url)
+        # Без next_url ланцюжок не можна продовжити без тіла сторінки
+        if self.page_cache is not None and url not in self.page_cache:
+            # Тіло потрібне для архіву, тож 304 не просимо
+            return {}
+        if known is None or not (
+            known.next_url or (known.date.month == 12 and known.date.day == 31)
+        ):
+            return {}
+        headers = {}
+        if known.etag:
+            headers["If-None-Match"] = known.etag
+        if known.last_modified:
+            headers["If-Modified-Since"] = known.last_modified
+        return headers
+    
+    def remember_validators(self, url: str, headers):
+        """Keep ETag/Last-Modified of a response; pages differing only by #anchor share them."""
+        self._validators[urldefrag(url)[0]] = (headers.get("ETag"), headers.get("Last-Modified"))
+    
+    def flush(self, stats: dict):
+        """
+        Write buffered inspirations to the database, then save the crawl checkpoint.
         
-        while current_url and pages_parsed < max_pages:
-            html_content, date_str, next_url = self.parse_page(current_url)
-            
-            if not html_content:
-                error_msg = f"Failed to parse page: {current_url} (no content returned)"
-                stats["errors"] += 1
-                stats["error_details"].append(error_msg)
-                self.error_logger(error_msg)
-                break
-            
-            stats["total_pages"] += 1
-            
-            if date_str:
-                try:
-                    inspiration_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                    
-                    if inspiration_date in self.parsed_dates:
-                        stats["skipped"] += 1
-                    else:
-                        try:
-                            DailyInspiration.objects.update_or_create(
-                                book=self.book,
-                                date=inspiration_date,
-                                defaults={
-                                    "html_content": html_content,
-                                    "source_url": current_url,
-                                    "original_text": self._extract_text_from_html(html_content),
-                                }
-                            )
-                            
-                            stats["parsed"] += 1
-                            self.parsed_dates.add(inspiration_date)
-                            
-                            if inspiration_date.month == 12 and inspiration_date.day == 31:
-                                break
-                        except Exception as e:
-                            error_msg = f"Database error saving inspiration for date {date_str} from URL {current_url}: {type(e).__name__} - {str(e)}"
-                            stats["errors"] += 1
-                            stats["error_details"].append(error_msg)
-                            self.error_logger(error_msg)
-                            self.error_logger(traceback.format_exc())
-                        
-                except ValueError as e:
-                    error_msg = f"Invalid date format '{date_str}' from URL {current_url}: {str(e)}"
-                    stats["errors"] += 1
-                    stats["error_details"].append(error_msg)
-                    self.error_logger(error_msg)
-            else:
-                # Якщо дата не знайдена, це не критична помилка, але варто залогувати
-                self.error_logger(f"Warning: Could not extract date from URL {current_url}")
-            
-            if next_url:
-                current_url = next_url
-            else:
-                self.error_logger(f"No next URL found after parsing: {current_url}")
-                break
-            
-            pages_parsed += 1
-            
-            # Затримка між запитами
-            if self.delay > 0:
-                time.sleep(self.delay)
+        A batch is one INSERT ... ON CONFLICT (book, date) DO UPDATE in its own
+        transaction. If it fails, its rows are retried one by one so a single bad page
+        does not lose the whole batch. New validators of unchanged pages are written
+        with one UPDATE per batch.
+        """
+        if not self._pending and not self._validator_updates and not self._since_checkpoint:
+            return
+        batch, self._pending = self._pending, []
+        validator_updates, self._validator_updates = self._validator_updates, []
+        started = time.perf_counter()
+        try:
+            if validator_updates:
+                self._save_validators(validator_updates, stats)
+            if batch:
+                self._save_batch(batch, stats)
+            if self._since_checkpoint:
+                self._save_checkpoint()
+        finally:
+            stats["db_time"] += time.perf_counter() - started
+    
+    def _save_batch(self, batch: list, stats: dict):
+        if len(batch) > 1:
+            try:
+                for inspiration in batch:
+                    inspiration.render_telegram_html()
+                with transaction.atomic():
+                    DailyInspiration.objects.bulk_create(
+                        batch,
+                        update_conflicts=True,
+                        unique_fields=["book", "date"],
+                        update_fields=UPSERT_FIELDS,
+                    )
+                for inspiration in batch:
+                    self._count_saved(inspiration, stats)
+                stats["db_writes"] += 1
+                stats["db_rows"] += len(batch)
+                # Upsert не надсилає post_save: повідомляємо про змінені дні самі
+                changed = [
+                    inspiration._stored_pk for inspiration in batch if inspiration._stored_pk
+                ]
+                if changed:
+                    inspirations_updated.send(sender=self.__class__, inspiration_ids=changed)
+                return
+            except Exception as e:
+                self.error_logger(
+                    f"Batch of {len(batch)} inspirations failed, saving one by one: "
+                    f"{type(e).__name__} - {str(e)}"
+                )
+        for inspiration in batch:
+            self._save_one(inspiration, stats)
+    
+    def _save_checkpoint(self):
+        # Пишеться після пакета: сторінки до last_url вже в БД
+        url, next_url = self._position
+        try:
+            self.checkpoint, _ = ParseCheckpoint.objects.update_or_create(
+                book=self.book,
+                defaults={
+                    "last_url": url,
+                    "last_date": self._last_date,
+                    "next_url": next_url,
+                    "pages": self._pages_walked,
+                },
+            )
+            self._since_checkpoint = 0
+        except Exception as e:
+            self.error_logger(f"Could not save parse checkpoint: {type(e).__name__} - {str(e)}")
+    
+    def _save_validators(self, inspirations: list, stats: dict):
+        try:
+            DailyInspiration.objects.bulk_update(
+                inspirations, ["etag", "last_modified", "next_url"]
+            )
+            stats["db_writes"] += 1
+            stats["db_rows"] += len(inspirations)
+        except Exception as e:
+            # Не критично: наступного разу сторінку порівняємо за хешем
+            self.error_logger(f"Could not update page validators: {type(e).__name__} - {str(e)}")
+    
+    def _save_one(self, inspiration: DailyInspiration, stats: dict):
+        try:
+            with transaction.atomic():
+                DailyInspiration.objects.update_or_create(
+                    book=self.book,
+                    date=inspiration.date,
+                    defaults={
+                        "html_content": inspiration.html_content,
+                        "source_url": inspiration.source_url,
+                        "next_url": inspiration.next_url,
+                        "original_text": inspiration.original_text,
+                        "etag": inspiration.etag,
+                        "last_modified": inspiration.last_modified,
+                        "content_hash": inspiration.content_hash,
+                    }
+                )
+        except Exception as e:
+            error_msg = (
+                f"Database error saving inspiration for date {inspiration.date.isoformat()} "
+                f"from URL {inspiration.source_url}: {type(e).__name__} - {str(e)}"
+            )
+            stats["errors"] += 1
+            stats["error_details"].append(error_msg)
+            self.error_logger(error_msg)
+            self.error_logger(traceback.format_exc())
+            return
+        self._count_saved(inspiration, stats)
+        stats["db_writes"] += 1
+        stats["db_rows"] += 1
+    
+    @staticmethod
+    def _count_saved(inspiration: DailyInspiration, stats: dict):
+        stats["parsed"] += 1
+        stats[inspiration._change] += 1
+    
+    def finish(self, stats: dict, completed: bool = True):
+        """
+        Flush buffered inspirations and mark book as parsed.
         
-        # Оновлюємо статус книги
+        The checkpoint is dropped only when the crawl reached the end of the book;
+        after a failed page or --max-pages it stays for --resume.
+        """
+        self.flush(stats)
+        if completed:
+            try:
+                ParseCheckpoint.objects.filter(book=self.book).delete()
+            except Exception as e:
+                self.error_logger(
+                    f"Could not delete parse checkpoint: {type(e).__name__} - {str(e)}"
+                )
         try:
             self.book.is_parsed = True
             self.book.last_parsed_at = timezone.now()
@@ -467,12 +693,10 @@ class EGWBookParser:
             error_msg = f"Error updating book status: {type(e).__name__} - {str(e)}"
             stats["error_details"].append(error_msg)
             self.error_logger(error_msg)
-        
-        return stats
+        book_parsed.send(sender=self.__class__, book=self.book)
     
     def _extract_text_from_html(self, html_content: str) -> str:
         """Extract text content from HTML."""
-        soup = BeautifulSoup(html_content, "html.parser")
-        for script in soup(["script", "style"]):
-            script.decompose()
-        return soup.get_text(separator="\n", strip=True)
+        soup = parse_html(html_content, self.html_backend)
+        soup.remove_all("script, style")
+        return soup.text(separator="\n", strip=True)
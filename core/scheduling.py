@@ -0,0 +1,73 @@
+"""
+Delivery slot calculation for daily inspirations.
+"""
+from datetime import datetime, time, timedelta, tzinfo
+from datetime import timezone as dt_timezone
+from typing import Optional, Union
+
+import pytz
+
+DEFAULT_TIMEZONE = "Europe/Kyiv"
+
+
+def resolve_timezone(user_tz: Union[tzinfo, str, None]) -> tzinfo:
+    """Return tzinfo for value stored in UserSettings.timezone (falls back to Kyiv)."""
+    if not user_tz:
+        return pytz.timezone(DEFAULT_TIMEZONE)
+    if isinstance(user_tz, str):
+        try:
+            return pytz.timezone(user_tz)
+        except pytz.UnknownTimeZoneError:
+            return pytz.timezone(DEFAULT_TIMEZONE)
+    return user_tz
+
+
+def localize(naive: datetime, user_tz: tzinfo) -> datetime:
+    """Attach timezone to naive local datetime (works for pytz and zoneinfo)."""
+    if hasattr(user_tz, "localize"):
+        return user_tz.normalize(user_tz.localize(naive))
+    return naive.replace(tzinfo=user_tz)
+
+
+def next_delivery_at(
+    notification_time: time,
+    user_tz: Union[tzinfo, str, None],
+    after: datetime,
+) -> datetime:
+    """
+    Get next UTC moment when notification_time occurs in user timezone.
+
+    Returns the first slot strictly after `after`.
+    """
+    tz = resolve_timezone(user_tz)
+    local_now = after.astimezone(tz)
+    local_date = local_now.date()
+
+    for day_offset in range(3):
+        candidate = localize(
+            datetime.combine(local_date + timedelta(days=day_offset), notification_time),
+            tz,
+        ).astimezone(dt_timezone.utc)
+        if candidate > after:
+            return candidate
+
+    # Недосяжно для реальних часових зон, але не повертаємо None
+    return after + timedelta(days=1)
+
+
+def local_date_at(moment: datetime, user_tz: Union[tzinfo, str, None]):
+    """Get calendar date of `moment` in user timezone."""
+    return moment.astimezone(resolve_timezone(user_tz)).date()
+
+
+def schedule_for(
+    notification_time: Optional[time],
+    user_tz: Union[tzinfo, str, None],
+    is_active: bool,
+    has_book: bool,
+    after: datetime,
+) -> Optional[datetime]:
+    """Slot value for UserSettings.next_delivery_at (None when nothing to deliver)."""
+    if not is_active or not has_book or notification_time is None:
+        return None
+    return next_delivery_at(notification_time, user_tz, after)
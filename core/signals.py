@@ -0,0 +1,12 @@
+"""
+Signals sent by the book parser.
+
+The parser writes days with bulk upserts that do not send post_save, so apps that
+cache data of inspirations (e.g. the bot's delivery plan) listen to these instead.
+"""
+from django.dispatch import Signal
+
+# Збережені пакетом наявні дні змінились: inspiration_ids
+inspirations_updated = Signal()
+# Парсинг книги завершено (повністю чи частково): book
+book_parsed = Signal()
@@ -0,0 +1,143 @@
+"""
+Compact storage of large DailyInspiration columns.
+
+CompressedTextField keeps text compressed in a binary column and gives back str, so
+model code and queries read it like a TextField. Every stored value starts with a
+one-byte codec tag, so values written with different codecs can be read together:
+
+- b"z": zlib (standard library, the default)
+- b"s": zstandard, if the `zstandard` package is installed
+- b"r": uncompressed UTF-8, for short values where compression does not pay off
+
+The codec for new values is the INSPIRATION_COMPRESSION setting ("zlib", "zstd" or
+"none"). canonical_html() strips the parts of a stored page that neither the
+Telegram converter nor text extraction use, so the message and original_text of a
+day are the same before and after.
+"""
+import zlib
+from functools import lru_cache
+from typing import Optional
+
+from django import forms
+from django.conf import settings
+from django.db import models
+
+from core.html_backend import HtmlNode, parse_html
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+ZLIB, ZSTD, RAW = b"z", b"s", b"r"
+CODECS = ("zlib", "zstd", "none")
+# Коротші значення зберігаються без стиснення: заголовок zlib/zstd їх лише збільшить
+MIN_COMPRESSED_SIZE = 128
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+# Елементи, які пропускають і конвертер у Telegram, і витягування тексту
+NON_CONTENT_SELECTOR = "script, style"
+
+
+@lru_cache(maxsize=1)
+def default_codec() -> str:
+    """INSPIRATION_COMPRESSION if installed; zstd falls back to zlib without zstandard."""
+    codec = getattr(settings, "INSPIRATION_COMPRESSION", "zlib") or "none"
+    if codec not in CODECS:
+        raise ValueError(
+            f"Unknown INSPIRATION_COMPRESSION {codec!r} (available: {', '.join(CODECS)})"
+        )
+    if codec == "zstd" and not ZSTD_AVAILABLE:
+        return "zlib"
+    return codec
+
+
+def compress_text(text: str, codec: Optional[str] = None) -> bytes:
+    data = text.encode("utf-8")
+    codec = codec or default_codec()
+    if codec == "none" or len(data) < MIN_COMPRESSED_SIZE:
+        return RAW + data
+    if codec == "zstd":
+        return ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return ZLIB + zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress_text(value: bytes) -> str:
+    value = bytes(value)
+    tag, data = value[:1], value[1:]
+    if tag == RAW:
+        return data.decode("utf-8")
+    if tag == ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    if tag == ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError(
+                "Value is compressed with zstd, install the zstandard package to read it"
+            )
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown compressed text codec {tag!r}")
+
+
+class CompressedTextField(models.BinaryField):
+    """Text stored compressed (see module docstring); str in Python, bytes in the database."""
+
+    description = "Compressed text"
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        # BinaryField прибирає editable=False; у нас типове значення True
+        if self.editable:
+            kwargs.pop("editable", None)
+        else:
+            kwargs["editable"] = False
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return decompress_text(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        return decompress_text(value)
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, (bytes, memoryview)):
+            return value
+        return compress_text(str(value))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        return super().get_db_prep_value(value, connection, prepared=True)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(
+            self, **{"form_class": forms.CharField, "widget": forms.Textarea, **kwargs}
+        )
+
+
+def strip_non_content(content: HtmlNode):
+    """Remove scripts and styles from a content element in place."""
+    content.remove_all(NON_CONTENT_SELECTOR)
+
+
+def canonical_html(html_content: str) -> str:
+    """Stored page HTML without the parts strip_non_content() removes (for rows saved before it)."""
+    lowered = html_content.lower()
+    if "<script" not in lowered and "<style" not in lowered:
+        # Без змін лишаємо рядок як є, щоб content_hash сторінки не змінився
+        return html_content
+    # html.parser не додає <html>/<body> навколо фрагмента
+    fragment = parse_html(html_content, "html.parser")
+    strip_non_content(fragment)
+    return fragment.html()
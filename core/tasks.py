@@ -0,0 +1,68 @@
+import logging
+from typing import Optional
+
+from celery import shared_task
+
+from core import history
+from core.batch_parser import DEFAULT_BOOK_TIMEOUT, BatchBookParser, books_to_parse
+from core.parsers import DEFAULT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def parse_books(
+    book_ids: Optional[list] = None,
+    all_unparsed: bool = False,
+    force: bool = False,
+    resume: bool = False,
+    workers: int = 4,
+    concurrency: int = 4,
+    rate: float = 2.0,
+    max_pages: int = 400,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    book_timeout: Optional[float] = DEFAULT_BOOK_TIMEOUT,
+) -> dict:
+    """Parse books in parallel like the parse_books command; returns status of every book."""
+    books, problems = books_to_parse(book_ids or [], all_unparsed, force, resume)
+    for problem in problems:
+        logger.warning(problem)
+
+    def log_progress(snapshot: dict):
+        logger.info(
+            "Parsing books: %s/%s finished (%s failed), %s pages (%.1f/s), %s errors",
+            snapshot["done"] + snapshot["with_errors"] + snapshot["failed"], snapshot["books"],
+            snapshot["failed"], snapshot["total_pages"], snapshot["pages_per_second"],
+            snapshot["errors"],
+        )
+
+    batch = BatchBookParser(
+        books, workers=workers, concurrency=concurrency, rate=rate, max_pages=max_pages,
+        batch_size=batch_size, resume=resume, book_timeout=book_timeout,
+    )
+    results = batch.run(progress=log_progress, interval=30.0)
+    return {
+        "skipped": problems,
+        "books": [
+            {
+                "book_id": result.book_id,
+                "status": result.status,
+                "error": result.error,
+                "pages": result.stats["total_pages"] if result.stats else 0,
+                "parsed": result.stats["parsed"] if result.stats else 0,
+                "errors": result.stats["errors"] if result.stats else 0,
+            }
+            for result in results
+        ],
+    }
+
+
+@shared_task
+def archive_sent_history(retention_days: Optional[int] = None) -> dict:
+    """Compact deliveries older than the retention window into the monthly archive (nightly)."""
+    stats = history.archive_sent_history(history.archive_cutoff(retention_days))
+    logger.info(
+        "Archived %s sent inspirations: %s archive rows created, %s updated",
+        stats["moved"], stats["created"], stats["updated"],
+    )
+    return stats
@@ -0,0 +1,16 @@
+import pytest
+import redis
+from django.conf import settings
+
+
+@pytest.fixture
+def redis_client():
+    """Sync client of the project Redis; tests that need Redis are skipped without it."""
+    client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        client.ping()
+    except redis.RedisError:
+        client.close()
+        pytest.skip("Redis is not available")
+    yield client
+    client.close()
@@ -0,0 +1,29 @@
+from datetime import date
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Book, DailyInspiration, SentInspiration, TelegramUser
+
+pytestmark = pytest.mark.django_db
+
+
+def _changelist_queries(admin_client, rows: int) -> int:
+    SentInspiration.objects.all().delete()
+    for index in range(rows):
+        book = Book.objects.create(title=f"Admin book {index}")
+        inspiration = DailyInspiration.objects.create(
+            book=book, date=date(2000, 1, 1), original_text="x"
+        )
+        user = TelegramUser.objects.create(telegram_id=500 + rows * 100 + index)
+        SentInspiration.objects.create(telegram_user=user, inspiration=inspiration)
+    with CaptureQueriesContext(connection) as captured:
+        response = admin_client.get("/admin/core/sentinspiration/")
+    assert response.status_code == 200
+    return len(captured.captured_queries)
+
+
+def test_delivery_changelist_queries_do_not_grow_with_rows(admin_client):
+    # Рядок списку показує назву книги: без select_related це запит на кожен рядок
+    assert _changelist_queries(admin_client, 2) == _changelist_queries(admin_client, 6)
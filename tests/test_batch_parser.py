@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from core import batch_parser
+from core.batch_parser import BatchBookParser
+from core.crawler import AsyncBookCrawler
+from core.fake_egw import FakeEGWSite
+from core.models import Book, DailyInspiration
+
+# Книги парсяться в потоках пулу зі своїми з'єднаннями: дані мають бути закомічені
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def test_slow_book_times_out_and_others_finish():
+    with FakeEGWSite(pages=10) as fast_site, FakeEGWSite(pages=10, latency=0.5) as slow_site:
+        fast = Book.objects.create(title="Fast", source_url=fast_site.start_url)
+        slow = Book.objects.create(title="Slow", source_url=slow_site.start_url)
+        batch = BatchBookParser([fast, slow], workers=2, rate=0, book_timeout=1.0)
+        results = batch.run(interval=0.1)
+
+    statuses = {result.book_id: result for result in results}
+    assert statuses[fast.pk].status == "done"
+    assert DailyInspiration.objects.filter(book=fast).count() == 10
+    assert statuses[slow.pk].status == "failed"
+    assert "TimeoutError" in statuses[slow.pk].error
+    slow.refresh_from_db()
+    assert not slow.is_parsed
+
+
+def test_stuck_book_is_abandoned(monkeypatch):
+    release = threading.Event()
+
+    def stuck(self, max_pages=400, timeout=None):
+        release.wait(30)
+        return self.parser.new_stats()
+
+    monkeypatch.setattr(AsyncBookCrawler, "run", stuck)
+    monkeypatch.setattr(batch_parser, "STUCK_BOOK_GRACE", 0.0)
+    book = Book.objects.create(title="Stuck", source_url="http://127.0.0.1:9/read/1")
+    try:
+        results = BatchBookParser([book], workers=1, book_timeout=0.2).run(interval=0.1)
+    finally:
+        release.set()
+
+    assert [(result.status, result.book_id) for result in results] == [("failed", book.pk)]
+    assert "stuck" in results[0].error
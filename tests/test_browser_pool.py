@@ -0,0 +1,52 @@
+import pytest
+
+from core.browser import SELENIUM_AVAILABLE, BrowserPool
+from core.fake_egw import FakeEGWSite
+from core.models import Book, DailyInspiration
+from core.parsers import EGWBookParser
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(not SELENIUM_AVAILABLE, reason="Selenium is not installed"),
+]
+
+PAGES = 6
+
+
+def _parse(site: FakeEGWSite, errors: list, browser_pool=None) -> list:
+    book = Book.objects.create(title="Browser pool", language="uk")
+    parser = EGWBookParser(book=book, start_url=site.start_url, delay=0, error_logger=errors.append,
+                           browser_pool=browser_pool)
+    parser.parse_book(max_pages=site.pages)
+    # html_content браузер серіалізує інакше, тож порівнюємо дати, адреси й текст
+    return list(
+        DailyInspiration.objects
+        .filter(book=book)
+        .order_by("date")
+        .values_list("date", "source_url", "original_text")
+    )
+
+
+@pytest.mark.parametrize("size", [1, 3])
+def test_pool_renders_script_pages_like_static_ones(size):
+    errors = []
+    with FakeEGWSite(pages=PAGES, assets=True) as site:
+        expected = _parse(site, errors)
+
+        site.render_delay = 0.2
+        pool = BrowserPool(size=size, error_logger=errors.append)
+        try:
+            pool.start()
+        except Exception as e:
+            pytest.skip(f"Chrome is not available: {type(e).__name__} - {e}")
+        drivers = list(pool._drivers)
+        assets_before = site.asset_requests
+        with pool:
+            rendered = _parse(site, errors, pool)
+
+    assert len(expected) == PAGES
+    assert rendered == expected
+    assert errors == []
+    # Стилі, картинки та шрифти заблоковані
+    assert site.asset_requests == assets_before
+    assert [driver for driver in drivers if driver.service.process.poll() is None] == []
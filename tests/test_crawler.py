@@ -0,0 +1,60 @@
+import pytest
+
+from core.crawler import AsyncBookCrawler
+from core.fake_egw import FakeEGWSite
+from core.models import Book, DailyInspiration
+from core.parsers import EGWBookParser
+
+pytestmark = pytest.mark.django_db
+
+
+def _parse(site: FakeEGWSite, engine: str, pages: int, errors: list) -> tuple:
+    book = Book.objects.create(title=f"Crawler test ({engine})", language="uk")
+    parser = EGWBookParser(book=book, start_url=site.start_url, delay=0, error_logger=errors.append)
+    if engine == "async":
+        stats = AsyncBookCrawler(parser, concurrency=4, rate=0).run(max_pages=pages)
+    else:
+        stats = parser.parse_book(max_pages=pages)
+    days = list(
+        DailyInspiration.objects
+        .filter(book=book)
+        .order_by("date")
+        .values_list("date", "source_url", "html_content", "original_text")
+    )
+    return stats, days
+
+
+def test_async_crawler_matches_sync_parser():
+    with FakeEGWSite(pages=30) as site:
+        sync_stats, sync_days = _parse(site, "sync", 30, [])
+        async_stats, async_days = _parse(site, "async", 30, [])
+
+    assert len(sync_days) == 30
+    assert async_days == sync_days
+    assert async_stats["parsed"] == sync_stats["parsed"]
+
+
+def test_invalid_utf8_page_is_decoded_like_sync_parser():
+    with FakeEGWSite(pages=5) as site:
+        site.invalid_utf8.add(3)
+        _, sync_days = _parse(site, "sync", 5, [])
+        _, async_days = _parse(site, "async", 5, [])
+
+    assert len(async_days) == 5
+    assert "�" in async_days[2][3]
+    assert async_days == sync_days
+
+
+def test_producer_error_is_raised_instead_of_hanging(monkeypatch):
+    def broken(self, raw, url):
+        raise RuntimeError("extraction failed")
+
+    monkeypatch.setattr(EGWBookParser, "process_page", broken)
+    with FakeEGWSite(pages=5) as site:
+        book = Book.objects.create(title="Crawler test (error)", language="uk")
+        parser = EGWBookParser(
+            book=book, start_url=site.start_url, delay=0, error_logger=lambda msg: None
+        )
+        with pytest.raises(RuntimeError, match="extraction failed"):
+            AsyncBookCrawler(parser, concurrency=4, rate=0).run(max_pages=5)
+    assert not DailyInspiration.objects.filter(book=book).exists()
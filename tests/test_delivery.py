@@ -0,0 +1,190 @@
+import asyncio
+import threading
+from datetime import date
+
+import pytest
+
+from bot import bot as bot_module
+from bot import tasks
+from bot.bot import create_bot
+from bot.delivery import (
+    DeliveryPipeline,
+    _claim_key,
+    claim_recipients,
+    get_redis,
+    release_claims,
+)
+from bot.fake_telegram import FakeTelegram
+from core.models import Book, DailyInspiration, SentInspiration, TelegramUser
+
+
+def test_unexpected_telegram_errors_fail_one_message_not_the_batch(redis_client):
+    async def send_all():
+        redis = get_redis()
+        try:
+            async with FakeTelegram() as telegram:
+                telegram.errors = {
+                    101: (404, "Not Found: chat not found"),
+                    102: (401, "Unauthorized"),
+                    103: (409, "Conflict"),
+                }
+                async with create_bot(telegram.session()) as bot:
+                    pipeline = DeliveryPipeline(bot, redis, rate=1000, capacity=1000, max_retries=0)
+                    results = await asyncio.gather(
+                        *(pipeline.send(chat_id, "text") for chat_id in (100, 101, 102, 103, 104))
+                    )
+        finally:
+            await redis.aclose()
+        return results, pipeline.stats
+
+    results, stats = asyncio.run(send_all())
+
+    assert results == [True, False, False, False, True]
+    assert stats.sent == 2
+    assert stats.failed == 0
+    assert sorted(stats.rejected) == [101, 102, 103]
+    assert stats.blocked == []
+
+
+def test_bad_request_is_not_retried(redis_client):
+    async def send():
+        redis = get_redis()
+        try:
+            async with FakeTelegram() as telegram:
+                telegram.errors = {100: (400, "Bad Request: can't parse entities")}
+                async with create_bot(telegram.session()) as bot:
+                    pipeline = DeliveryPipeline(bot, redis, rate=1000, capacity=1000, max_retries=3)
+                    return await pipeline.send(100, "text"), len(telegram.sent_messages())
+        finally:
+            await redis.aclose()
+
+    assert asyncio.run(send()) == (False, 1)
+
+
+@pytest.fixture
+def telegram():
+    """FakeTelegram served from its own event loop thread, for code that runs asyncio.run()."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    fake = FakeTelegram()
+    asyncio.run_coroutine_threadsafe(fake.start(), loop).result()
+    yield fake
+    asyncio.run_coroutine_threadsafe(fake.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+@pytest.mark.django_db
+def test_failed_recipients_are_released_for_the_retry(redis_client, telegram, monkeypatch):
+    book = Book.objects.create(title="Delivery test")
+    inspiration = DailyInspiration.objects.create(
+        book=book, date=date(2000, 1, 1), original_text="x"
+    )
+    users = TelegramUser.objects.bulk_create(
+        [TelegramUser(telegram_id=chat_id) for chat_id in range(200, 205)]
+    )
+    telegram.errors = {
+        201: (404, "Not Found: chat not found"),
+        202: (403, "Forbidden: bot was blocked"),
+    }
+    monkeypatch.setattr(
+        bot_module, "create_bot", lambda session=None: create_bot(telegram.session())
+    )
+    # Для "en" повідомлення немає: KeyError не має обірвати решту пачки
+    monkeypatch.setattr(tasks, "_render_inspiration_messages", lambda *args: {"uk": "Текст"})
+    recipients = [(200, "uk"), (201, "uk"), (202, "uk"), (203, "en"), (204, "uk")]
+    keys = [_claim_key(inspiration.id, chat_id, language) for chat_id, language in recipients]
+    try:
+        delivered, failed = tasks._deliver(inspiration.id, recipients)
+
+        assert delivered == [(200, "uk"), (204, "uk")]
+        # Чат не знайдено - остаточна відмова, її заявка лишається
+        assert failed == [(203, "en")]
+        assert [bool(redis_client.exists(key)) for key in keys] == [True, True, True, False, True]
+        sent = SentInspiration.objects.filter(inspiration=inspiration)
+        assert set(sent.values_list("telegram_user__telegram_id", flat=True)) == {200, 204}
+        assert not TelegramUser.objects.get(pk=users[2].pk).is_active
+
+        # Повтор задачі надсилає лише тим, кому не вдалося
+        telegram.errors = {}
+        telegram.calls.clear()
+        monkeypatch.setattr(
+            tasks, "_render_inspiration_messages", lambda *args: {"uk": "Текст", "en": "Text"}
+        )
+        delivered, failed = tasks._deliver(inspiration.id, recipients)
+        assert delivered == [(203, "en")]
+        assert failed == []
+        assert [int(call["chat_id"]) for call in telegram.sent_messages()] == [203]
+    finally:
+        redis_client.delete(*keys)
+
+
+@pytest.mark.django_db
+def test_batch_retries_only_transient_failures(redis_client, telegram, monkeypatch):
+    book = Book.objects.create(title="Retry test")
+    inspiration = DailyInspiration.objects.create(
+        book=book, date=date(2000, 1, 3), original_text="x"
+    )
+    TelegramUser.objects.bulk_create(
+        [TelegramUser(telegram_id=chat_id) for chat_id in range(210, 213)]
+    )
+    telegram.errors = {211: (400, "Bad Request: chat not found")}
+    monkeypatch.setattr(
+        bot_module, "create_bot", lambda session=None: create_bot(telegram.session())
+    )
+    # Для "en" повідомлення немає - тимчасова невдача, яку задача має повторити
+    monkeypatch.setattr(tasks, "_render_inspiration_messages", lambda *args: {"uk": "Текст"})
+    retries = []
+
+    def retry(args, countdown):
+        retries.append(args)
+        return RuntimeError("retry")
+
+    monkeypatch.setattr(tasks.send_inspiration_batch, "retry", retry)
+    recipients = [[210, "uk"], [211, "uk"], [212, "en"]]
+    keys = [_claim_key(inspiration.id, chat_id, language) for chat_id, language in recipients]
+    try:
+        with pytest.raises(RuntimeError):
+            tasks.send_inspiration_batch(inspiration.id, recipients)
+
+        assert retries == [(inspiration.id, [(212, "en")])]
+        assert sorted(int(call["chat_id"]) for call in telegram.sent_messages()) == [210, 211]
+    finally:
+        redis_client.delete(*keys)
+
+
+@pytest.mark.django_db
+def test_retried_batch_records_and_claims_nothing_new(redis_client):
+    book = Book.objects.create(title="Ledger test")
+    inspiration = DailyInspiration.objects.create(
+        book=book, date=date(2000, 1, 2), original_text="x"
+    )
+    TelegramUser.objects.bulk_create(
+        [TelegramUser(telegram_id=chat_id) for chat_id in range(300, 310)]
+    )
+    recipients = [(chat_id, "uk") for chat_id in range(300, 310)]
+
+    # Повтор задачі після часткової невдачі пише ті самі пари ще раз
+    tasks._record_sent(inspiration.id, recipients)
+    tasks._record_sent(inspiration.id, recipients[:5])
+    assert SentInspiration.objects.filter(inspiration=inspiration).count() == 10
+
+    async def claim_twice():
+        redis = get_redis()
+        try:
+            claimed = await claim_recipients(redis, inspiration.id, recipients)
+            again = await claim_recipients(redis, inspiration.id, recipients)
+            await release_claims(redis, inspiration.id, claimed)
+        finally:
+            await redis.aclose()
+        return claimed, again
+
+    keys = [_claim_key(inspiration.id, chat_id, language) for chat_id, language in recipients]
+    try:
+        claimed, again = asyncio.run(claim_twice())
+        assert sorted(claimed) == recipients
+        assert again == []
+        assert redis_client.exists(*keys) == 0
+    finally:
+        redis_client.delete(*keys)
@@ -0,0 +1,80 @@
+from datetime import date, datetime, time, timezone
+
+import pytest
+
+from bot import delivery_plan
+from core.fake_egw import FakeEGWSite
+from core.models import Book, DailyInspiration, TelegramUser, UserSettings
+from core.parsers import EGWBookParser
+from core.signals import book_parsed, inspirations_updated
+
+pytestmark = pytest.mark.django_db
+
+# День далеко в майбутньому: ключі тесту не перетинаються з планами робочого Redis
+PLAN_DAY = date(2031, 3, 5)
+
+
+@pytest.fixture
+def plan_redis(redis_client):
+    yield redis_client
+    keys = redis_client.keys(f"delivery:plan:{PLAN_DAY.isoformat()}*")
+    keys += [
+        delivery_plan.MESSAGES_KEY.format(inspiration_id=inspiration_id)
+        for inspiration_id in DailyInspiration.objects.values_list("id", flat=True)
+    ]
+    if keys:
+        redis_client.delete(*keys)
+
+
+def test_book_parsed_after_plan_build_is_planned(plan_redis):
+    book = Book.objects.create(title="Late book")
+    user = TelegramUser.objects.create(telegram_id=400)
+    UserSettings.objects.create(
+        telegram_user=user, notification_time=time(9, 0), selected_book=book
+    )
+    # 09:00 за Києвом - 07:00 UTC
+    UserSettings.objects.filter(telegram_user=user).update(
+        next_delivery_at=datetime(2031, 3, 5, 7, 0, tzinfo=timezone.utc)
+    )
+    stats = delivery_plan.build_plan(PLAN_DAY, plan_redis)
+    assert (stats["users"], stats["without_inspiration"]) == (0, 1)
+
+    inspiration = DailyInspiration.objects.create(book=book, date=PLAN_DAY, original_text="x")
+    planned = delivery_plan.replan_book(
+        book.id, plan_redis, now=datetime(2031, 3, 5, 5, 0, tzinfo=timezone.utc)
+    )
+
+    assert planned == 1
+    due = delivery_plan.take_due(datetime(2031, 3, 5, 7, 0, tzinfo=timezone.utc), plan_redis)
+    assert due.recipients == {inspiration.id: [(400, "uk")]}
+
+
+def test_reparsed_days_are_reported(monkeypatch):
+    updated, parsed = [], []
+
+    def on_updated(sender, inspiration_ids, **kwargs):
+        updated.extend(inspiration_ids)
+
+    def on_parsed(sender, book, **kwargs):
+        parsed.append(book.pk)
+
+    inspirations_updated.connect(on_updated)
+    book_parsed.connect(on_parsed)
+    # Приймачі бота тут не потрібні: вони ходять у Redis
+    monkeypatch.setattr("bot.delivery_plan.forget_messages", lambda *ids, redis=None: None)
+    monkeypatch.setattr("bot.tasks.replan_book_deliveries.delay", lambda book_id: None)
+    try:
+        book = Book.objects.create(title="Reparsed book", language="uk")
+        with FakeEGWSite(pages=3) as site:
+            EGWBookParser(book=book, start_url=site.start_url, delay=0).parse_book(max_pages=3)
+            assert updated == []
+            # Один змінений день зберігається через save(), два - пакетним upsert
+            site.revisions.update({2: 1, 3: 1})
+            EGWBookParser(book=book, start_url=site.start_url, delay=0).parse_book(max_pages=3)
+    finally:
+        inspirations_updated.disconnect(on_updated)
+        book_parsed.disconnect(on_parsed)
+
+    edited = DailyInspiration.objects.filter(book=book).order_by("date")[1:]
+    assert sorted(updated) == [inspiration.id for inspiration in edited]
+    assert parsed == [book.pk, book.pk]
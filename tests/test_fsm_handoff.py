@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from bot.fake_telegram import FakeTelegram, text_update
+from bot.templates.translations import get_text, t
+
+# Обробники читають користувача з потоку sync_to_async: потрібні закомічені дані
+pytestmark = pytest.mark.django_db(transaction=True)
+
+# Окремий інтерпретатор без спільної з тестом пам'яті читає стан розмови з Redis
+READ_STATE = """
+import asyncio, json, sys
+import django
+django.setup()
+from aiogram.fsm.storage.base import StorageKey
+from bot.bot import create_storage
+
+async def read(bot_id, telegram_id):
+    storage = create_storage()
+    try:
+        key = StorageKey(bot_id=bot_id, chat_id=telegram_id, user_id=telegram_id)
+        return await storage.get_state(key)
+    finally:
+        await storage.close()
+
+print(json.dumps(asyncio.run(read(int(sys.argv[1]), int(sys.argv[2])))))
+"""
+
+
+def _state_in_another_process(bot_id: int, telegram_id: int):
+    result = subprocess.run(
+        [sys.executable, "-c", READ_STATE, str(bot_id), str(telegram_id)],
+        cwd=Path(__file__).resolve().parents[1], env=os.environ.copy(),
+        capture_output=True, text=True, timeout=60, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.fixture
+def dispatcher():
+    from bot.bot import dp, setup_bot
+
+    if not dp.sub_routers:
+        asyncio.run(setup_bot())
+    original = dp.fsm.storage
+    yield dp
+    dp.fsm.storage = original
+
+
+async def _converse(dp, telegram_id: int) -> tuple:
+    from bot.bot import create_bot, create_storage
+
+    replies, state = [], None
+    async with FakeTelegram() as telegram:
+        bot = create_bot(session=telegram.session())
+        try:
+            for text in (t("uk", "set_time"), t("uk", "cancel")):
+                # Кожен крок - з новим клієнтом сховища, як в іншій репліці бота
+                dp.fsm.storage = create_storage()
+                try:
+                    await dp.feed_raw_update(bot, text_update(telegram_id, text))
+                finally:
+                    await dp.fsm.storage.close()
+                replies.append(telegram.sent_messages()[-1]["text"])
+                if state is None:
+                    state = _state_in_another_process(bot.id, telegram_id)
+        finally:
+            dp.fsm.storage = create_storage()
+            await dp.fsm.get_context(bot, chat_id=telegram_id, user_id=telegram_id).clear()
+            await dp.fsm.storage.close()
+            await bot.session.close()
+    return replies, state
+
+
+def test_conversation_state_is_visible_to_another_process(redis_client, dispatcher):
+    telegram_id = random.randint(10 ** 12, 2 * 10 ** 12)
+
+    replies, state = asyncio.run(_converse(dispatcher, telegram_id))
+
+    assert state == "SettingsStates:waiting_for_time"
+    # Незареєстрований користувач отримує українські тексти; без стану "Скасувати"
+    # відповіло б, що активної операції немає
+    assert replies == [get_text("uk", "set_time"), get_text("uk", "cancel")]
@@ -0,0 +1,61 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from core.history import archive_sent_history
+from core.models import (
+    Book,
+    DailyInspiration,
+    SentInspiration,
+    SentInspirationArchive,
+    TelegramUser,
+)
+
+pytestmark = pytest.mark.django_db
+
+SENT_AT = datetime(2000, 2, 1, tzinfo=timezone.utc)
+
+
+def _send(user: TelegramUser, book: Book, day: date, language: str = "uk"):
+    inspiration, _ = DailyInspiration.objects.get_or_create(
+        book=book, date=day, defaults={"original_text": "x"}
+    )
+    sent = SentInspiration.objects.create(
+        telegram_user=user, inspiration=inspiration, language=language
+    )
+    # sent_at заповнюється auto_now_add, тож старий час ставимо окремо
+    SentInspiration.objects.filter(pk=sent.pk).update(sent_at=SENT_AT)
+
+
+def test_month_split_across_batches_round_trips():
+    first, second = Book.objects.create(title="First"), Book.objects.create(title="Second")
+    reader = TelegramUser.objects.create(telegram_id=500)
+    other = TelegramUser.objects.create(telegram_id=501)
+    days = [date(2000, 1, 1), date(2000, 1, 15), date(2000, 1, 31)]
+    for day in days:
+        _send(reader, first, day)
+    # Той самий місяць і користувач з іншою книгою, та сама книга в іншого користувача
+    _send(reader, second, date(2000, 1, 2))
+    _send(other, first, date(2000, 1, 31), language="en")
+
+    stats = archive_sent_history(before=datetime(2000, 3, 1, tzinfo=timezone.utc), batch_size=2)
+
+    assert stats["moved"] == 5
+    assert stats["batches"] == 3
+    # Три дні одного місяця не вміщаються в пачку з двох рядків: місяць дописується в архів
+    assert stats["created"] == 3
+    assert stats["updated"] >= 1
+    assert not SentInspiration.objects.exists()
+    archived = {
+        (entry.telegram_user.telegram_id, entry.book.title, entry.language): entry
+        for entry in SentInspirationArchive.objects.select_related("telegram_user", "book")
+    }
+    assert set(archived) == {(500, "First", "uk"), (500, "Second", "uk"), (501, "First", "en")}
+    entry = archived[(500, "First", "uk")]
+    # День 31 - біт 30
+    assert entry.days == 1 | 1 << 14 | 1 << 30
+    assert entry.delivered_days == [1, 15, 31]
+    assert entry.month == date(2000, 1, 1)
+    assert entry.last_sent_at == SENT_AT
+    assert archived[(500, "Second", "uk")].delivered_days == [2]
+    assert archived[(501, "First", "en")].delivered_days == [31]
@@ -0,0 +1,46 @@
+import pytest
+
+from bot.html_converter import convert_html_to_telegram
+from core.fake_egw import saved_pages
+from core.html_backend import available_backends
+from core.models import Book
+from core.parsers import EGWBookParser
+
+REFERENCE_BACKEND = "html.parser"
+PAGES = saved_pages()
+
+
+def _extract_all(backend: str) -> dict:
+    errors = []
+    parser = EGWBookParser(
+        book=Book(title="Backends"), start_url="https://egwwritings.org/read/1",
+        html_backend=backend, error_logger=errors.append,
+    )
+    extracted = {}
+    for name, raw in PAGES:
+        html_content, date_str, next_url = parser.process_page(
+            raw, f"https://egwwritings.org/read/{name}#22"
+        )
+        # Серіалізація HTML у бекендів різна (порядок атрибутів, <br/>),
+        # тому порівнюємо те, що бачить користувач
+        extracted[name] = (
+            date_str, next_url, parser._extract_text_from_html(html_content),
+            convert_html_to_telegram(html_content),
+        ) if html_content is not None else None
+    assert errors == []
+    return extracted
+
+
+@pytest.mark.parametrize(
+    "backend", [backend for backend in available_backends() if backend != REFERENCE_BACKEND]
+)
+def test_backend_extracts_same_as_html_parser(backend):
+    assert _extract_all(backend) == _extract_all(REFERENCE_BACKEND)
+
+
+def test_saved_pages_have_dates_and_next_links():
+    extracted = _extract_all(REFERENCE_BACKEND)
+
+    assert all(extracted.values())
+    without_next = {name for name, (_, next_url, _, _) in extracted.items() if next_url is None}
+    assert without_next <= {"uk_january_01"}
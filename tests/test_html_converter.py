@@ -0,0 +1,76 @@
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+from bot.benchmarks.legacy_converter import legacy_convert_html_to_telegram
+from bot.html_converter import convert_html_to_telegram
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "bot" / "fixtures" / "converter"
+PAGES = sorted(FIXTURES_DIR.glob("*.html"))
+
+# Зіпсовані атрибути та розмітка, на яких нова реалізація колись розходилась зі старою
+MALFORMED = [
+    '<span class="egw_content"><a title="t" style="s" data-x="a>b">x</a></span>',
+    '<span class="egw_content"><a c="d" a="b" class="egw_content">x</a></span>',
+    '<span class="egw_content"><!---->',
+    '<span class="egw_content">a<![CDATA[]]>b<?>c<!>d</span>',
+    '<span class="egw_content"><pre>a<!---->b</pre></span>',
+    '<a f="href=">"',
+    "<div class=book-content><a x='href=\"q\"'>y</a></div>",
+]
+
+ATTRS = [
+    "class=egw_content", 'class="egw_content', "class='egw_content x'", 'class=""', "class",
+    "href=https://a.b/c", 'href="https://a.b/?x=1&y=2"', "href='http://x/\"q\"'", "href",
+    'id="p1" id="p2"', 'data-x="a>b"', "title='a\"b'", 'CLASS="egw_content"', "x=", '"', "'",
+    'a="b"c="d"', 'rel="no  follow"', 'class="\tegw_content\n"', 'title="&bogus;"',
+    'title="&#xZZ;"',
+]
+FRAGMENTS = [
+    '<a href="https://x" title="t" class="c">', "</a>", '<span class="egw_content">', "</span>",
+    '<p id="z">', "</p>", "<b class=x>", "</b>", "<br>", "<br/>", "<li>", "<ul>", "</ul>",
+    '<h3 class="egw_content">', "</h3>", "<!-- c -->", "<!---->", "&amp;", "&", "<", ">",
+    "&nbsp;", '<div class="pager">', "</div>", "<script>x</script>", "<em style=q>", "</em>", "<a>",
+    '<a href=http://q/?a=1&b=2 rel="x y">', '<img src=x alt="a>b">', "<pre>  a  \n b</pre>",
+]
+_RE_TAG = re.compile(r"<([a-zA-Z][a-zA-Z0-9]*)([^>]*)>")
+
+
+def _mutate(html: str, rng: random.Random) -> str:
+    for _ in range(rng.randint(1, 4)):
+        if rng.random() < 0.5:
+            match = rng.choice(list(_RE_TAG.finditer(html)))
+            extra = " ".join(rng.sample(ATTRS, rng.randint(1, 2)))
+            attrs = match.group(2) if rng.random() < 0.6 else ""
+            html = html[:match.start()] + f"<{match.group(1)}{attrs} {extra}>" + html[match.end():]
+        else:
+            index = rng.randrange(len(html))
+            html = html[:index] + rng.choice(FRAGMENTS) + html[index:]
+    return html
+
+
+@pytest.mark.parametrize("page", PAGES, ids=lambda page: page.stem)
+def test_pages_match_golden_files(page):
+    html = page.read_text(encoding="utf-8")
+    golden = page.with_suffix(".txt").read_text(encoding="utf-8")
+
+    assert convert_html_to_telegram(html) == golden
+    assert legacy_convert_html_to_telegram(html) == golden
+
+
+@pytest.mark.parametrize("html", MALFORMED)
+def test_malformed_markup_matches_legacy(html):
+    assert convert_html_to_telegram(html) == legacy_convert_html_to_telegram(html)
+
+
+def test_mutated_pages_match_legacy():
+    rng = random.Random(0)
+    pages = [page.read_text(encoding="utf-8") for page in PAGES]
+    mismatches = []
+    for _ in range(300):
+        html = _mutate(rng.choice(pages), rng)
+        if convert_html_to_telegram(html) != legacy_convert_html_to_telegram(html):
+            mismatches.append(html)
+    assert mismatches == []
@@ -0,0 +1,140 @@
+import re
+from datetime import date, time, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bot.inspirations import book_ids, get_random_inspiration
+from bot.tasks import _due_settings, _plan_deliveries, _record_sent, advance_delivery_slots
+from bot.user_cache import load_user_context
+from core.models import Book, DailyInspiration, SentInspiration, TelegramUser, UserSettings
+
+pytestmark = pytest.mark.django_db
+
+# Довідник книг з кількох рядків послідовне сканування читає швидше за індекс
+SMALL_TABLES = {Book._meta.db_table}
+
+# Рядки плану з повним проходом таблиці без індексу
+SEQ_SCAN_PATTERNS = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    "sqlite": re.compile(r"\bSCAN (\w+)(?!\w| USING)"),
+}
+
+USERS = 3000
+BOOKS = 3
+SENT_DAYS = 5
+DUE_USERS = 200
+
+
+def _seed(now) -> tuple:
+    books = Book.objects.bulk_create(
+        [Book(title=f"Explain book {index}", language="uk") for index in range(BOOKS)]
+    )
+    first_day = date(now.year, 1, 1)
+    inspirations = DailyInspiration.objects.bulk_create([
+        DailyInspiration(
+            book=book, date=first_day + timedelta(days=offset), original_text="Explain"
+        )
+        for book in books
+        for offset in range(366)
+    ])
+    users = TelegramUser.objects.bulk_create(
+        [TelegramUser(telegram_id=2 * 10 ** 12 + index) for index in range(USERS)]
+    )
+    UserSettings.objects.bulk_create([
+        UserSettings(
+            telegram_user=user,
+            selected_book=books[index % BOOKS],
+            notification_time=time(9, 0),
+            # Слот частини користувачів уже настав, решта чекають на завтра
+            next_delivery_at=(
+                now - timedelta(minutes=1) if index < DUE_USERS
+                else now + timedelta(hours=index % 24 + 1)
+            ),
+        )
+        for index, user in enumerate(users)
+    ], batch_size=1000)
+    by_book = {}
+    for inspiration in inspirations:
+        by_book.setdefault(inspiration.book_id, []).append(inspiration)
+    SentInspiration.objects.bulk_create([
+        SentInspiration(
+            telegram_user=user, inspiration=by_book[books[index % BOOKS].id][day], language="uk"
+        )
+        for index, user in enumerate(users)
+        for day in range(SENT_DAYS)
+    ], batch_size=5000)
+    return users, inspirations
+
+
+def _analyze():
+    # Без свіжої статистики планувальник оцінює таблиці як порожні
+    tables = [
+        model._meta.db_table
+        for model in (Book, DailyInspiration, TelegramUser, UserSettings, SentInspiration)
+    ]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("ANALYZE " + ", ".join(tables))
+        else:
+            cursor.execute("ANALYZE")
+
+
+def _explain(sql: str) -> str:
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        return "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+
+
+def test_hot_queries_use_indexes():
+    """The nightly plan build reads all active settings by design and is not checked."""
+    pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+    if pattern is None:
+        pytest.skip(f"Plans of {connection.vendor} are not supported")
+
+    now = timezone.now().replace(second=0, microsecond=0)
+    users, inspirations = _seed(now)
+    _analyze()
+    due_ids = list(
+        UserSettings.objects
+        .filter(telegram_user__in=users[:DUE_USERS])
+        .values_list("id", flat=True)
+    )
+    book = inspirations[0].book
+
+    def random_day():
+        book_ids.invalidate(book.id)
+        get_random_inspiration(book.id)
+        book_ids.invalidate(book.id)
+
+    hot_paths = {
+        "scheduler tick": lambda: _plan_deliveries(list(_due_settings(now)), now),
+        "advance slots": lambda: advance_delivery_slots(due_ids, now.isoformat()),
+        "random day": random_day,
+        "user context": lambda: load_user_context(users[0].telegram_id),
+        "ledger write": lambda: _record_sent(
+            inspirations[-1].id, [(user.telegram_id, "uk") for user in users[:DUE_USERS]]
+        ),
+        "latest deliveries": lambda: list(
+            SentInspiration.objects.select_related("inspiration")[:100]
+        ),
+    }
+    scans = []
+    for name, run in hot_paths.items():
+        with CaptureQueriesContext(connection) as captured:
+            run()
+        selects = [
+            query["sql"] for query in captured.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+        assert selects, name
+        for sql in selects:
+            plan = _explain(sql)
+            scanned = sorted(set(pattern.findall(plan)) - SMALL_TABLES)
+            if scanned:
+                scans.append(f"{name} ({', '.join(scanned)}): {sql[:200]}\n{plan}")
+
+    assert scans == []
@@ -0,0 +1,85 @@
+from datetime import time, timedelta
+
+import pytest
+import redis
+from django.utils import timezone
+
+from bot import delivery_plan, tasks
+from core.models import Book, DailyInspiration, SentInspiration, TelegramUser, UserSettings
+from core.scheduling import local_date_at
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def due_users():
+    """Three users whose slot has come, with today's inspiration of their book."""
+    now = timezone.now()
+    book = Book.objects.create(title="Scheduler test")
+    inspiration = DailyInspiration.objects.create(
+        book=book, date=local_date_at(now, "Europe/Kyiv"), original_text="x"
+    )
+    users = TelegramUser.objects.bulk_create(
+        [TelegramUser(telegram_id=telegram_id) for telegram_id in (300, 301, 302)]
+    )
+    for user in users:
+        UserSettings.objects.create(
+            telegram_user=user, notification_time=time(9, 0), selected_book=book
+        )
+    UserSettings.objects.filter(telegram_user__in=users).update(
+        next_delivery_at=now - timedelta(minutes=1)
+    )
+    return inspiration
+
+
+def test_tick_falls_back_to_database_when_redis_is_down(due_users, monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        delivery_plan, "get_redis",
+        lambda: redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1),
+    )
+    monkeypatch.setattr(
+        tasks.send_inspiration_batch, "delay",
+        lambda inspiration_id, chunk: batches.append((inspiration_id, chunk)),
+    )
+    monkeypatch.setattr(tasks.advance_delivery_slots, "delay", lambda *args: None)
+
+    tasks.send_inspirations_to_users()
+
+    assert [(inspiration_id, sorted(chunk)) for inspiration_id, chunk in batches] == [
+        (due_users.id, [(300, "uk"), (301, "uk"), (302, "uk")])
+    ]
+    # Слоти перенесені, наступний тік нікого не бере
+    assert not UserSettings.objects.filter(next_delivery_at__lte=timezone.now()).exists()
+
+
+def test_plan_skips_sent_inactive_and_missing_days(due_users):
+    now = timezone.now()
+    users = {user.telegram_id: user for user in TelegramUser.objects.all()}
+    SentInspiration.objects.create(telegram_user=users[301], inspiration=due_users, language="uk")
+    # Той самий день іншою мовою - окрема доставка
+    UserSettings.objects.filter(telegram_user=users[302]).update(language="en")
+    SentInspiration.objects.create(telegram_user=users[302], inspiration=due_users, language="uk")
+    TelegramUser.objects.bulk_create([TelegramUser(telegram_id=303), TelegramUser(telegram_id=304)])
+    UserSettings.objects.create(
+        telegram_user=TelegramUser.objects.get(telegram_id=303), notification_time=time(9, 0),
+        selected_book=Book.objects.create(title="Without today"),
+    )
+    UserSettings.objects.create(
+        telegram_user=TelegramUser.objects.get(telegram_id=304), notification_time=time(9, 0),
+        selected_book=due_users.book, is_active=False,
+    )
+    UserSettings.objects.filter(telegram_user__telegram_id__in=(303, 304)).update(
+        next_delivery_at=now - timedelta(minutes=1)
+    )
+
+    due_settings = list(
+        UserSettings.objects.select_related("telegram_user").filter(
+            telegram_user__telegram_id__in=(300, 301, 302, 303, 304)
+        )
+    )
+    recipients = tasks._plan_deliveries(due_settings, now)
+
+    assert {
+        inspiration_id: sorted(chunk) for inspiration_id, chunk in recipients.items()
+    } == {due_users.id: [(300, "uk"), (302, "en")]}
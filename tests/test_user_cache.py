@@ -0,0 +1,43 @@
+import asyncio
+from datetime import time
+
+import pytest
+
+from bot import user_cache
+from core.models import TelegramUser, UserSettings
+
+# Контекст читається з потоку sync_to_async: дані мають бути закомічені
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def cached_user(redis_client):
+    user_cache.cache.clear()
+    user = TelegramUser.objects.create(telegram_id=500)
+    UserSettings.objects.create(telegram_user=user, notification_time=time(9, 0))
+    yield user
+    user_cache.cache.clear()
+    redis_client.delete(user_cache.VERSION_KEY.format(telegram_id=500))
+
+
+def test_write_of_another_process_is_seen_on_next_update(cached_user):
+    assert asyncio.run(user_cache.get_user_context(500)).language == "uk"
+
+    # Інший процес (адмінка, Celery): локальний кеш бота про запис не знає
+    UserSettings.objects.filter(telegram_user=cached_user).update(language="en")
+    assert asyncio.run(user_cache.get_user_context(500)).language == "uk"
+    user_cache.bump_version(500)
+
+    assert asyncio.run(user_cache.get_user_context(500)).language == "en"
+
+
+def test_save_bumps_shared_version(cached_user, redis_client):
+    key = user_cache.VERSION_KEY.format(telegram_id=500)
+    before = int(redis_client.get(key) or 0)
+
+    settings_obj = UserSettings.objects.get(telegram_user=cached_user)
+    settings_obj.language = "ru"
+    settings_obj.save()
+
+    assert int(redis_client.get(key)) == before + 1
+    assert 0 < redis_client.ttl(key) <= user_cache.VERSION_TTL
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from aiogram import Dispatcher, Router
+from aiogram.types import Message
+from aiohttp import ClientSession, web
+from django.core.exceptions import ImproperlyConfigured
+
+from bot.bot import create_bot
+from bot.fake_telegram import FakeTelegram, text_update
+from bot.webhook import create_webhook_app
+
+SECRET = "test-secret"
+PATH = "/telegram/webhook"
+
+
+async def _post_updates() -> tuple:
+    router = Router()
+
+    @router.message()
+    async def echo(message: Message):
+        await message.answer(message.text)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    async with FakeTelegram() as telegram:
+        bot = create_bot(session=telegram.session())
+        runner = web.AppRunner(
+            create_webhook_app(bot, dp, path=PATH, secret_token=SECRET, concurrency=2)
+        )
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}{PATH}"
+        try:
+            async with ClientSession() as client:
+                async with client.post(url, json=text_update(1, "no secret")) as response:
+                    rejected = response.status
+                headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+                statuses = []
+                for index in range(5):
+                    update = text_update(10 + index, f"hello {index}")
+                    async with client.post(url, json=update, headers=headers) as response:
+                        statuses.append(response.status)
+            # Оновлення обробляються після відповіді webhook
+            for _ in range(500):
+                if len(telegram.sent_messages()) >= 5:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await runner.cleanup()
+            await bot.session.close()
+        return rejected, statuses, telegram.sent_messages()
+
+
+def test_webhook_checks_secret_and_handles_updates():
+    rejected, statuses, sent = asyncio.run(_post_updates())
+
+    assert rejected == 401
+    assert statuses == [200] * 5
+    assert sorted(message["text"] for message in sent) == [f"hello {index}" for index in range(5)]
+
+
+def test_webhook_requires_secret():
+    with pytest.raises(ImproperlyConfigured):
+        create_webhook_app(create_bot(), Dispatcher(), path=PATH, secret_token="")
+
+
+async def _post_in_parallel(updates: int, concurrency: int) -> tuple:
+    router = Router()
+    in_flight, peak, handled = 0, 0, []
+
+    @router.message()
+    async def slow(message: Message):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        handled.append(message.text)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    async with FakeTelegram() as telegram:
+        bot = create_bot(session=telegram.session())
+        runner = web.AppRunner(
+            create_webhook_app(bot, dp, path=PATH, secret_token=SECRET, concurrency=concurrency)
+        )
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}{PATH}"
+        headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        try:
+            async with ClientSession() as client:
+                async def post(index: int) -> int:
+                    update = text_update(100 + index, f"update {index}")
+                    async with client.post(url, json=update, headers=headers) as response:
+                        return response.status
+
+                statuses = await asyncio.gather(*(post(index) for index in range(updates)))
+            for _ in range(500):
+                if len(handled) >= updates:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await runner.cleanup()
+            await bot.session.close()
+        return statuses, peak, handled
+
+
+def test_webhook_bounds_concurrent_handlers():
+    statuses, peak, handled = asyncio.run(_post_in_parallel(updates=12, concurrency=3))
+
+    assert statuses == [200] * 12
+    assert peak == 3
+    assert len(handled) == 12